@@ -0,0 +1,283 @@
+from time import time
+
+import requests
+from gevent import sleep
+from requests.exceptions import RequestException
+
+from django.conf import settings
+
+# Dictionary of the HTTP sessions used to access the Zendesk and GitHub APIs for
+# this process. Each session is keyed by the API host it is used for and the
+# credentials that are sent with it, so every request made to the same host with
+# the same credentials reuses the session's pool of keep-alive connections.
+_SESSIONS = {}
+
+def get_session(host, auth=None, params=None):
+    """Gets the shared HTTP session for the passed API host and credentials,
+    creating it if this process has not used the host with those credentials
+    yet.
+
+    Parameters:
+        host - The host name of the API that the session will be used to
+                access (i.e. "api.github.com").
+        auth - An optional tuple of the user name and password that should be
+                sent with every request made through the session.
+        params - An optional dictionary of query parameters that should be sent
+                    with every request made through the session (i.e. an API
+                    access token).
+
+    Returns a requests session that keeps up to settings.API_POOL_SIZE
+    connections to the host alive and asks for gzip encoded responses.
+    """
+    if params is None:
+        params = {}
+    session_key = (host, auth, tuple(sorted(params.items())))
+
+    session = _SESSIONS.get(session_key)
+    if session is None:
+        session = requests.session(
+            auth=auth,
+            params=params,
+            headers={'Accept-Encoding': 'gzip'},
+            config={'keep_alive': True,
+                    'pool_connections': 1,
+                    'pool_maxsize': settings.API_POOL_SIZE}
+        )
+        _SESSIONS[session_key] = session
+
+    return session
+
+# Constant priorities for API requests. Low priority requests are deferred
+# rather than sent when the remaining request budget for their API is low.
+PRIORITY_HIGH = 2
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 0
+
+# The fraction of an API's request budget that is held back for normal and high
+# priority requests. Low priority requests are deferred once the remaining
+# budget falls under this fraction.
+LOW_PRIORITY_RESERVE = 0.2
+
+# The fraction of an API's request budget under which requests are paced so that
+# the remaining budget is spread out until the budget resets.
+PACING_THRESHOLD = 0.1
+
+# The length in seconds of the Zendesk rate limit window. Zendesk only reports
+# the number of requests remaining in the current minute, not when it resets.
+ZEN_RATE_LIMIT_WINDOW = 60
+
+# The number of times a request that was rejected for exceeding a rate limit is
+# sent again after waiting for the limit to reset.
+RATE_LIMIT_RETRIES = 2
+
+# The longest time in seconds that a request will wait on a rate limit before
+# giving up.
+MAX_RATE_LIMIT_WAIT = 60
+
+# Dictionary of the request budgets that this process has seen for each API
+# token and Zendesk subdomain, keyed by the budget keys passed to api_get.
+_BUDGETS = {}
+
+class RateLimitError(RequestException):
+    """Exception raised when a request cannot be sent because the rate limit of
+    the API it is for has been used up."""
+    pass
+
+class RateLimitDeferred(RateLimitError):
+    """Exception raised when a low priority request is not sent so that the
+    remaining budget of the API it is for can be kept for other requests."""
+    pass
+
+class RequestBudget(object):
+    """The rate limit budget of requests that are left for a single API token
+    or Zendesk subdomain, as last reported by the API's response headers.
+    """
+    def __init__(self):
+        self.limit = None # Total number of requests allowed per window
+        self.remaining = None # Number of requests left in the current window
+        self.reset_at = None # Unix time at which the current window ends
+        self.retry_at = 0 # Unix time before which no request should be sent
+        self.requests_made = 0 # Number of requests sent with this budget
+
+    def record(self, response):
+        """Updates the budget with the rate limit headers of the passed
+        response.
+
+        Parameters:
+            response - A response from the API that the budget is for.
+
+        Returns True if the response was rejected for exceeding the rate limit
+        and False if it was not.
+        """
+        now = time()
+        self.requests_made += 1
+        headers = response.headers
+
+        # GitHub reports its limits with X-RateLimit-* headers, and Zendesk
+        # reports them with X-Rate-Limit-* headers.
+        limit = headers.get('x-ratelimit-limit') or \
+                headers.get('x-rate-limit')
+        remaining = headers.get('x-ratelimit-remaining') or \
+                    headers.get('x-rate-limit-remaining')
+        if limit is not None:
+            self.limit = int(limit)
+        if remaining is not None:
+            self.remaining = int(remaining)
+            if headers.get('x-ratelimit-reset') is not None:
+                self.reset_at = int(headers['x-ratelimit-reset'])
+            else:
+                self.reset_at = now + ZEN_RATE_LIMIT_WINDOW
+
+        rate_limited = response.status_code == 429 or \
+                (response.status_code == 403 and self.remaining == 0)
+        if rate_limited:
+            if headers.get('retry-after') is not None:
+                self.retry_at = now + int(headers['retry-after'])
+            elif self.reset_at is not None:
+                self.retry_at = self.reset_at
+            else:
+                self.retry_at = now + ZEN_RATE_LIMIT_WINDOW
+
+        return rate_limited
+
+    def get_wait(self, priority):
+        """Gets how long a request with the passed priority should wait before
+        being sent.
+
+        Parameters:
+            priority - The priority of the request that is about to be sent.
+
+        Returns the number of seconds to wait, which is 0 if the request can be
+        sent right away. Raises a RateLimitDeferred exception if the request is
+        low priority and the remaining budget is being held for other requests.
+        """
+        now = time()
+        if self.retry_at > now:
+            return self.retry_at - now
+        if self.remaining is None or self.reset_at is None or \
+        self.reset_at <= now:
+            return 0
+
+        if priority == PRIORITY_LOW and self.limit and \
+        self.remaining < self.limit * LOW_PRIORITY_RESERVE:
+            raise RateLimitDeferred(
+                'Only %i of %i API requests remain until the rate limit resets'
+                % (self.remaining, self.limit)
+            )
+        if self.remaining <= 0:
+            return self.reset_at - now
+
+        # Spread the requests that remain evenly until the budget resets. High
+        # priority requests are only held back once the budget is used up.
+        if priority < PRIORITY_HIGH and self.limit and \
+        self.remaining < self.limit * PACING_THRESHOLD:
+            return (self.reset_at - now) / self.remaining
+
+        return 0
+
+def get_budget(budget_key):
+    """Gets the request budget for the passed budget key, creating it if this
+    process has not made a request with the key yet.
+
+    Parameters:
+        budget_key - A hashable key for the API token or Zendesk subdomain
+                        whose requests share a rate limit.
+
+    Returns the RequestBudget for the key.
+    """
+    budget = _BUDGETS.get(budget_key)
+    if budget is None:
+        budget = RequestBudget()
+        _BUDGETS[budget_key] = budget
+
+    return budget
+
+def api_get(session, url, budget_key, priority=PRIORITY_NORMAL, **kwargs):
+    """Sends a GET request through the passed session once the rate limit
+    budget for the request's API allows it.
+
+    Parameters:
+        session - The session to send the request through.
+        url - The URL of the request.
+        budget_key - The key of the request budget that the request counts
+                        against (see get_budget).
+        priority - The priority of the request. Low priority requests are
+                    deferred when the remaining budget is low.
+        kwargs - Any other keyword arguments for session.get().
+
+    Requests are paced when the remaining budget is low, and a request that is
+    rejected for exceeding the rate limit is sent again after waiting for the
+    time the API asks for.
+
+    Returns the response to the request. Raises a RateLimitError if the request
+    would have to wait longer than MAX_RATE_LIMIT_WAIT seconds to be sent, or a
+    RateLimitDeferred if a low priority request is deferred.
+    """
+    return _send_request(session.get, url, budget_key, priority, **kwargs)
+
+def api_post(session, url, budget_key, priority=PRIORITY_NORMAL, **kwargs):
+    """Sends a POST request through the passed session once the rate limit
+    budget for the request's API allows it, the same way api_get sends GET
+    requests.
+
+    Parameters:
+        session - The session to send the request through.
+        url - The URL of the request.
+        budget_key - The key of the request budget that the request counts
+                        against (see get_budget).
+        priority - The priority of the request (see api_get).
+        kwargs - Any other keyword arguments for session.post().
+
+    Returns the response to the request. Raises the same exceptions as
+    api_get.
+    """
+    return _send_request(session.post, url, budget_key, priority, **kwargs)
+
+def _send_request(send, url, budget_key, priority, **kwargs):
+    """Sends a request with the passed session method once the rate limit
+    budget for the request's API allows it, for api_get and api_post.
+    """
+    budget = get_budget(budget_key)
+
+    for attempt in xrange(RATE_LIMIT_RETRIES + 1):
+        wait = budget.get_wait(priority)
+        if wait > MAX_RATE_LIMIT_WAIT:
+            raise RateLimitError(
+                'The API rate limit has been exceeded and will not reset for '
+                '%i seconds' % wait
+            )
+        if wait > 0:
+            sleep(wait)
+
+        response = send(url, **kwargs)
+        if not budget.record(response):
+            break
+
+    return response
+
+def get_budget_usage(budget_keys, requests_made_before=None):
+    """Gets how much of the request budgets for the passed keys have been used.
+
+    Parameters:
+        budget_keys - A dictionary of budget keys with the names they should be
+                        reported under as its keys.
+        requests_made_before - An optional dictionary previously returned by
+                                this function. If it is passed, the reported
+                                request counts are the number of requests made
+                                since it was returned.
+
+    Returns a dictionary with the passed names as keys and dictionaries with
+    the 'requests_made', 'remaining' and 'limit' values of each budget as
+    values.
+    """
+    budget_usage = {}
+    for name, budget_key in budget_keys.items():
+        budget = get_budget(budget_key)
+        requests_made = budget.requests_made
+        if requests_made_before is not None:
+            requests_made -= requests_made_before[name]['requests_made']
+        budget_usage[name] = {'requests_made': requests_made,
+                              'remaining': budget.remaining,
+                              'limit': budget.limit}
+
+    return budget_usage
@@ -1,10 +1,42 @@
-from datetime import datetime, timedelta
-
-import requests
+import json
+import logging
+import re
+from calendar import timegm
+from datetime import datetime
+from time import time
+from urlparse import parse_qs, urlparse
+from uuid import uuid4
+
+from gevent import killall, sleep, spawn
+from gevent.pool import Pool
+from gevent.queue import Queue
 from requests.exceptions import RequestException
 
+from django.conf import settings
 from django.core.cache import cache
 
+from gitzen.enhancement_tracking.api_requests import (
+    PRIORITY_NORMAL,
+    RateLimitError,
+    api_get,
+    api_post,
+    get_budget_usage,
+    get_session
+)
+from gitzen.enhancement_tracking.cache_codec import GitIssue
+from gitzen.enhancement_tracking.cache_storage import (
+    load_cache_data,
+    save_cache_data
+)
+
+logger = logging.getLogger(__name__)
+
+# Constant host names of the GitHub and Zendesk APIs. The Zendesk host requires
+# the custom URL subdomain of the specific company whose information is being
+# accessed for the string's formatting.
+GIT_API_HOST = 'api.github.com'
+ZEN_API_HOST = '%(subdomain)s.zendesk.com'
+
 # Constant URL string for accessing GitHub issues through the GitHub API. It
 # requires a GitHub organization/user and repository for the string's
 # formatting.
@@ -17,6 +49,31 @@ GIT_ISSUE_URL = 'https://api.github.com/repos/%(organization)s/' \
 GIT_INDIVIDUAL_ISSUE_URL = 'https://api.github.com/repos/%(organization)s/' \
                            '%(repository)s/issues/%(issue_number)i'
 
+# Constant URL string for accessing the issue events feed of a GitHub
+# repository, which lists the events of every issue in the repository with the
+# newest events first. It requires a GitHub organization/user and repository
+# for the string's formatting.
+GIT_ISSUE_EVENTS_URL = 'https://api.github.com/repos/%(organization)s/' \
+                       '%(repository)s/issues/events'
+
+# Pattern of a single link of the Link header of a paginated GitHub API
+# response, with the link's URL and its relation (i.e. 'next' or 'last').
+GIT_LINK_PATTERN = re.compile(r'<(?P<url>[^>]*)>\s*;\s*rel="(?P<rel>[^"]*)"')
+
+# Constant query of the GitHub GraphQL API for a batch of issues from a single
+# repository. The repository's owner and name are passed as the variables of
+# the query. It requires the GIT_ISSUE_QUERY_FIELD of each issue in the batch,
+# joined by spaces, for the string's formatting.
+GIT_ISSUES_QUERY = 'query($owner: String!, $name: String!) { ' \
+                   'repository(owner: $owner, name: $name) { %(issues)s } }'
+
+# Constant field of GIT_ISSUES_QUERY that selects a single issue under an alias
+# made from its number. It requires the issue number for the string's
+# formatting.
+GIT_ISSUE_QUERY_FIELD = 'issue%(issue_number)i: ' \
+                        'issue(number: %(issue_number)i) ' \
+                        '{ number state url updatedAt }'
+
 # Constant URL string for searching for tickets through the Zendesk API. It
 # requires the custom URL subdomain of the specific company whose information
 # is being accessed for the string's formatting.
@@ -26,11 +83,55 @@ ZEN_SEARCH_URL = 'https://%(subdomain)s.zendesk.com/api/v2/search.json'
 # product_enhancement tag form its API.
 ZEN_TICKET_ALL_SEARCH_QUERY = 'type:ticket tags:product_enhancement status:open'
 
-# Constant search query used to access open Zendesk tickets with the
-# product_enhancement tag that have been updated since a certain date. The
-# expected format for the date is YYYY-MM-DD.
-ZEN_TICKET_UPDATE_SEARCH_QUERY = 'type:ticket tags:product_enhancement ' \
-                                 'updated>%(updated)s'
+# The number of tickets requested in each page of search results.
+ZEN_SEARCH_PAGE_SIZE = 100
+
+# The largest number of results that Zendesk returns for a single search. Pages
+# past this many results come back empty, so larger searches are read from the
+# ZEN_SEARCH_EXPORT_URL instead.
+ZEN_SEARCH_RESULT_LIMIT = 1000
+
+# The number of pages of search results that are requested at once after the
+# first page has given the number of pages.
+ZEN_SEARCH_FETCH_CONCURRENCY = 4
+
+# Constant URL string for exporting the results of a search through the Zendesk
+# API. The export pages through every result with a cursor instead of page
+# numbers, so it is not limited to ZEN_SEARCH_RESULT_LIMIT results, but its
+# pages must be requested one after another. It requires the custom URL
+# subdomain of the specific company whose information is being accessed for the
+# string's formatting.
+ZEN_SEARCH_EXPORT_URL = 'https://%(subdomain)s.zendesk.com/api/v2/search/' \
+                        'export.json'
+
+# The number of tickets requested in each page of a search export.
+ZEN_SEARCH_EXPORT_PAGE_SIZE = 1000
+
+# Constant URL string for exporting the Zendesk tickets that have changed since
+# a start time through the Zendesk incremental export API. It requires the
+# custom URL subdomain of the specific company whose information is being
+# accessed for the string's formatting.
+ZEN_INCREMENTAL_TICKETS_URL = 'https://%(subdomain)s.zendesk.com/api/v2/' \
+                              'incremental/tickets.json'
+
+# The number of tickets the Zendesk incremental export API returns in a full
+# page. A page with fewer tickets than this is the last page of the export.
+ZEN_INCREMENTAL_PAGE_SIZE = 1000
+
+# The minimum age in seconds of the start time that Zendesk accepts for an
+# incremental export.
+ZEN_INCREMENTAL_MIN_AGE = 60
+
+# Constant tag that marks a Zendesk ticket as an enhancement request.
+ZEN_ENHANCEMENT_TAG = 'product_enhancement'
+
+# Status given to the updated Zendesk tickets that no longer have the
+# ZEN_ENHANCEMENT_TAG, so that their enhancements are removed like those of
+# closed tickets.
+ZEN_UNTAGGED_STATUS = 'untagged'
+
+# Zendesk ticket statuses whose enhancements should be removed from the cache.
+ZEN_REMOVED_STATUSES = ('closed', 'deleted', ZEN_UNTAGGED_STATUS)
 
 # Constant URL string for accessing Zendesk users through the Zendesk API. It
 # requires the custom URL subdomain for the specific company whose users are
@@ -38,7 +139,67 @@ ZEN_TICKET_UPDATE_SEARCH_QUERY = 'type:ticket tags:product_enhancement ' \
 # formatting.
 ZEN_USER_URL = 'https://%(subdomain)s.zendesk.com/api/v2/users/%(user_id)i.json'
 
-def build_cache_index(api_access_data):
+# Constant URL string for accessing several Zendesk users at once through the
+# Zendesk API. It requires the custom URL subdomain for the specific company
+# whose users are being accessed for the string's formatting.
+ZEN_USERS_SHOW_MANY_URL = 'https://%(subdomain)s.zendesk.com/api/v2/users/' \
+                          'show_many.json'
+
+# The maximum number of user IDs that Zendesk accepts in a single request to
+# the ZEN_USERS_SHOW_MANY_URL.
+ZEN_USERS_PER_REQUEST = 100
+
+# The names of the tables that enhancements are classified into.
+ENHANCEMENT_TABLES = ('need_attention', 'tracking', 'unassociated_enhancements',
+                      'not_git_enhancements')
+
+# Constant cache key used to lock the syncing of the cache data for an API
+# access model so that only one process syncs a group's data at a time. It
+# requires the ID of the API access model for the string's formatting.
+SYNC_LOCK_KEY = 'sync_lock:%(api_access_id)i'
+
+# The number of seconds between checks of whether a sync lock held by another
+# process has been released.
+SYNC_LOCK_POLL_INTERVAL = 0.25
+
+# The number of times the lease of a sync lock is renewed during each
+# settings.SYNC_LOCK_LEASE seconds while a sync is running.
+SYNC_LOCK_RENEWALS = 3
+
+# Dictionary of the times that the leases of the sync locks held by this
+# process were last set, keyed by the tokens of the locks.
+_SYNC_LOCK_LEASES = {}
+
+# Dictionary of the greenlets running background updates of the cache index in
+# this process, keyed by the ID of the API access model being updated.
+_REFRESHES = {}
+
+class SyncLockBusy(Exception):
+    """Exception raised when a change sent by a webhook cannot be applied
+    because another process has held the sync lock of the group for longer than
+    settings.SYNC_LOCK_WAIT seconds."""
+    pass
+
+def build_cache_index(api_access_data, priority=PRIORITY_NORMAL):
+    """Builds and indexes the cache data necessary for the application for the
+    passed API access model, unless another process is already syncing the
+    model's cache data. In that case, this function waits for the other sync to
+    finish instead (see _sync_single_flight).
+
+    Parameters:
+        api_access_data - The object that contains the necessary access
+                            parameters for getting the data needed for the
+                            application from the Zendesk and GitHub APIs.
+        priority - The priority of the API requests made by this function
+                    (see api_requests.api_get).
+
+    This function will raise any RequestExceptions that happen while trying to
+    access either the Zendesk or GitHub APIs so they can be properly handled by
+    the calling view function.
+    """
+    _sync_single_flight(api_access_data, _build_cache_index, priority)
+
+def _build_cache_index(api_access_data, priority=PRIORITY_NORMAL):
     """Builds and indexes the cache data necessary for the application for the
     passed API access model.
 
@@ -46,6 +207,8 @@ def build_cache_index(api_access_data):
         api_access_data - The object that contains the necessary access
                             parameters for getting the data needed for the
                             application from the Zendesk and GitHub APIs.
+        priority - The priority of the API requests made by this function
+                    (see api_requests.api_get).
 
     This function will raise any RequestExceptions that happen while trying to
     access either the Zendesk or GitHub APIs so they can be properly handled by
@@ -53,23 +216,35 @@ def build_cache_index(api_access_data):
     """
     cache_data = {} # Data to be stored in the cache for the passed API access
                     # model.
-    zen_tickets = [] # List of the open tickets in Zendesk with the API access
-                     # model's specified tags.
+    zen_tickets = [] # List of the projected open tickets in Zendesk with the
+                     # API access model's specified tags.
     zen_user_reference = {} # Dictionary reference of the user IDs and
                             # user names associated with the Zendesk tickets in
                             # zen_tickets.
-    git_tickets = [] # List of the GitHub tickets associated with the Zendesk
-                     # tickets in zen_tickets.
-    zen_fieldid = api_access_data.zen_fieldid
+    git_tickets = {} # Dictionary of the GitHub tickets associated with the
+                     # Zendesk tickets in zen_tickets with their issue numbers
+                     # as keys.
+    cached_git_tickets = {} # Dictionary of the GitHub tickets from any cache
+                            # data previously built for the API access model
+                            # with the tickets' issue numbers as keys.
+
+    # Keep the previously cached GitHub tickets so that unchanged tickets can be
+    # reused instead of downloaded again.
+    previous_cache_data = load_cache_data(api_access_data)
+    if previous_cache_data is not None:
+        cached_git_tickets = previous_cache_data['git_tickets']
+
+    # Record the time the gathering starts at so that the next update of the
+    # cache picks up every change made while this function is processing.
+    sync_started = datetime.utcnow()
+    cache_data['zen_watermark'] = int(time())
+    budget_usage = get_budget_usage(_get_budget_keys(api_access_data))
 
     try:
-        zen_tickets = get_zen_tickets(api_access_data)
-        zen_user_ids, git_issue_numbers = get_id_lists(zen_tickets,
-                                                       zen_fieldid)
-        cache_data['git_issue_numbers'] = git_issue_numbers
-        zen_user_reference = get_zen_users(api_access_data, zen_user_ids)
+        zen_tickets, zen_user_reference, git_tickets = _gather_group_data(
+            api_access_data, cached_git_tickets, priority
+        )
         cache_data['zen_user_reference'] = zen_user_reference
-        git_tickets = get_git_tickets(api_access_data, git_issue_numbers)
         cache_data['git_tickets'] = git_tickets
     except RequestException:
         # Raise RequestExceptions so they can be properly handled by whatever
@@ -77,15 +252,289 @@ def build_cache_index(api_access_data):
         raise
 
     enhancement_data = build_enhancement_data(zen_tickets, zen_user_reference,
-                                              git_tickets, zen_fieldid)
+                                              git_tickets)
     cache_data = dict(cache_data.items() + enhancement_data.items())
 
-    # Subtract 10 minutes from the actual time to ensure that no updates are
-    # left out if they were made during the time the function was processing.
-    cache_data['last_updated'] = datetime.utcnow() - timedelta(minutes=10)
-    cache.set(api_access_data.id, cache_data)
+    cache_data['last_updated'] = sync_started
+    cache_data['api_budget_usage'] = get_budget_usage(
+        _get_budget_keys(api_access_data), budget_usage
+    )
+    save_cache_data(api_access_data, cache_data)
+
+def _gather_group_data(api_access_data, cached_git_tickets,
+                       priority=PRIORITY_NORMAL):
+    """Gathers the open product_enhancement Zendesk tickets of the passed API
+    access model along with the Zendesk users and GitHub tickets associated
+    with them.
+
+    Parameters:
+        api_access_data - The object that contains the necessary access
+                            parameters for getting the data needed for the
+                            application from the Zendesk and GitHub APIs.
+        cached_git_tickets - A dictionary of previously gathered GitHub ticket
+                                records with their issue numbers as keys (see
+                                get_git_tickets).
+        priority - The priority of the API requests made by this function
+                    (see api_requests.api_get).
+
+    The users and GitHub tickets associated with the Zendesk tickets are
+    requested in batches as soon as enough of the tickets have been read from
+    the search results to fill a batch (see _get_zen_user_batch and
+    _get_git_ticket_batch), while the following pages of results are still
+    being requested. The Zendesk and GitHub requests therefore overlap, and
+    gathering takes about as long as the slowest of them instead of all of
+    them in turn.
+
+    Returns a tuple of the list of projected Zendesk tickets (see
+    project_zen_ticket), the dictionary of Zendesk user names with the user IDs
+    as keys, and the dictionary of GitIssue records with their issue numbers as
+    keys. RequestExceptions are raised with the name of the API that caused
+    them added to their args, as get_zen_users and get_git_tickets do.
+    """
+    zen_tickets = []
+    zen_user_reference = {}
+    git_tickets = {}
+
+    def get_user_batch(id_batch):
+        zen_user_reference.update(
+            _get_zen_user_batch(api_access_data, id_batch, priority)
+        )
+
+    def get_git_ticket_batch(number_batch):
+        git_tickets.update(_get_git_ticket_batch(
+            api_access_data, number_batch, cached_git_tickets, priority
+        ))
+
+    user_queue, user_workers = _start_workers(
+        get_user_batch, settings.ZEN_USER_FETCH_CONCURRENCY
+    )
+    git_queue, git_workers = _start_workers(get_git_ticket_batch,
+                                            settings.GIT_FETCH_CONCURRENCY)
+    git_batch_size = max(settings.GIT_BATCH_SIZE, 1)
+    zen_user_ids = set()
+    git_issue_numbers = set()
+    id_batch = [] # User IDs waiting to be requested in the next batch.
+    number_batch = [] # Issue numbers waiting to be requested in the next
+                      # batch.
+
+    try:
+        for ticket in get_zen_tickets(api_access_data, priority):
+            zen_tickets.append(ticket)
+
+            if ticket['requester_id'] not in zen_user_ids:
+                zen_user_ids.add(ticket['requester_id'])
+                id_batch.append(ticket['requester_id'])
+                if len(id_batch) == ZEN_USERS_PER_REQUEST:
+                    user_queue.put(id_batch)
+                    id_batch = []
+
+            git_id = ticket['git_id']
+            if git_id is not None and git_id not in git_issue_numbers:
+                git_issue_numbers.add(git_id)
+                number_batch.append(git_id)
+                if len(number_batch) == git_batch_size:
+                    git_queue.put(number_batch)
+                    number_batch = []
+
+        if id_batch:
+            user_queue.put(id_batch)
+        if number_batch:
+            git_queue.put(number_batch)
+        _join_workers(user_queue, user_workers, 'Zendesk')
+        _join_workers(git_queue, git_workers, 'GitHub')
+    finally:
+        # Stop any requests that are still running after a failure since their
+        # results would be thrown away.
+        killall(user_workers + git_workers)
+
+    return (zen_tickets, zen_user_reference, git_tickets)
+
+def _start_workers(function, worker_count):
+    """Starts greenlets that call the passed function with each item that is
+    put in a queue, so that the items are processed concurrently while more of
+    them are still being gathered.
+
+    Parameters:
+        function - The function that processes an item.
+        worker_count - The number of greenlets that process items at once.
+
+    Returns a tuple of the queue and the list of the worker greenlets. The
+    workers stop once the queue is closed by _join_workers.
+    """
+    queue = Queue()
+
+    def work():
+        for item in queue:
+            function(item)
+
+    return (queue, [spawn(work) for i in xrange(worker_count)])
 
-def get_zen_tickets(api_access_data):
+def _join_workers(queue, workers, api_name):
+    """Closes the queue of workers started by _start_workers and waits for the
+    workers to process the items left in it.
+
+    Parameters:
+        queue - The queue of the workers.
+        workers - The list of the worker greenlets.
+        api_name - The name of the API that the workers make requests to.
+
+    Raises the first RequestException raised by any of the workers, with the
+    name of the API added to its args.
+    """
+    # Iterating over a queue stops when StopIteration is taken from it, so one
+    # is put in for each worker.
+    for worker in workers:
+        queue.put(StopIteration)
+
+    try:
+        for worker in workers:
+            worker.get()
+    except RequestException as e:
+        e.args = (e.args[0], api_name)
+        raise
+
+def _sync_single_flight(api_access_data, sync_function, priority):
+    """Runs the passed sync function for the passed API access model while
+    holding the model's sync lock in the cache, so that concurrent requests
+    from any process do not sync the same group's data at the same time.
+
+    Parameters:
+        api_access_data - The API access model whose cache data is synced.
+        sync_function - The function that syncs the cache data. It is passed
+                        the api_access_data and priority.
+        priority - The priority of the API requests made by the sync function.
+
+    The lock is leased for settings.SYNC_LOCK_LEASE seconds so that it expires
+    even if the process holding it dies, and the lease is renewed while the
+    sync function runs since syncing a large group can take longer than a
+    single lease (see _renew_sync_lock). If the lock is already held, the sync
+    function is not run. Instead, this function waits up to
+    settings.SYNC_LOCK_WAIT seconds for the lock to be released so that the
+    caller can read the data the other sync stored, or else the previous data.
+    """
+    lock_token = _acquire_sync_lock(api_access_data)
+
+    if lock_token is not None:
+        renewal = spawn(_renew_sync_lock, api_access_data, lock_token)
+        try:
+            sync_function(api_access_data, priority)
+        finally:
+            renewal.kill()
+            _release_sync_lock(api_access_data, lock_token)
+
+    else:
+        lock_key = SYNC_LOCK_KEY % {'api_access_id': api_access_data.id}
+        waited = 0
+        while waited < settings.SYNC_LOCK_WAIT and \
+        cache.get(lock_key) is not None:
+            sleep(SYNC_LOCK_POLL_INTERVAL)
+            waited += SYNC_LOCK_POLL_INTERVAL
+
+def _acquire_sync_lock(api_access_data):
+    """Tries to take the sync lock for the passed API access model for
+    settings.SYNC_LOCK_LEASE seconds.
+
+    Parameters:
+        api_access_data - The API access model whose sync lock should be taken.
+
+    Returns the token identifying this holder of the lock if the lock was taken
+    and None if another process already holds it.
+    """
+    lock_key = SYNC_LOCK_KEY % {'api_access_id': api_access_data.id}
+    lock_token = uuid4().hex
+
+    leased_at = time()
+    if cache.add(lock_key, lock_token, settings.SYNC_LOCK_LEASE):
+        _SYNC_LOCK_LEASES[lock_token] = leased_at
+        return lock_token
+
+    return None
+
+def _wait_for_sync_lock(api_access_data):
+    """Takes the sync lock for the passed API access model, waiting up to
+    settings.SYNC_LOCK_WAIT seconds for another process to release it.
+
+    Parameters:
+        api_access_data - The API access model whose sync lock should be taken.
+
+    Returns the token identifying this holder of the lock. Raises a
+    SyncLockBusy if the lock is still held by another process after the wait.
+    """
+    lock_token = _acquire_sync_lock(api_access_data)
+    waited = 0
+    while lock_token is None:
+        if waited >= settings.SYNC_LOCK_WAIT:
+            raise SyncLockBusy('The enhancement data of %s is being synced' %
+                               api_access_data.product_name)
+        sleep(SYNC_LOCK_POLL_INTERVAL)
+        waited += SYNC_LOCK_POLL_INTERVAL
+        lock_token = _acquire_sync_lock(api_access_data)
+
+    return lock_token
+
+def _renew_sync_lock(api_access_data, lock_token):
+    """Renews the lease of the sync lock for the passed API access model
+    SYNC_LOCK_RENEWALS times per settings.SYNC_LOCK_LEASE seconds, until the
+    greenlet running this function is killed or the lease could not be renewed
+    in time.
+
+    Parameters:
+        api_access_data - The API access model whose sync lock is renewed.
+        lock_token - The token returned by _acquire_sync_lock when the lock
+                        was taken.
+    """
+    lock_key = SYNC_LOCK_KEY % {'api_access_id': api_access_data.id}
+
+    while True:
+        sleep(float(settings.SYNC_LOCK_LEASE) / SYNC_LOCK_RENEWALS)
+        leased_at = time()
+        if not _is_sync_lease_current(lock_token):
+            return
+        cache.set(lock_key, lock_token, settings.SYNC_LOCK_LEASE)
+        _SYNC_LOCK_LEASES[lock_token] = leased_at
+
+def _is_sync_lease_current(lock_token):
+    """Checks whether the lease of the sync lock held with the passed token is
+    certain not to have run out, which means that no other process can have
+    taken the lock since. The lease is only trusted while there is time left
+    for at least one more renewal, so that the lock cannot expire between the
+    check and whatever is done with the lock after it.
+
+    Parameters:
+        lock_token - The token returned by _acquire_sync_lock when the lock
+                        was taken.
+
+    Returns True if the lease is current and False otherwise.
+    """
+    leased_at = _SYNC_LOCK_LEASES.get(lock_token)
+    lease_margin = float(settings.SYNC_LOCK_LEASE) / SYNC_LOCK_RENEWALS
+
+    return leased_at is not None and \
+           time() - leased_at < settings.SYNC_LOCK_LEASE - lease_margin
+
+def _release_sync_lock(api_access_data, lock_token):
+    """Releases the sync lock for the passed API access model if it is still
+    held with the passed token.
+
+    Parameters:
+        api_access_data - The API access model whose sync lock should be
+                            released.
+        lock_token - The token returned by _acquire_sync_lock when the lock
+                        was taken.
+
+    The cache has no atomic compare-and-delete, so the lock is only deleted
+    while its lease is certain to be current. No other process can take the
+    lock before then, so the lock deleted is always this one. A lock whose
+    lease may have run out is left to expire instead.
+    """
+    lock_key = SYNC_LOCK_KEY % {'api_access_id': api_access_data.id}
+
+    if _is_sync_lease_current(lock_token) and \
+       cache.get(lock_key) == lock_token:
+        cache.delete(lock_key)
+    _SYNC_LOCK_LEASES.pop(lock_token, None)
+
+def get_zen_tickets(api_access_data, priority=PRIORITY_NORMAL):
     """Gets all of the open product_enhancement Zendesk tickets using the
     Zendesk API.
 
@@ -93,32 +542,59 @@ def get_zen_tickets(api_access_data):
         api_access_data - The object that contains the current user's API
                             access data necessary to access the tickets on their
                             Zendesk account.
-
-    Returns a gathered list of Zendesk tickets.
+        priority - The priority of the API requests made by this function
+                    (see api_requests.api_get).
+
+    This function is a generator, and only the projection of each ticket is
+    kept (see project_zen_ticket). The number of tickets is read from the first
+    page of search results. If every ticket fits within the
+    ZEN_SEARCH_RESULT_LIMIT, the rest of the pages are requested concurrently,
+    with at most ZEN_SEARCH_FETCH_CONCURRENCY requests in flight at once, and
+    the tickets are yielded in the order of the pages. Otherwise, the tickets
+    are read from the search export instead (see _export_zen_tickets) so that
+    none of them are missed.
+
+    Yields the projected Zendesk tickets one at a time.
     """
-    # Zendesk user email set up for API token authorization
-    zen_name_tk = api_access_data.zen_name + '/token'
-    zen_tickets = []
-    page = 1
+    zen_fieldid = api_access_data.zen_fieldid
+    url = ZEN_SEARCH_URL % {'subdomain': api_access_data.zen_url}
+    pool = None
+
+    def get_page(page):
+        request_zen_tickets = _zen_get(
+            api_access_data,
+            url,
+            params={'query': ZEN_TICKET_ALL_SEARCH_QUERY,
+                    'per_page': ZEN_SEARCH_PAGE_SIZE,
+                    'page': page},
+            priority=priority
+        )
+        if request_zen_tickets.status_code != 200:
+            request_zen_tickets.raise_for_status()
+        return request_zen_tickets.json
 
     try:
-        while True:
-            request_zen_tickets = requests.get(
-                ZEN_SEARCH_URL % {'subdomain': api_access_data.zen_url},
-                params={'query': ZEN_TICKET_ALL_SEARCH_QUERY,
-                        'per_page': 100,
-                        'page': page},
-                auth=(zen_name_tk, api_access_data.zen_token)
-            )
-            if request_zen_tickets.status_code != 200:
-                request_zen_tickets.raise_for_status()
-            zen_tickets.extend(request_zen_tickets.json['results'])
-            if request_zen_tickets.json['next_page'] is not None:
-                page += 1
-            else:
-                break
-
-    # Catches exceptions from requests.get() or raise_for_status()
+        results = get_page(1)
+
+        if results['count'] > ZEN_SEARCH_RESULT_LIMIT:
+            for ticket in _export_zen_tickets(api_access_data, priority):
+                yield ticket
+            return
+
+        for ticket in results['results']:
+            yield project_zen_ticket(ticket, zen_fieldid)
+
+        page_count = -(-results['count'] // ZEN_SEARCH_PAGE_SIZE)
+        if page_count > 1:
+            # Pool that bounds the number of Zendesk requests in flight at once.
+            pool = Pool(ZEN_SEARCH_FETCH_CONCURRENCY)
+            greenlets = [pool.spawn(get_page, page)
+                         for page in xrange(2, page_count + 1)]
+            for greenlet in greenlets:
+                for ticket in greenlet.get()['results']:
+                    yield project_zen_ticket(ticket, zen_fieldid)
+
+    # Catches exceptions from api_get() or raise_for_status()
     except RequestException as e:
         # Redefines the args attribute of the exception to contain both the
         # original error message and the name of the API responsible for causing
@@ -129,45 +605,219 @@ def get_zen_tickets(api_access_data):
         # function for further processing.
         raise
 
-    return zen_tickets
+    finally:
+        # Stop any requests that are still running after a failure, or after
+        # the caller stopped reading the tickets, since their results would be
+        # thrown away.
+        if pool is not None:
+            pool.kill()
+
+def _export_zen_tickets(api_access_data, priority=PRIORITY_NORMAL):
+    """Gets all of the open product_enhancement Zendesk tickets from the search
+    export of the Zendesk API, which is not limited to ZEN_SEARCH_RESULT_LIMIT
+    results.
+
+    Parameters:
+        api_access_data - The object that contains the current user's API
+                            access data necessary to access the tickets on their
+                            Zendesk account.
+        priority - The priority of the API requests made by this function
+                    (see api_requests.api_get).
+
+    This function is a generator. Each page of the export is requested with the
+    cursor returned with the previous page, so the pages are requested one at a
+    time as the tickets of the previous page are consumed. Any RequestException
+    raised while requesting a page is left for the caller to handle.
+
+    Yields the projected Zendesk tickets one at a time.
+    """
+    zen_fieldid = api_access_data.zen_fieldid
+    params = {'query': ZEN_TICKET_ALL_SEARCH_QUERY,
+              'filter[type]': 'ticket',
+              'page[size]': ZEN_SEARCH_EXPORT_PAGE_SIZE}
+
+    while True:
+        request_zen_tickets = _zen_get(
+            api_access_data,
+            ZEN_SEARCH_EXPORT_URL % {'subdomain': api_access_data.zen_url},
+            params=params,
+            priority=priority
+        )
+        if request_zen_tickets.status_code != 200:
+            request_zen_tickets.raise_for_status()
+
+        results = request_zen_tickets.json
+        for ticket in results['results']:
+            yield project_zen_ticket(ticket, zen_fieldid)
+
+        if not results['meta']['has_more']:
+            break
+        params = dict(params)
+        params['page[after]'] = results['meta']['after_cursor']
+
+def project_zen_ticket(zen_ticket, zen_fieldid):
+    """Projects a Zendesk ticket record from the Zendesk API down to the fields
+    that are used by the application.
+
+    Parameters:
+        zen_ticket - A full Zendesk ticket record from the Zendesk API.
+        zen_fieldid - The ID number of the custom field in Zendesk tickets that
+                        holds its external ticket association.
+
+    Returns a dictionary with the 'id', 'subject', 'requester_id', 'url',
+    'updated_at' and 'status' values of the ticket, its external ticket
+    association string under 'association' (None if it has no association) and
+    the GitHub issue number of the association under 'git_id' (see
+    get_association_git_id).
+    """
+    association = None
+    for field in zen_ticket['fields']:
+        if field['id'] == zen_fieldid:
+            association = field['value'] or None
+            break
 
-def get_id_lists(zen_tickets, zen_fieldid):
+    return {
+        'id': zen_ticket['id'],
+        'subject': zen_ticket['subject'],
+        'requester_id': zen_ticket['requester_id'],
+        'url': zen_ticket['url'],
+        'updated_at': zen_ticket['updated_at'],
+        'status': zen_ticket['status'],
+        'association': association,
+        'git_id': get_association_git_id(association),
+    }
+
+def get_association_git_id(association_data):
+    """Gets the GitHub issue number from the external ticket association string
+    of a Zendesk ticket.
+
+    Parameters:
+        association_data - The external ticket association string, or None if
+                            the ticket has no association.
+
+    Returns the issue number as an integer if the association string is in the
+    format "gh-###", and None if it is not.
+    """
+    if not association_data:
+        return None
+
+    split_association_data = association_data.split('-')
+    if len(split_association_data) != 2 or \
+            split_association_data[0] != 'gh' or \
+            not split_association_data[1].isdigit():
+        return None
+
+    return int(split_association_data[1])
+
+def _get_zen_session(api_access_data):
+    """Gets the shared HTTP session used to access the Zendesk API with the
+    passed API access data.
+
+    Parameters:
+        api_access_data - The object that contains the Zendesk subdomain and
+                            API token credentials the session should use.
+
+    Returns a requests session that sends the Zendesk API token authorization
+    with each of its requests.
+    """
+    # Zendesk user email set up for API token authorization
+    zen_name_tk = api_access_data.zen_name + '/token'
+
+    return get_session(ZEN_API_HOST % {'subdomain': api_access_data.zen_url},
+                       auth=(zen_name_tk, api_access_data.zen_token))
+
+def _get_git_session(api_access_data):
+    """Gets the shared HTTP session used to access the GitHub API with the
+    passed API access data.
+
+    Parameters:
+        api_access_data - The object that contains the GitHub access token the
+                            session should use.
+
+    Returns a requests session that sends the GitHub access token with each of
+    its requests.
+    """
+    return get_session(GIT_API_HOST,
+                       params={'access_token': api_access_data.git_token})
+
+def _zen_get(api_access_data, url, priority=PRIORITY_NORMAL, **kwargs):
+    """Sends a GET request to the Zendesk API through the shared session for the
+    passed API access data, counting it against the request budget of the
+    Zendesk subdomain.
+
+    Parameters:
+        api_access_data - The object that contains the Zendesk access data.
+        url - The URL of the request.
+        priority - The priority of the request (see api_requests.api_get).
+        kwargs - Any other keyword arguments for the request.
+
+    Returns the response to the request.
+    """
+    return api_get(_get_zen_session(api_access_data), url,
+                   _get_zen_budget_key(api_access_data), priority, **kwargs)
+
+def _git_get(api_access_data, url, priority=PRIORITY_NORMAL, **kwargs):
+    """Sends a GET request to the GitHub API through the shared session for the
+    passed API access data, counting it against the request budget of the
+    GitHub access token.
+
+    Parameters:
+        api_access_data - The object that contains the GitHub access data.
+        url - The URL of the request.
+        priority - The priority of the request (see api_requests.api_get).
+        kwargs - Any other keyword arguments for the request.
+
+    Returns the response to the request.
+    """
+    return api_get(_get_git_session(api_access_data), url,
+                   _get_git_budget_key(api_access_data), priority, **kwargs)
+
+def _get_zen_budget_key(api_access_data):
+    """Gets the key of the request budget shared by every request made to the
+    Zendesk subdomain of the passed API access data.
+    """
+    return ('Zendesk', api_access_data.zen_url)
+
+def _get_git_budget_key(api_access_data):
+    """Gets the key of the request budget shared by every request made with the
+    GitHub access token of the passed API access data.
+    """
+    return ('GitHub', api_access_data.git_token)
+
+def _get_budget_keys(api_access_data):
+    """Gets a dictionary of the request budget keys for the passed API access
+    data with the names of their APIs as keys, for use with
+    api_requests.get_budget_usage.
+    """
+    return {'Zendesk': _get_zen_budget_key(api_access_data),
+            'GitHub': _get_git_budget_key(api_access_data)}
+
+def get_id_lists(zen_tickets):
     """Gets lists of the Zendesk user IDs and the GitHub issue numbers that are
     associated with the passed list of Zendesk tickets.
 
     Parameters:
-        zen_tickets - A list of Zendesk tickets whose associated GitHub issue
-                    numbers and Zendesk user IDs are desired.
-        zen_fieldid - The ID number of the custom field in Zendesk tickets that
-                        holds its associated GitHub issue number.
+        zen_tickets - A list of projected Zendesk tickets (see
+                        project_zen_ticket) whose associated GitHub issue
+                        numbers and Zendesk user IDs are desired.
 
     Returns a tuple of two value with the first being the gathered list of
     associated Zendesk user IDs and with the second being the gathered list
     of associated GitHub issue numbers.
     """
+    zen_user_ids = set()
+    git_issue_numbers = set()
 
-    # Get Zendesk user IDs that are associated with Zendesk tickets.
-    zen_user_ids = []
+    # Gather both lists in one pass over the tickets. The sets remove
+    # duplicates as the IDs are gathered.
     for ticket in zen_tickets:
-        zen_user_ids.append(ticket['requester_id'])
-    zen_user_ids = list(set(zen_user_ids)) # Remove duplicates
+        zen_user_ids.add(ticket['requester_id'])
+        if ticket['git_id'] is not None:
+            git_issue_numbers.add(ticket['git_id'])
 
-    # Get GitHub issue numbers that are associated with the Zendesk tickets.
-    git_issue_numbers = []
-    for ticket in zen_tickets:
-        association_data = ''
-        for field in ticket['fields']:
-            if field['id'] == zen_fieldid:
-                if field['value'] is not None:
-                    association_data = field['value'].split('-')
-                break
-        if association_data and association_data[0] == 'gh':
-            git_issue_numbers.append(int(association_data[1]))
-    git_issue_numbers = list(set(git_issue_numbers)) # Remove duplicates
+    return (list(zen_user_ids), list(git_issue_numbers))
 
-    return (zen_user_ids, git_issue_numbers)
-
-def get_zen_users(api_access_data, zen_user_ids):
+def get_zen_users(api_access_data, zen_user_ids, priority=PRIORITY_NORMAL):
     """Gets the full Zendesk user records for each user ID number in the passed
     list.
 
@@ -177,27 +827,25 @@ def get_zen_users(api_access_data, zen_user_ids):
                             Zendesk account.
         zen_user_ids - A list of Zendesk user IDs whose full user records are
                         desired.
+        priority - The priority of the API requests made by this function
+                    (see api_requests.api_get).
+
+    The users are requested in batches of ZEN_USERS_PER_REQUEST IDs, and any
+    user missing from a batch's results is requested individually.
 
     Returns a dictionary reference table with Zendesk user ID numbers as keys
     and their cooresponding user names as values.
     """
-    # Zendesk user email set up for API token authorization
-    zen_name_tk = api_access_data.zen_name + '/token'
     zen_user_reference = {} # Dictionary that allows the look up of Zendesk user
                             # names by their ID number.
     try:
-        for id_number in zen_user_ids:
-            request_zen_user = requests.get(
-                ZEN_USER_URL % {'subdomain': api_access_data.zen_url,
-                                'user_id': id_number},
-                auth=(zen_name_tk, api_access_data.zen_token)
-            )
-            if request_zen_user.status_code != 200:
-                request_zen_user.raise_for_status()
-            zen_user_reference[id_number] = \
-                    request_zen_user.json['user']['name']
+        for i in xrange(0, len(zen_user_ids), ZEN_USERS_PER_REQUEST):
+            zen_user_reference.update(_get_zen_user_batch(
+                api_access_data, zen_user_ids[i:i + ZEN_USERS_PER_REQUEST],
+                priority
+            ))
 
-   # Catches exceptions from requests.get() or raise_for_status()
+    # Catches exceptions from api_get() or raise_for_status()
     except RequestException as e:
         # Redefine the args attribute of the exception to contain both the
         # original error message and the name of the API responsible for causing
@@ -210,7 +858,54 @@ def get_zen_users(api_access_data, zen_user_ids):
 
     return zen_user_reference
 
-def get_git_tickets(api_access_data, git_issue_numbers):
+def _get_zen_user_batch(api_access_data, id_batch, priority=PRIORITY_NORMAL):
+    """Gets the user names of a batch of at most ZEN_USERS_PER_REQUEST Zendesk
+    user IDs with a single request, and requests any user missing from the
+    batch's results individually.
+
+    Parameters:
+        api_access_data - The object that contains the current user's API
+                            access data necessary to access the users on their
+                            Zendesk account.
+        id_batch - A list of the Zendesk user IDs whose user names are desired.
+        priority - The priority of the API requests made by this function
+                    (see api_requests.api_get).
+
+    Returns a dictionary with the Zendesk user IDs as keys and their user names
+    as values. Any RequestException raised while requesting the users is left
+    for the caller to handle.
+    """
+    zen_user_reference = {}
+    request_zen_users = _zen_get(
+        api_access_data,
+        ZEN_USERS_SHOW_MANY_URL % {'subdomain': api_access_data.zen_url},
+        params={'ids': ','.join([str(id_number) for id_number in id_batch])},
+        priority=priority
+    )
+    if request_zen_users.status_code != 200:
+        request_zen_users.raise_for_status()
+    for user in request_zen_users.json['users']:
+        zen_user_reference[user['id']] = user['name']
+
+    # Users left out of the batch results are requested on their own so that a
+    # missing user is reported the same way it always has been.
+    for id_number in id_batch:
+        if id_number in zen_user_reference:
+            continue
+        request_zen_user = _zen_get(
+            api_access_data,
+            ZEN_USER_URL % {'subdomain': api_access_data.zen_url,
+                            'user_id': id_number},
+            priority=priority
+        )
+        if request_zen_user.status_code != 200:
+            request_zen_user.raise_for_status()
+        zen_user_reference[id_number] = request_zen_user.json['user']['name']
+
+    return zen_user_reference
+
+def get_git_tickets(api_access_data, git_issue_numbers,
+                    cached_git_tickets=None, priority=PRIORITY_NORMAL):
     """Gets the full GitHub ticket records for each issue number in the passed
     list.
 
@@ -220,27 +915,45 @@ def get_git_tickets(api_access_data, git_issue_numbers):
                             GitHub account.
         git_issue_numbers - A list of GitHub issue numbers whose full ticket
                                 records are desired.
-
-    Returns a list with a GitHub ticket record for each of the issue numbers
-    passed to the function.
+        cached_git_tickets - An optional dictionary of previously gathered
+                                GitHub ticket records with their issue numbers
+                                as keys. These records are only requested again
+                                if they have changed on GitHub since they were
+                                gathered.
+        priority - The priority of the API requests made by this function
+                    (see api_requests.api_get).
+
+    The tickets are requested in batches of settings.GIT_BATCH_SIZE (see
+    _get_git_ticket_batch). The batches are requested concurrently, with at
+    most settings.GIT_FETCH_CONCURRENCY of them in flight at once.
+
+    Returns a list with a GitIssue record for each of the issue numbers passed
+    to the function, in the same order as git_issue_numbers.
     """
-    git_tickets = []
+    if cached_git_tickets is None:
+        cached_git_tickets = {}
+    batch_size = max(settings.GIT_BATCH_SIZE, 1)
+
+    # Pool that bounds the number of GitHub requests in flight at once.
+    pool = Pool(settings.GIT_FETCH_CONCURRENCY)
+    greenlets = [pool.spawn(_get_git_ticket_batch, api_access_data,
+                            git_issue_numbers[i:i + batch_size],
+                            cached_git_tickets, priority)
+                 for i in xrange(0, len(git_issue_numbers), batch_size)]
 
     try:
-        for number in git_issue_numbers:
-            request_git_tickets = requests.get(
-                GIT_INDIVIDUAL_ISSUE_URL % \
-                    {'organization': api_access_data.git_org,
-                     'repository': api_access_data.git_repo,
-                     'issue_number': number},
-                params={'access_token': api_access_data.git_token}
-            )
-            if request_git_tickets.status_code != 200:
-                request_git_tickets.raise_for_status()
-            git_tickets.append(request_git_tickets.json)
+        gathered_tickets = {}
+        for greenlet in greenlets:
+            gathered_tickets.update(greenlet.get())
+        git_tickets = [gathered_tickets[number]
+                       for number in git_issue_numbers]
 
-    # Catches exceptions from requests.get() or raise_for_status()
+    # Catches exceptions from api_get() or raise_for_status()
     except RequestException as e:
+        # Stop any requests that are still running since their results would
+        # be thrown away.
+        pool.kill()
+
         # Redefine the args attribute of the exception to contain both the
         # original error message and the name of the API responsible for causing
         # the exception.
@@ -252,25 +965,257 @@ def get_git_tickets(api_access_data, git_issue_numbers):
 
     return git_tickets
 
-def build_enhancement_data(zen_tickets, zen_user_reference, git_tickets,
-                           zen_fieldid):
-    """Builds the enhancement tracking tables from the Zendesk and GitHub data.
+def _get_git_ticket_batch(api_access_data, issue_numbers, cached_git_tickets,
+                          priority=PRIORITY_NORMAL):
+    """Gets the GitHub ticket records for a batch of issue numbers. The issues
+    without a cached ETag or Last-Modified value are queried from the GitHub
+    GraphQL API with a single request when there is more than one of them (see
+    _query_git_tickets). The GraphQL API has no conditional requests, so the
+    issues with cached validators are requested on their own instead, which
+    costs nothing against the rate limit when they have not changed. Any issue
+    missing from the results of the query is requested on its own as well (see
+    _get_git_ticket).
+
+    Parameters:
+        api_access_data - The object that contains the current user's API
+                            access data necessary to access the tickets on their
+                            GitHub account.
+        issue_numbers - A list of the GitHub issue numbers whose ticket records
+                        are desired.
+        cached_git_tickets - A dictionary of previously gathered GitHub ticket
+                                records with their issue numbers as keys, whose
+                                validators are used for the issues that are
+                                requested on their own.
+        priority - The priority of the API requests made by this function
+                    (see api_requests.api_get).
+
+    Returns a dictionary of the GitIssue records with their issue numbers as
+    keys. Any RequestException raised while requesting the tickets on their
+    own is left for the caller to handle.
+    """
+    git_tickets = {}
+    uncached_numbers = []
+    for issue_number in issue_numbers:
+        cached_git_ticket = cached_git_tickets.get(issue_number)
+        if cached_git_ticket is None or \
+           not (cached_git_ticket.etag or cached_git_ticket.last_modified):
+            uncached_numbers.append(issue_number)
+    if len(uncached_numbers) > 1:
+        git_tickets.update(_query_git_tickets(api_access_data,
+                                              uncached_numbers, priority))
+
+    for issue_number in issue_numbers:
+        if issue_number not in git_tickets:
+            git_tickets[issue_number] = _get_git_ticket(
+                api_access_data, issue_number,
+                cached_git_tickets.get(issue_number), priority
+            )
+
+    return git_tickets
+
+def _query_git_tickets(api_access_data, issue_numbers,
+                       priority=PRIORITY_NORMAL):
+    """Queries the GitHub ticket records for a batch of issue numbers from the
+    GitHub GraphQL API at settings.GIT_GRAPHQL_URL with a single request.
+
+    Parameters:
+        api_access_data - The object that contains the current user's API
+                            access data necessary to access the tickets on their
+                            GitHub account.
+        issue_numbers - A list of the GitHub issue numbers whose ticket records
+                        are desired.
+        priority - The priority of the API requests made by this function
+                    (see api_requests.api_get).
+
+    The GraphQL API has a rate limit of its own, so its requests are counted
+    against a separate request budget from the rest of the GitHub API.
+
+    Returns a dictionary of the GitIssue records with their issue numbers as
+    keys. Issues that the query could not resolve (i.e. pull requests or
+    deleted issues) are left out, and so is every issue of the batch if the
+    query fails to reach GitHub or GitHub fails to answer it. A RateLimitError
+    or any other error response is left for the caller to handle.
+    """
+    query = GIT_ISSUES_QUERY % {'issues': ' '.join(
+        [GIT_ISSUE_QUERY_FIELD % {'issue_number': issue_number}
+         for issue_number in issue_numbers]
+    )}
+    try:
+        request_git_tickets = api_post(
+            get_session(urlparse(settings.GIT_GRAPHQL_URL).netloc),
+            settings.GIT_GRAPHQL_URL,
+            ('GitHub GraphQL', api_access_data.git_token),
+            priority,
+            data=json.dumps({'query': query,
+                             'variables': {'owner': api_access_data.git_org,
+                                           'name': api_access_data.git_repo}}),
+            headers={'Authorization': 'bearer %s' % api_access_data.git_token,
+                     'Content-Type': 'application/json'}
+        )
+    # Running out of the request budget is reported to the caller, since the
+    # requests for the issues on their own would not be sent either.
+    except RateLimitError:
+        raise
+    except RequestException as e:
+        # The issues of the batch are requested on their own instead.
+        logger.warning('GitHub GraphQL query for %i issues failed: %s',
+                       len(issue_numbers), e)
+        return {}
+    if request_git_tickets.status_code >= 500:
+        logger.warning('GitHub GraphQL query for %i issues failed with status '
+                       '%i', len(issue_numbers),
+                       request_git_tickets.status_code)
+        return {}
+    if request_git_tickets.status_code != 200:
+        request_git_tickets.raise_for_status()
+
+    # Issues that could not be resolved are null in the results, and the whole
+    # repository is null if it could not be found.
+    results = request_git_tickets.json or {}
+    repository = (results.get('data') or {}).get('repository') or {}
+    git_tickets = {}
+    for issue_number in issue_numbers:
+        git_ticket = repository.get('issue%i' % issue_number)
+        if git_ticket is not None:
+            git_tickets[issue_number] = project_graphql_git_ticket(git_ticket)
+
+    return git_tickets
+
+def _get_git_ticket(api_access_data, issue_number, cached_git_ticket=None,
+                    priority=PRIORITY_NORMAL):
+    """Gets the full GitHub ticket record for a single issue number.
+
+    Parameters:
+        api_access_data - The object that contains the current user's API
+                            access data necessary to access the ticket on their
+                            GitHub account.
+        issue_number - The number of the GitHub issue whose full ticket record
+                        is desired.
+        cached_git_ticket - An optional, previously gathered record of the
+                            ticket. If it has a stored ETag or Last-Modified
+                            value, the ticket is requested conditionally and
+                            the cached record is reused if GitHub reports that
+                            the ticket has not been modified.
+        priority - The priority of the API requests made by this function
+                    (see api_requests.api_get).
+
+    Returns the GitIssue record for the passed issue number with the etag and
+    last_modified validators of its response. Any RequestException
+    raised while requesting the ticket is left for the caller to handle.
+    """
+    headers = {}
+    if cached_git_ticket is not None:
+        if cached_git_ticket.etag:
+            headers['If-None-Match'] = cached_git_ticket.etag
+        if cached_git_ticket.last_modified:
+            headers['If-Modified-Since'] = cached_git_ticket.last_modified
+
+    request_git_ticket = _git_get(
+        api_access_data,
+        GIT_INDIVIDUAL_ISSUE_URL % \
+            {'organization': api_access_data.git_org,
+             'repository': api_access_data.git_repo,
+             'issue_number': issue_number},
+        headers=headers,
+        priority=priority
+    )
+
+    # The ticket has not changed since the cached record was gathered. GitHub
+    # does not count these responses against the API rate limit.
+    if request_git_ticket.status_code == 304 and headers:
+        return cached_git_ticket
+
+    if request_git_ticket.status_code != 200:
+        request_git_ticket.raise_for_status()
+
+    return project_git_ticket(request_git_ticket.json,
+                              request_git_ticket.headers.get('etag'),
+                              request_git_ticket.headers.get('last-modified'))
+
+def project_git_ticket(git_ticket, etag=None, last_modified=None):
+    """Projects a GitHub ticket record from the GitHub API down to the compact
+    record that is kept in the cache.
+
+    Parameters:
+        git_ticket - A full GitHub issue record from the GitHub API.
+        etag - The ETag header of the response the record was read from, if
+                it was read from a request for the single issue.
+        last_modified - The Last-Modified header of the response the record was
+                        read from, if it was read from a request for the
+                        single issue.
+
+    Returns a GitIssue with the values of the ticket that are used by the
+    application.
+    """
+    return GitIssue(git_ticket['number'], git_ticket['state'],
+                    git_ticket['html_url'], git_ticket['updated_at'], etag,
+                    last_modified)
+
+def project_graphql_git_ticket(git_ticket):
+    """Projects a GitHub issue from the results of GIT_ISSUES_QUERY down to the
+    compact record that is kept in the cache.
+
+    Parameters:
+        git_ticket - An issue from the results of the GitHub GraphQL API, with
+                        its number, state, url and updatedAt fields.
+
+    Returns a GitIssue with the same values project_git_ticket gives the issue
+    when it is read from the REST API, without any response validators.
+    """
+    return GitIssue(git_ticket['number'], git_ticket['state'].lower(),
+                    git_ticket['url'], git_ticket['updatedAt'], None, None)
+
+def build_enhancement_data(zen_tickets, zen_user_reference, git_tickets):
+    """Builds the enhancement tracking data from the Zendesk and GitHub data.
 
     Parameters:
-        zen_tickets - A list of open Zendesk tickets to build the enhancement
-                        data from.
+        zen_tickets - An iterable of projected open Zendesk tickets (see
+                        project_zen_ticket) to build the enhancement data from.
         zen_user_reference - A dictionary reference that can be used to look up
                                 Zendesk user names by their ID number.
-        git_tickets - A list of GitHub tickets that cooresponds with the
-                        associated GitHub issue numbers of the Zendesk tickets
-                        in zen_tics.
-        zen_fieldid - The ID number of the custom field that holds the ticket
-                        association value for a given Zendesk ticket.
-        utc_offset - The UTC offset for the current user's time zone. Used to
-                        format the date and time values for each ticket to the
-                        current user's time zone.
+        git_tickets - A dictionary of the GitHub tickets that are associated
+                        with the Zendesk tickets in zen_tickets with their issue
+                        numbers as keys.
 
     Returns a dictionary of the built data with the following keys and values:
+        'enhancements' - Dictionary of the enhancements with the ID numbers of
+                            their Zendesk tickets as keys. Each enhancement
+                            records the table it belongs in under 'table' (see
+                            get_enhancement_tables).
+        'git_index' - Dictionary of sets of the Zendesk ticket ID numbers of
+                        the enhancements associated with each GitHub ticket,
+                        with the GitHub issue numbers as keys.
+    """
+    enhancement_data = {
+        'enhancements': {},
+        'git_index': {},
+        'git_tickets': git_tickets,
+        'zen_user_reference': zen_user_reference,
+    }
+
+    # Iterate through the Zendesk tickets using their data to classify them
+    # as being tracked, needing attention, broken, or not being tracked. Each
+    # ticket is visited once and its GitHub ticket is found by issue number,
+    # so the build takes time linear in the number of tickets.
+    for ticket in zen_tickets:
+        _apply_zen_ticket(enhancement_data, ticket)
+
+    built_data = {
+        'enhancements': enhancement_data['enhancements'],
+        'git_index': enhancement_data['git_index'],
+    }
+
+    return built_data
+
+def get_enhancement_tables(cache_data):
+    """Gets the enhancement tracking tables from the passed cache data.
+
+    Parameters:
+        cache_data - A dictionary of the cache data pulled from a group index in
+                        the application's cache.
+
+    Returns a dictionary of lists of enhancement dictionaries with the table
+    names in ENHANCEMENT_TABLES as keys:
         'tracking' - List of enhancements in the process of being worked on.
         'need_attention' - List of enhancements where one half of the
                             enhancement is completed, but the other is not.
@@ -283,76 +1228,35 @@ def build_enhancement_data(zen_tickets, zen_user_reference, git_tickets,
                                     association string is not in the format
                                     "gh-###").
     """
-    tracking = [] # Enhancements whose Zendesk and GitHub tickets are both open.
-    need_attention = [] # Enhancements with either a closed Zendesk ticket or
-                        # a closed GitHub ticket. Because one of these tickets
-                        # is closed, the other needs attention.
-    unassociated_enhancements = [] # Requested enhancements from Zendesk
-                                   # tickets that have no associated external
-                                   # ticket assigned to them.
-    not_git_enhancements = [] # Requested enhancements from Zendesk that have an
-                              # associated external ticket, but the ticket is
-                              # not labeled as being part of GitHub.
+    enhancement_tables = dict((table, []) for table in ENHANCEMENT_TABLES)
 
-    # Iterate through the Zendesk tickets using their data to classify them
-    # as being tracked, needing attention, broken, or not being tracked.
-    for ticket in zen_tickets:
+    for zen_id in sorted(cache_data['enhancements']):
+        enhancement = cache_data['enhancements'][zen_id]
+        if enhancement['table'] is not None:
+            enhancement_tables[enhancement['table']].append(enhancement)
 
-        # Add Zendesk data to enhancement data object
-        association_data = ''
-        for field in ticket['fields']:
-            if field['id'] == zen_fieldid:
-                association_data = field['value']
-                break
-        if association_data:
-            split_association_data = association_data.split('-')
-
-        enhancement_data = {'zen_id': ticket['id']} # Enhancement data object
-        enhancement_data = _update_enhancement_zen_data(enhancement_data,
-                                                        ticket,
-                                                        zen_user_reference)
-
-        # Check if the enhancement has no associated ticket
-        if not association_data:
-            unassociated_enhancements.append(enhancement_data)
-
-        # Check if the enhancement's associated ticket is not a GitHub ticket
-        elif len(split_association_data) != 2 or \
-                split_association_data[0] != 'gh' or \
-                not split_association_data[1].isdigit():
-            enhancement_data['non_git_association'] = association_data
-            not_git_enhancements.append(enhancement_data)
-
-        # Add GitHub data to the enhancement data object
-        else:
-            for issue in git_tickets:
-                if issue['number'] == int(split_association_data[1]):
-                    git_ticket = issue
-                    break
-            enhancement_data['git_id'] = git_ticket['number']
-            enhancement_data = _update_enhancement_git_data(enhancement_data,
-                                                            git_ticket)
-
-            # Check if the enhacement should be tracked (Both tickets are
-            # open).
-            if enhancement_data['git_status'] == 'open':
-                tracking.append(enhancement_data)
-
-            # Check if the enhancement is in need of attention (The GitHub
-            # ticket is closed).
-            else:
-                need_attention.append(enhancement_data)
+    return enhancement_tables
 
-    built_data = {
-        'tracking': tracking,
-        'need_attention': need_attention,
-        'unassociated_enhancements': unassociated_enhancements,
-        'not_git_enhancements': not_git_enhancements,
-    }
+def update_cache_index(api_access_data, priority=PRIORITY_NORMAL):
+    """Updates the cache index for the passed API access model with data
+    necessary for the application, unless another process is already syncing
+    the model's cache data. In that case, this function waits for the other
+    sync to finish instead (see _sync_single_flight).
 
-    return built_data
+    Parameters:
+        api_access_data - The object that contains the necessary access
+                            parameters for getting the data needed for the
+                            application from the Zendesk and GitHub APIs.
+        priority - The priority of the API requests made by this function
+                    (see api_requests.api_get).
+
+    This function will raise any RequestExceptions that happen while trying to
+    access either the Zendesk or GitHub APIs so they can be properly handled by
+    the calling view function.
+    """
+    _sync_single_flight(api_access_data, _update_cache_index, priority)
 
-def update_cache_index(api_access_data):
+def _update_cache_index(api_access_data, priority=PRIORITY_NORMAL):
     """Updates the cache index for the passed API access model with data
     necessary for the application.
 
@@ -360,16 +1264,18 @@ def update_cache_index(api_access_data):
         api_access_data - The object that contains the necessary access
                             parameters for getting the data needed for the
                             application from the Zendesk and GitHub APIs.
+        priority - The priority of the API requests made by this function
+                    (see api_requests.api_get).
 
     This function will raise any RequestExceptions that happen while trying to
     access either the Zendesk or GitHub APIs so they can be properly handled by
     the calling view function.
     """
-    cache_data = cache.get(api_access_data.id)
+    cache_data = load_cache_data(api_access_data)
 
     # If the cache data isn't in the cache, build it
     if cache_data is None:
-        build_cache_index(api_access_data)
+        _build_cache_index(api_access_data, priority)
 
     # The cache data is in the cache, so update it
     else:
@@ -382,22 +1288,54 @@ def update_cache_index(api_access_data):
         new_git_tickets = [] # GitHub tickets that were not previously tracked
                              # in the cache that have been newly associated with
                              # a Zendesk ticket since the last cache update.
-        zen_user_ids = [] # A list of the user IDs for the requesters of the
-                          # Zendesk tickets in the updated_zen_tickets list.
-        git_issue_numbers = [] # A list of the issue numbers for the GitHub
-                               # tickets that are associated with the Zendesk
-                               # tickets in the updated_zen_tickets list.
 
         last_updated = cache_data['last_updated']
-        zen_fieldid = api_access_data.zen_fieldid
+
+        # Cache data built before Zendesk watermarks were stored falls back on
+        # the time of its last update.
+        zen_watermark = cache_data.get('zen_watermark')
+        if zen_watermark is None:
+            zen_watermark = timegm(last_updated.timetuple())
+
+        # Record the time the gathering starts at so that the next update of
+        # the cache picks up every change made while this function is
+        # processing.
+        sync_started = datetime.utcnow()
+        budget_usage = get_budget_usage(_get_budget_keys(api_access_data))
 
         try:
-            updated_zen_tickets = get_zen_ticket_update(api_access_data,
-                                                        last_updated)
-            updated_git_tickets = get_git_ticket_update(api_access_data,
-                                                        last_updated)
-            new_user_ids, new_issue_numbers = get_id_lists(updated_zen_tickets,
-                                                           zen_fieldid)
+            updated_zen_tickets, cache_data['zen_watermark'] = \
+                    get_zen_ticket_update(api_access_data, zen_watermark,
+                                          priority)
+
+            # Only the users and issues of the tickets that stay in the cache
+            # are gathered.
+            new_user_ids, new_issue_numbers = get_id_lists(
+                [ticket for ticket in updated_zen_tickets
+                 if ticket['status'] not in ZEN_REMOVED_STATUSES]
+            )
+            new_issue_numbers = set(new_issue_numbers)
+
+            # Only the GitHub tickets that are tracked in the cache or newly
+            # associated with a Zendesk ticket are kept from the update.
+            tracked_issue_numbers = \
+                    new_issue_numbers.union(cache_data['git_tickets'])
+            updated_git_tickets = None
+            if settings.GIT_EVENTS_SYNC:
+                updated_git_tickets, cache_data['git_event_id'], \
+                cache_data['git_events_etag'] = get_git_event_update(
+                    api_access_data, cache_data.get('git_event_id'),
+                    cache_data.get('git_events_etag'), tracked_issue_numbers,
+                    priority
+                )
+
+            # List the updated tickets when the issue events feed is not used
+            # or does not reach back to the last event that was read.
+            if updated_git_tickets is None:
+                updated_git_tickets = get_git_ticket_update(
+                    api_access_data, last_updated, tracked_issue_numbers,
+                    priority
+                )
 
             # Update the Zendesk user reference
             for user_id in list(new_user_ids):
@@ -405,37 +1343,24 @@ def update_cache_index(api_access_data):
                     new_user_ids.remove(user_id)
             if new_user_ids:
                 new_user_reference = get_zen_users(api_access_data,
-                                                   new_user_ids)
+                                                   new_user_ids, priority)
                 cache_data['zen_user_reference'] = dict(
                     cache_data['zen_user_reference'].items() + \
                     new_user_reference.items()
                 )
 
-            # Remove any GitHub tickets with no associations on Zendesk
-            for ticket in list(updated_git_tickets):
-                if ticket['number'] not in cache_data['git_issue_numbers']:
-                    if ticket['number'] in new_issue_numbers:
-                        new_git_tickets.append(ticket)
-                        new_issue_numbers.remove(ticket['number'])
-                    else:
-                        updated_git_tickets = _rm_from_diclist(
-                            updated_git_tickets, 'number', ticket['number']
-                        )
-                else:
-                    for i in xrange(len(cache_data['git_tickets'])):
-                        if cache_data['git_tickets'][i]['number'] == \
-                        ticket['number']:
-                            cache_data['git_ticket'][i] = ticket
-
-            # Get any GitHub tickets with new Zendesk associations
-            for issue_num in list(new_issue_numbers):
-                if issue_num in cache_data['git_issue_numbers']:
-                    new_issue_numbers.remove(issue_num)
+            # Get any GitHub tickets with new Zendesk associations that were
+            # not already gathered with the updated tickets
+            new_issue_numbers.difference_update(cache_data['git_tickets'])
+            new_issue_numbers.difference_update(
+                [ticket.number for ticket in updated_git_tickets]
+            )
             if new_issue_numbers:
-                new_git_tickets.extend(get_git_tickets(api_access_data,
-                                                       new_issue_numbers))
-                cache_data['git_issue_numbers'].extend(new_issue_numbers)
-                cache_data['git_tickets'].extend(new_git_tickets)
+                new_git_tickets = get_git_tickets(api_access_data,
+                                                  list(new_issue_numbers),
+                                                  priority=priority)
+                for ticket in new_git_tickets:
+                    cache_data['git_tickets'][ticket.number] = ticket
 
         except RequestException as e:
             # Raise RequestExceptions so they can be properly handled by
@@ -445,53 +1370,115 @@ def update_cache_index(api_access_data):
         # Update the cache with the updated GitHub data
         cache_data = update_git_cache(cache_data, updated_git_tickets)
 
-
         # Update the cache with the updated Zendesk data
-        cache_data = update_zen_cache(cache_data, updated_zen_tickets,
-                                      zen_fieldid)
+        cache_data = update_zen_cache(cache_data, updated_zen_tickets)
 
-        # Subtract 10 minutes from the actual time to ensure that no updates are
-        # left out if they were made during the time the function was processing.
-        cache_data['last_updated'] = datetime.utcnow() - timedelta(minutes=10)
-        cache.set(api_access_data.id, cache_data)
+        cache_data['last_updated'] = sync_started
+        cache_data['api_budget_usage'] = get_budget_usage(
+            _get_budget_keys(api_access_data), budget_usage
+        )
+        save_cache_data(api_access_data, cache_data)
 
-def get_zen_ticket_update(api_access_data, last_updated):
-    """Gets all of the Zendesk tickets that have been updated since last_updated
-    for the API access data passed to the funtion.
+def is_cache_stale(cache_data, max_age):
+    """Checks whether the passed cache data is older than the passed age.
+
+    Parameters:
+        cache_data - A dictionary of the cache data pulled from a group index in
+                        the application's cache, or the manifest of the cache
+                        data (see cache_storage.load_cache_manifest).
+        max_age - The number of seconds after its last update that the cache
+                    data should be considered stale.
+
+    Returns True if the cache data was last updated more than max_age seconds
+    ago and False if it was not.
+    """
+    age = datetime.utcnow() - cache_data['last_updated']
+    return age.days * 86400 + age.seconds > max_age
+
+def refresh_cache_index(api_access_data, priority=PRIORITY_NORMAL):
+    """Starts updating the cache index for the passed API access model in the
+    background. If an update for the model is already running in this process,
+    no new update is started.
+
+    Parameters:
+        api_access_data - The object that contains the necessary access
+                            parameters for getting the data needed for the
+                            application from the Zendesk and GitHub APIs.
+        priority - The priority of the API requests made by the update (see
+                    api_requests.api_get).
+
+    Returns the greenlet running the update. Any RequestException raised by the
+    update is available from the greenlet's exception attribute once it has
+    finished.
+    """
+    refresh = _REFRESHES.get(api_access_data.id)
+    if refresh is None or refresh.ready():
+        refresh = spawn(update_cache_index, api_access_data, priority)
+        _REFRESHES[api_access_data.id] = refresh
+
+    return refresh
+
+def get_zen_ticket_update(api_access_data, zen_watermark,
+                          priority=PRIORITY_NORMAL):
+    """Gets all of the product_enhancement Zendesk tickets that have been
+    updated since zen_watermark for the API access data passed to the funtion.
 
     Parameters:
         api_access_data - The API access data that will be used to access the
                             Zendesk API in order to gather the Zendesk tickets.
-        last_updated - The Zendesk tickets gathered by this function will be the
-                        ones updated since this datetime.
-
-    Returns a list of the gathered Zendesk tickets that have been updated since
-    last_updated.
+        zen_watermark - The Zendesk tickets gathered by this function will be
+                        the ones updated since this Unix timestamp.
+        priority - The priority of the API requests made by this function
+                    (see api_requests.api_get).
+
+    The tickets are gathered from the Zendesk incremental export, which pages
+    through ticket changes in order of their update time, so paging stops as
+    soon as a page comes back that is not full. A ticket that changed more than
+    once during the export is only returned in its most recent state. Tickets
+    without the ZEN_ENHANCEMENT_TAG are returned with the ZEN_UNTAGGED_STATUS,
+    so that the enhancements of tickets that lost the tag are removed.
+
+    Returns a tuple of two values with the first being the list of the gathered
+    Zendesk tickets, projected as they arrive (see project_zen_ticket), and the
+    second being the Unix timestamp the export reached,
+    which should be passed as the zen_watermark of the next update.
     """
-    # Zendesk user email set up for API token authorization
-    zen_name_tk = api_access_data.zen_name + '/token'
-    updated_str = datetime.strftime(last_updated, '%Y-%m-%d')
-    zen_tickets = []
-    page = 1
+    start_time = min(zen_watermark, int(time()) - ZEN_INCREMENTAL_MIN_AGE)
+    zen_fieldid = api_access_data.zen_fieldid
+    zen_tickets = {} # Dictionary of the gathered Zendesk tickets with their ID
+                     # numbers as keys.
 
     try:
         while True:
-            request_zen_tickets = requests.get(
-                ZEN_SEARCH_URL % {'subdomain': api_access_data.zen_url},
-                params={'query': ZEN_TICKET_UPDATE_SEARCH_QUERY % \
-                            {'updated': updated_str},
-                        'per_page': 100,
-                        'page': page},
-                auth=(zen_name_tk, api_access_data.zen_token))
+            request_zen_tickets = _zen_get(
+                api_access_data,
+                ZEN_INCREMENTAL_TICKETS_URL % \
+                    {'subdomain': api_access_data.zen_url},
+                params={'start_time': start_time},
+                priority=priority
+            )
             if request_zen_tickets.status_code != 200:
                 request_zen_tickets.raise_for_status()
-            zen_tickets.extend(request_zen_tickets.json['results'])
-            if request_zen_tickets.json['next_page'] is not None:
-                page += 1
-            else:
+
+            for ticket in request_zen_tickets.json['tickets']:
+                # The timestamps share one format, so comparing them as strings
+                # orders them by time.
+                gathered_ticket = zen_tickets.get(ticket['id'])
+                if gathered_ticket is None or \
+                gathered_ticket['updated_at'] <= ticket['updated_at']:
+                    zen_ticket = project_zen_ticket(ticket, zen_fieldid)
+                    if ZEN_ENHANCEMENT_TAG not in ticket['tags']:
+                        zen_ticket['status'] = ZEN_UNTAGGED_STATUS
+                    zen_tickets[ticket['id']] = zen_ticket
+
+            end_time = request_zen_tickets.json['end_time']
+            page_count = request_zen_tickets.json['count']
+            if page_count < ZEN_INCREMENTAL_PAGE_SIZE or end_time is None or \
+            end_time <= start_time:
                 break
+            start_time = end_time
 
-    # Catches exceptions from requests.get() or raise_for_status()
+    # Catches exceptions from api_get() or raise_for_status()
     except RequestException as e:
         # Redefines the args attribute of the exception to contain both the
         # original error message and the name of the API responsible for causing
@@ -502,9 +1489,13 @@ def get_zen_ticket_update(api_access_data, last_updated):
         # function for further processing.
         raise
 
-    return zen_tickets
+    if end_time is None:
+        end_time = start_time
+
+    return (zen_tickets.values(), end_time)
 
-def get_git_ticket_update(api_access_data, last_updated):
+def get_git_ticket_update(api_access_data, last_updated,
+                          tracked_issue_numbers=None, priority=PRIORITY_NORMAL):
     """Gets all of the GitHub tickets that have been updated since last_updated
     for the API access data passed to the funtion.
 
@@ -513,56 +1504,197 @@ def get_git_ticket_update(api_access_data, last_updated):
                             GitHub API in order to gather the GitHub tickets.
         last_updated - The GitHub tickets gathered by this function will be the
                         ones updated since this datetime.
+        tracked_issue_numbers - An optional set of the issue numbers of the
+                                GitHub tickets that are of interest. Other
+                                tickets are dropped as each page is read. All
+                                of the tickets are kept if it is None.
+        priority - The priority of the API requests made by this function
+                    (see api_requests.api_get).
+
+    Open and closed tickets are requested together, newest update first. The
+    number of pages is read from the Link header of the first page, and the
+    rest of the pages are then requested concurrently, with at most
+    settings.GIT_FETCH_CONCURRENCY requests in flight at once. A ticket that
+    is updated while the pages are requested moves to the start of the
+    results, which only pushes the other tickets back, so they can be read
+    twice but are never skipped. Any pages added to the end since the first
+    page was read are followed through their Link headers afterwards. The
+    moved ticket itself is gathered by the next update, since it was updated
+    after the update started.
+
+    Returns a list of the GitIssue records of the gathered GitHub tickets that
+    have been updated since last_updated.
+    """
+    git_tickets = {} # GitIssue records with their issue numbers as keys.
+    url = GIT_ISSUE_URL % {'organization': api_access_data.git_org,
+                           'repository': api_access_data.git_repo}
+    params = {'since': datetime.strftime(last_updated, '%Y-%m-%dT%H:%M:%SZ'),
+              'state': 'all',
+              'sort': 'updated',
+              'direction': 'desc',
+              'per_page': 100}
+
+    def get_page(page):
+        request_git_tickets = _git_get(api_access_data, url,
+                                       params=dict(params, page=page),
+                                       priority=priority)
+        if request_git_tickets.status_code != 200:
+            request_git_tickets.raise_for_status()
+        page_tickets = [
+            project_git_ticket(ticket) for ticket in request_git_tickets.json
+            if tracked_issue_numbers is None or \
+               ticket['number'] in tracked_issue_numbers
+        ]
+        return (page_tickets, _get_link_pages(request_git_tickets))
+
+    def add_tickets(page_tickets):
+        # A ticket can be read twice when tickets are updated while the pages
+        # are requested, and the record of its latest update is kept.
+        for ticket in page_tickets:
+            gathered_ticket = git_tickets.get(ticket.number)
+            if gathered_ticket is None or \
+               ticket.updated_at >= gathered_ticket.updated_at:
+                git_tickets[ticket.number] = ticket
+
+    try:
+        page_tickets, link_pages = get_page(1)
+        add_tickets(page_tickets)
+
+        last_page = link_pages.get('last', 1)
+        if last_page > 1:
+            # Pool that bounds the number of GitHub requests in flight at once.
+            pool = Pool(settings.GIT_FETCH_CONCURRENCY)
+            greenlets = [pool.spawn(get_page, page)
+                         for page in xrange(2, last_page + 1)]
+            try:
+                for greenlet in greenlets:
+                    page_tickets, link_pages = greenlet.get()
+                    add_tickets(page_tickets)
+            except RequestException:
+                # Stop any requests that are still running since their results
+                # would be thrown away.
+                pool.kill()
+                raise
+
+        while 'next' in link_pages:
+            page_tickets, link_pages = get_page(link_pages['next'])
+            add_tickets(page_tickets)
+
+    # Catches exceptions from api_get() or raise_for_status()
+    except RequestException as e:
+        # Redefine the args attribute of the exception to contain both the
+        # original error message and the name of the API responsible for causing
+        # the exception.
+        e.args = (e.args[0], 'GitHub')
+
+        # Raise the exception so it can be caught by the except in the calling
+        # function for further processing.
+        raise
 
-    Returns a list of the gathered GitHub tickets that have been updated since
-    last_updated.
+    return git_tickets.values()
+
+def _get_link_pages(response):
+    """Gets the page numbers that the Link header of a paginated GitHub API
+    response links to.
+
+    Parameters:
+        response - The response of a request for a page of GitHub API results.
+
+    Returns a dictionary of the linked page numbers with the relations of the
+    links (i.e. 'next' or 'last') as keys. It is empty if the response has no
+    Link header, which means that all of the results fit in a single page.
+    """
+    link_pages = {}
+    for match in GIT_LINK_PATTERN.finditer(response.headers.get('link') or ''):
+        page = parse_qs(urlparse(match.group('url')).query).get('page')
+        if page:
+            link_pages[match.group('rel')] = int(page[0])
+
+    return link_pages
+
+def get_git_event_update(api_access_data, last_event_id, events_etag,
+                         tracked_issue_numbers=None, priority=PRIORITY_NORMAL):
+    """Gets the GitHub tickets that have had events since the last event read
+    from the issue events feed of the repository of the API access data passed
+    to the function.
+
+    Parameters:
+        api_access_data - The API access data that will be used to access the
+                            GitHub API in order to read the issue events feed.
+        last_event_id - The ID of the newest event read from the feed by the
+                        last call to this function, or None if the feed has not
+                        been read yet.
+        events_etag - The ETag of the first page of the feed returned by the
+                        last call to this function, or None.
+        tracked_issue_numbers - An optional set of the issue numbers of the
+                                GitHub tickets that are of interest. The events
+                                of other tickets are skipped. All of the
+                                tickets are kept if it is None.
+        priority - The priority of the API requests made by this function
+                    (see api_requests.api_get).
+
+    The first page of the feed is requested conditionally with the passed ETag,
+    so GitHub answers with a 304 response that is not counted against the API
+    rate limit when nothing has happened since the last call. Otherwise, pages
+    are read until the last event that was read is reached. Each event holds
+    the current record of its issue, so the record of the newest event of each
+    ticket is used.
+
+    Returns a tuple of the list of GitIssue records of the tickets that have had
+    events, the ID of the newest event in the feed and the ETag of the feed's
+    first page. The list is None instead if the feed does not reach back to the
+    last event that was read, either because it has never been read or because
+    more events happened than the feed keeps, in which case the updated tickets
+    must be listed with get_git_ticket_update.
     """
-    git_tickets = []
-    updated_str = datetime.strftime(last_updated, '%Y-%m-%dT%H:%M:%SZ')
+    git_tickets = {} # GitIssue records with their issue numbers as keys.
+    url = GIT_ISSUE_EVENTS_URL % {'organization': api_access_data.git_org,
+                                  'repository': api_access_data.git_repo}
+    headers = {}
+    if last_event_id is not None and events_etag:
+        headers['If-None-Match'] = events_etag
+    newest_event_id = last_event_id
     page = 1
 
     try:
         while True:
-            request_open_git_tickets = requests.get(
-                GIT_ISSUE_URL % \
-                    {'organization': api_access_data.git_org,
-                     'repository': api_access_data.git_repo},
-                params={'access_token': api_access_data.git_token,
-                        'since': updated_str,
-                        'state': 'open',
-                        'sort': 'updated',
-                        'per_page': 100,
-                        'page': page}
-            )
-            if request_open_git_tickets.status_code != 200:
-                request_open_git_tickets.raise_for_status()
-            git_tickets.extend(request_open_git_tickets.json)
-            if len(request_open_git_tickets.json) == 100:
-                page += 1
-            else:
-                break
-
-        while True:
-            request_closed_git_tickets = requests.get(
-                GIT_ISSUE_URL % \
-                    {'organization': api_access_data.git_org,
-                     'repository': api_access_data.git_repo},
-                params={'access_token': api_access_data.git_token,
-                        'since': updated_str,
-                        'state': 'closed',
-                        'sort': 'updated',
-                        'per_page': 100,
-                        'page': page}
-            )
-            if request_closed_git_tickets.status_code != 200:
-                request_closed_git_tickets.raise_for_status()
-            git_tickets.extend(request_closed_git_tickets.json)
-            if len(request_closed_git_tickets.json) == 100:
-                page += 1
-            else:
+            request_events = _git_get(api_access_data, url,
+                                      params={'page': page, 'per_page': 100},
+                                      headers=headers, priority=priority)
+
+            # Nothing has happened since the feed was last read.
+            if request_events.status_code == 304 and headers:
+                return ([], last_event_id, events_etag)
+
+            if request_events.status_code != 200:
+                request_events.raise_for_status()
+
+            events = request_events.json
+            if page == 1:
+                events_etag = request_events.headers.get('etag')
+                headers = {}
+                if events:
+                    newest_event_id = events[0]['id']
+
+            for event in events:
+                if last_event_id is not None and event['id'] <= last_event_id:
+                    return (git_tickets.values(), newest_event_id, events_etag)
+
+                issue = event.get('issue')
+                if issue is None or issue['number'] in git_tickets:
+                    continue
+                if tracked_issue_numbers is None or \
+                   issue['number'] in tracked_issue_numbers:
+                    git_tickets[issue['number']] = project_git_ticket(issue)
+
+            # The first page is enough to start reading the feed from its
+            # newest event.
+            if last_event_id is None or \
+               'next' not in _get_link_pages(request_events):
                 break
+            page += 1
 
-    # Catches exceptions from requests.get() or raise_for_status()
+    # Catches exceptions from api_get() or raise_for_status()
     except RequestException as e:
         # Redefine the args attribute of the exception to contain both the
         # original error message and the name of the API responsible for causing
@@ -573,32 +1705,93 @@ def get_git_ticket_update(api_access_data, last_updated):
         # function for further processing.
         raise
 
-    return git_tickets
+    return (None, newest_event_id, events_etag)
 
-def _rm_from_diclist(diclist, key_to_check, value_to_check):
-    """Function that removes an entry form a list of dictionaries if a key of
-    an entry matches a given value. If no value of the key_to_check matches the
-    value_to_check for all of the entries in the diclist, the same diclist will
-    be returned that was passed to the function.
+def apply_git_webhook(api_access_data, git_ticket):
+    """Applies a GitHub ticket sent by a GitHub issues webhook to the cache data
+    for the passed API access model without making any API requests.
 
     Parameters:
-        diclist - A list of dictionaries.
-        key_to_check - A key of a dictionary whose value should be checked
-                        to determine if a dictionary should be removed from
-                        the diclist.
-        value_to_check - The value that should be compared to the value of the
-                            key_to_check to determine if a dictionary should be
-                            removed from the diclist.
-
-    Returns the diclist passed to the function with an entry removed if its
-    value of the key_to_check matched the value_to_check.
+        api_access_data - The API access model whose cache data should be
+                            updated.
+        git_ticket - The GitIssue record projected from the GitHub ticket in
+                        the webhook's payload (see project_git_ticket).
+
+    If another process is syncing the cache data, this function waits for the
+    sync to finish so that the ticket is applied on top of the data it stores.
+
+    Returns True if the ticket was applied to the cache data and False if it
+    was not because the ticket is not associated with any Zendesk tickets in
+    the cache data. Raises a SyncLockBusy if the sync did not finish in time.
     """
-    for i in xrange(len(diclist)):
-        if diclist[i][key_to_check] == value_to_check:
-            diclist.pop(i)
-            break
+    lock_token = _wait_for_sync_lock(api_access_data)
+
+    try:
+        cache_data = load_cache_data(api_access_data)
+        if cache_data is None or \
+        git_ticket.number not in cache_data['git_tickets']:
+            return False
+
+        cache_data = update_git_cache(cache_data, [git_ticket])
+        save_cache_data(api_access_data, cache_data)
+    finally:
+        _release_sync_lock(api_access_data, lock_token)
+
+    return True
+
+def apply_zen_webhook(api_access_data, zen_ticket, requester_name):
+    """Applies a Zendesk ticket sent by a Zendesk webhook to the cache data for
+    the passed API access model.
+
+    Parameters:
+        api_access_data - The API access model whose cache data should be
+                            updated.
+        zen_ticket - A dictionary of the Zendesk ticket data from the webhook's
+                        payload in the same projected form as the tickets
+                        returned by get_zen_tickets.
+        requester_name - The name of the ticket's requester from the webhook's
+                            payload, or None if the payload did not include it.
+
+    No API requests are made unless the ticket has been newly associated with a
+    GitHub issue that is not in the cache data yet, in which case that issue is
+    requested from GitHub.
+
+    If another process is syncing the cache data, this function waits for the
+    sync to finish so that the ticket is applied on top of the data it stores.
+
+    Returns True if the ticket was applied to the cache data and False if it
+    was not, either because there is no cache data for the model yet or because
+    the requester of a new ticket is unknown. In the second case, the change is
+    picked up by the next sync. Raises a SyncLockBusy if the sync did not
+    finish in time.
+    """
+    lock_token = _wait_for_sync_lock(api_access_data)
 
-    return diclist
+    try:
+        cache_data = load_cache_data(api_access_data)
+        if cache_data is None:
+            return False
+
+        zen_user_reference = cache_data['zen_user_reference']
+        if requester_name:
+            zen_user_reference[zen_ticket['requester_id']] = requester_name
+        elif zen_ticket['requester_id'] not in zen_user_reference:
+            return False
+
+        # Get the GitHub ticket for a new association before updating the
+        # enhancement that refers to it.
+        git_issue_numbers = get_id_lists([zen_ticket])[1]
+        for issue_number in git_issue_numbers:
+            if issue_number not in cache_data['git_tickets']:
+                cache_data['git_tickets'][issue_number] = \
+                        get_git_tickets(api_access_data, [issue_number])[0]
+
+        cache_data = update_zen_cache(cache_data, [zen_ticket])
+        save_cache_data(api_access_data, cache_data)
+    finally:
+        _release_sync_lock(api_access_data, lock_token)
+
+    return True
 
 def update_git_cache(cache_data, updated_git_tickets):
     """Updates the passed cache data with the data from the passed updated GitHub
@@ -609,151 +1802,164 @@ def update_git_cache(cache_data, updated_git_tickets):
                         the application's cache.
         updated_git_tickets - A list of GitHub tickets that have been updated
                                 since the last update of the cache index for the
-                                passed cache_data.
+                                passed cache_data. Only tickets that are
+                                associated with Zendesk tickets in the cache
+                                data should be passed.
+
+    The enhancements associated with each ticket are looked up in the cache
+    data's git_index, so the cost of the update depends only on the number of
+    updated tickets and the enhancements associated with them.
 
     Returns the cache_data object passed to the function updated with ticket
     data from the passed list of updated GitHub tickets.
     """
-    for ticket in updated_git_tickets:
-        ticket_found = False
-
-        for enhancement in cache_data['tracking']:
-            if enhancement['git_id'] == ticket['number']:
-                enhancement = _update_enhancement_git_data(enhancement, ticket)
-
-                if ticket['state'] == 'closed':
-                    cache_data['need_attention'].append(enhancement)
-                    cache_data['tracking'] = _rm_from_diclist(
-                        cache_data['tracking'], 'zen_id',
-                        enhancement['zen_id']
-                    )
-                ticket_found = True
-                break
-        if ticket_found:
-            continue
+    enhancements = cache_data['enhancements']
 
-        for enhancement in cache_data['need_attention']:
-            if enhancement['git_id'] == ticket['number']:
-                enhancement = _update_enhancement_git_data(enhancement, ticket)
-
-                if ticket['state'] == 'open':
-                    cache_data['tracking'].append(enhancement)
-                    cache_data['need_attention'] = _rm_from_diclist(
-                        cache_data['need_attention'], 'zen_id',
-                        enhancement['zen_id']
-                    )
-                break
+    for ticket in updated_git_tickets:
+        cache_data['git_tickets'][ticket.number] = ticket
+        for zen_id in cache_data['git_index'].get(ticket.number, ()):
+            _update_enhancement_git_data(enhancements[zen_id], ticket)
 
     return cache_data
 
 def _update_enhancement_git_data(enhancement, git_ticket):
     """Updates the base GitHub information for an enhancement with the data from
-    the passed GitHub ticket.
+    the passed GitHub ticket, and moves the enhancement to the table for the
+    ticket's state.
 
     Parameters:
         enhancement - A dictionary of enhancement data.
-        git_ticket - A dictionary of ticket data for a GitHub ticket that will
-                        be used to update the passed enhancement dictionary.
+        git_ticket - The GitIssue record of a GitHub ticket that will be used
+                        to update the passed enhancement dictionary.
 
     Returns the enhancement dictionary with it's base GitHub fields updated with
     the data from the passed GitHub ticket.
     """
-    enhancement['git_url'] = git_ticket['html_url']
-    enhancement['git_status'] = git_ticket['state']
+    enhancement['git_url'] = git_ticket.html_url
+    enhancement['git_status'] = git_ticket.state
     git_datetime = datetime.strptime(
-        git_ticket['updated_at'], "%Y-%m-%dT%H:%M:%SZ"
+        git_ticket.updated_at, "%Y-%m-%dT%H:%M:%SZ"
     )
     enhancement['git_datetime'] = git_datetime
 
+    # The enhancement is tracked while its GitHub ticket is open. Once the
+    # GitHub ticket is closed, the Zendesk ticket needs attention.
+    if git_ticket.state == 'open':
+        enhancement['table'] = 'tracking'
+    else:
+        enhancement['table'] = 'need_attention'
+
     return enhancement
 
-def update_zen_cache(cache_data, updated_zen_tickets, zen_fieldid):
+def update_zen_cache(cache_data, updated_zen_tickets):
     """Updates the passed cache data with the data from the passed updated
     Zendesk tickets.
 
     Parameters:
         cache_data - A dictionary of the cache data pulled from a group index in
                         the application's cache.
-        updated_git_tickets - A list of Zendesk tickets that have been updated
+        updated_zen_tickets - A list of projected Zendesk tickets (see
+                                project_zen_ticket) that have been updated
                                 since the last update of the cache index for the
                                 passed cache_data.
-        zen_fieldid - The ID number of the field on Zendesk tickets that holds
-                        the string value of the ticket's external association.
 
+    The GitHub tickets associated with the Zendesk tickets must already be in
+    the cache data's git_tickets for their enhancements to be classified.
 
     Returns the cache_data object passed to the function updated with ticket
     data from the passed list of updated Zendesk tickets.
     """
-    not_on_gitzen = [] # A list of the Zendesk tickets in updated_zen_tickets
-                       # that were not in the cache.
+    enhancements = cache_data['enhancements']
 
     for ticket in updated_zen_tickets:
-        # Will be changed to True if the ticket is found in the
-        # enhancement data in the cache. If it stays False, it means the
-        # ticket has not had an enhancement object created for it yet.
-        on_gitzen = False
-
-        # If the ticket has been closed, it's enhancement can be removed
-        # from the cache data entirely.
-        if ticket['status'] == 'closed':
-            cache_data['need_attention'] = _rm_from_diclist(
-                cache_data['need_attention'], 'zen_id', ticket['id']
-            )
-            cache_data['tracking'] = _rm_from_diclist(
-                cache_data['tracking'], 'zen_id', ticket['id']
-            )
-            cache_data['unassociated_enhancements'] = _rm_from_diclist(
-                cache_data['unassociated_enhancements'], 'zen_id', ticket['id']
-            )
-            cache_data['not_git_enhancements'] = _rm_from_diclist(
-                cache_data['not_git_enhancements'], 'zen_id', ticket['id']
-            )
+        # If the ticket has been closed or deleted, it's enhancement can be
+        # removed from the cache data entirely.
+        if ticket['status'] in ZEN_REMOVED_STATUSES:
+            enhancement = enhancements.pop(ticket['id'], None)
+            if enhancement is not None:
+                _delete_enhancement_git_data(cache_data, enhancement)
 
         else:
-            association_data = ''
-            for field in ticket['fields']:
-                if field['id'] == zen_fieldid:
-                    association_data = field['value']
-                    break
-
-            if not association_data:
-                cache_data, on_gitzen = _update_zen_no_association(cache_data,
-                                                                   ticket)
-
-            else:
-                cache_data, on_gitzen = _update_zen_need_attention(cache_data,
-                                                        ticket, association_data)
-                if on_gitzen:
-                    continue
-                cache_data, on_gitzen = _update_zen_tracking(cache_data, ticket,
-                                                             association_data)
-                if on_gitzen:
-                    continue
-                cache_data, on_gitzen = _update_zen_unassociated(cache_data,
-                                                        ticket, association_data)
-                if on_gitzen:
-                    continue
-                cache_data, on_gitzen = _update_zen_not_git(cache_data, ticket,
-                                                            association_data)
-
-        # Check if the ticket is a new Zendesk ticket not being tracked by
-        # GitZen.
-        if not on_gitzen:
-            not_on_gitzen.append(ticket)
-
-    new_enhancements = build_enhancement_data(not_on_gitzen,
-                                              cache_data['zen_user_reference'],
-                                              cache_data['git_tickets'],
-                                              zen_fieldid)
-    cache_data['need_attention'].extend(new_enhancements['need_attention'])
-    cache_data['tracking'].extend(new_enhancements['tracking'])
-    cache_data['unassociated_enhancements'].\
-            extend(new_enhancements['unassociated_enhancements'])
-    cache_data['not_git_enhancements'].\
-            extend(new_enhancements['not_git_enhancements'])
+            _apply_zen_ticket(cache_data, ticket)
 
     return cache_data
 
+def _apply_zen_ticket(cache_data, zen_ticket):
+    """Adds the enhancement for the passed Zendesk ticket to the passed cache
+    data, or updates it if the cache data already has it.
+
+    Parameters:
+        cache_data - A dictionary with the 'enhancements', 'git_index',
+                        'git_tickets' and 'zen_user_reference' of a group's
+                        cache data.
+        zen_ticket - A projected Zendesk ticket (see project_zen_ticket).
+
+    Returns the added or updated enhancement dictionary.
+    """
+    enhancement = cache_data['enhancements'].get(zen_ticket['id'])
+    if enhancement is None:
+        enhancement = {'zen_id': zen_ticket['id']} # Enhancement data object
+        cache_data['enhancements'][zen_ticket['id']] = enhancement
+
+    enhancement = _update_enhancement_zen_data(enhancement, zen_ticket,
+                                               cache_data['zen_user_reference'])
+    enhancement = _update_enhancement_association(cache_data, enhancement,
+                                                  zen_ticket)
+
+    return enhancement
+
+def _update_enhancement_association(cache_data, enhancement, zen_ticket):
+    """Updates the external ticket association of an enhancement and moves the
+    enhancement to the table for its new association.
+
+    Parameters:
+        cache_data - A dictionary with the 'git_index' and 'git_tickets' of a
+                        group's cache data.
+        enhancement - A dictionary of enhancement data.
+        zen_ticket - The projected Zendesk ticket of the enhancement (see
+                        project_zen_ticket), whose association has already
+                        been classified.
+
+    An enhancement associated with a GitHub ticket that is not in the cache
+    data's git_tickets is left out of every table until its ticket is added.
+
+    Returns the enhancement dictionary with its association updated.
+    """
+    association_data = zen_ticket['association']
+    git_id = zen_ticket['git_id']
+
+    # Check if the enhancement has no associated ticket
+    if not association_data:
+        _delete_enhancement_git_data(cache_data, enhancement)
+        enhancement.pop('non_git_association', None)
+        enhancement['table'] = 'unassociated_enhancements'
+
+    # Check if the enhancement's associated ticket is not a GitHub ticket
+    elif git_id is None:
+        _delete_enhancement_git_data(cache_data, enhancement)
+        enhancement['non_git_association'] = association_data
+        enhancement['table'] = 'not_git_enhancements'
+
+    # Add GitHub data to the enhancement data object
+    else:
+        if enhancement.get('git_id') != git_id:
+            _delete_enhancement_git_data(cache_data, enhancement)
+            enhancement['git_id'] = git_id
+            cache_data['git_index'].setdefault(git_id, set()).add(
+                enhancement['zen_id']
+            )
+        enhancement.pop('non_git_association', None)
+
+        # The GitHub ticket is looked up by its issue number, so classifying
+        # an enhancement costs the same no matter how many tickets there are.
+        git_ticket = cache_data['git_tickets'].get(git_id)
+        if git_ticket is not None:
+            enhancement = _update_enhancement_git_data(enhancement, git_ticket)
+        else:
+            enhancement['table'] = None
+
+    return enhancement
+
 def _update_enhancement_zen_data(enhancement, zen_ticket, zen_user_reference):
     """Updates the base Zendesk information for an enhancement with the data from
     the passed Zendesk ticket.
@@ -782,296 +1988,29 @@ def _update_enhancement_zen_data(enhancement, zen_ticket, zen_user_reference):
 
     return enhancement
 
-def _update_zen_no_association(cache_data, zen_ticket):
-    """Updates the passed cache data with the data from the passed Zendesk
-    ticket which has no external ticket association.
-
-    Parameters:
-        cache_data - A dictionary of the cache data pulled from a group index in
-                        the application's cache.
-        zen_ticket - A dictionary with the data for a Zendesk ticket that has no
-                        external ticket association.
-
-    Returns a tuple with both the passed cache_data object updated with the data
-    from the passed Zendesk ticket and a boolean that is True if the passed
-    zen_ticket was found in the cache and False if the ticket was not found in
-    the cache.
-    """
-    zen_user_reference = cache_data['zen_user_reference']
-
-    for enhancement in cache_data['need_attention']:
-        if enhancement['zen_id'] == zen_ticket['id']:
-            enhancement = _update_enhancement_zen_data(enhancement, zen_ticket,
-                                                       zen_user_reference)
-
-            enhancement = _delete_enhancement_git_data(enhancement)
-            cache_data['unassociated_enhancements'].append(enhancement)
-            cache_data['need_attention'] = _rm_from_diclist(
-                cache_data['need_attention'], 'zen_id', enhancement['zen_id']
-            )
-            return (cache_data, True)
-
-    for enhancement in cache_data['tracking']:
-        if enhancement['zen_id'] == zen_ticket['id']:
-            enhancement = _update_enhancement_zen_data(enhancement, zen_ticket,
-                                                       zen_user_reference)
-
-            enhancement = _delete_enhancement_git_data(enhancement)
-            cache_data['unassociated_enhancements'].append(enhancement)
-            cache_data['tracking'] = _rm_from_diclist(
-                cache_data['tracking'], 'zen_id', enhancement['zen_id']
-            )
-            return (cache_data, True)
-
-    for enhancement in cache_data['unassociated_enhancements']:
-        if enhancement['zen_id'] == zen_ticket['id']:
-            enahancement = _update_enhancement_zen_data(enhancement, zen_ticket,
-                                                        zen_user_reference)
-            return (cache_data, True)
-
-    for enhancement in cache_data['not_git_enhancements']:
-        if enhancement['zen_id'] == zen_ticket['id']:
-            enhancement = _update_enhancement_zen_data(enhancement, zen_ticket,
-                                                       zen_user_reference)
-
-            del enhancement['non_git_association']
-            cache_data['unassociated_enhancements'].append(enhancement)
-            cache_data['not_git_enhancements'] =  _rm_from_diclist(
-                cache_data['not_git_enhancements'], 'zen_id',
-                enhancement['zen_id']
-            )
-            return (cache_data, True)
-
-    return (cache_data, False)
-
-def _delete_enhancement_git_data(enhancement):
-    """Deletes the base GitHub data fields form an enhancement dictionary.
+def _delete_enhancement_git_data(cache_data, enhancement):
+    """Deletes the base GitHub data fields form an enhancement dictionary and
+    removes the enhancement from the cache data's git_index.
 
     Parameters:
+        cache_data - A dictionary with the 'git_index' of a group's cache data.
         enhancement - The enhancement dictionary from which the GitHub data
-                        fields should be deleted. This dictionary must contain
-                        the base GitHub fields.
+                        fields should be deleted. The enhancement is left
+                        unchanged if it has no GitHub fields.
 
     Returns the passed enhancement dictionary with all of base GitHub fields
     deleted from it.
     """
-    del enhancement['git_id']
-    del enhancement['git_url']
-    del enhancement['git_status']
-    del enhancement['git_datetime']
+    git_id = enhancement.pop('git_id', None)
+    if git_id is not None:
+        zen_ids = cache_data['git_index'].get(git_id)
+        if zen_ids is not None:
+            zen_ids.discard(enhancement['zen_id'])
+            if not zen_ids:
+                del cache_data['git_index'][git_id]
+
+    enhancement.pop('git_url', None)
+    enhancement.pop('git_status', None)
+    enhancement.pop('git_datetime', None)
 
     return enhancement
-
-def _update_zen_need_attention(cache_data, zen_ticket, association_data):
-    """Updates the passed cache data with the data from the passed Zendesk
-    ticket if the ticket is in the need_attention table.
-
-    Parameters:
-        cache_data - A dictionary of the cache data pulled from a group index in
-                        the application's cache.
-        zen_ticket - A dictionary with the data for a Zendesk ticket.
-
-    Returns a tuple with both the passed cache_data object updated with the data
-    from the passed Zendesk ticket and a boolean that is True if the passed
-    zen_ticket was found in the need_attention table and False if the ticket was
-    not found in the need_attention table.
-    """
-    zen_user_reference = cache_data['zen_user_reference']
-    split_association_data = association_data.split('-')
-
-    for enhancement in cache_data['need_attention']:
-        if enhancement['zen_id'] == zen_ticket['id']:
-            enahancemet = _update_enhancement_zen_data(enhancement, zen_ticket,
-                                                       zen_user_reference)
-
-            # If the external ticket association is no longer a regular GitHub
-            # associaion, move the enhancement to the not_git_enhancements list.
-            if len(split_association_data) != 2 or \
-            split_association_data[0] != 'gh' or \
-            not split_association_data[1].isdigit():
-                enhancement = _delete_enhancement_git_data(enhancement)
-                enhancement['non_git_association'] = association_data
-                cache_data['not_git_enhancements'].append(enhancement)
-                cache_data['need_attention'] = _rm_from_diclist(
-                    cache_data['need_attention'], 'zen_id', enhancement['zen_id']
-                )
-
-            # Check if the enhancement's GitHub association has changed.
-            if enhancement['git_id'] != int(split_association_data[1]):
-                enhancement['git_id'] = int(split_association_data[1])
-
-                for git_ticket in cache_data['git_tickets']:
-                    if enhancement['git_id'] == git_ticket['number']:
-                        enhancement = _update_enhancement_git_data(enhancement,
-                                                                   git_ticket)
-
-                        if git_ticket['state'] == 'open':
-                            cache_data['tracking'].append(enhancement)
-                            cache_data['need_attention'] = _rm_from_diclist(
-                                cache_data['need_attention'], 'zen_id',
-                                enhancement['zen_id']
-                            )
-                        break
-            return (cache_data, True)
-
-    return (cache_data, False)
-
-def _update_zen_tracking(cache_data, zen_ticket, association_data):
-    """Updates the passed cache data with the data from the passed Zendesk
-    ticket if the ticket is in the tracking table.
-
-    Parameters:
-        cache_data - A dictionary of the cache data pulled from a group index in
-                        the application's cache.
-        zen_ticket - A dictionary with the data for a Zendesk ticket.
-
-    Returns a tuple with both the passed cache_data object updated with the data
-    from the passed Zendesk ticket and a boolean that is True if the passed
-    zen_ticket was found in the tracking table and False if the ticket was not
-    found in the tracking table.
-    """
-    zen_user_reference = cache_data['zen_user_reference']
-    split_association_data = association_data.split('-')
-
-    for enhancement in cache_data['tracking']:
-        if enhancement['zen_id'] == zen_ticket['id']:
-            enahancemet = _update_enhancement_zen_data(enhancement, zen_ticket,
-                                                       zen_user_reference)
-
-            # If the external ticket association is no longer a regular GitHub
-            # associaion, move the enhancement to the not_git_enhancements list.
-            if len(split_association_data) != 2 or \
-            split_association_data[0] != 'gh' or \
-            not split_association_data[1].isdigit():
-                enhancement = _delete_enhancement_git_data(enhancement)
-                enhancement['non_git_association'] = association_data
-                cache_data['not_git_enhancements'].append(enhancement)
-                cache_data['tracking'] = _rm_from_diclist(
-                    cache_data['tracking'], 'zen_id', enhancement['zen_id']
-                )
-
-            # Check if the enhancement's GitHub association has changed.
-            if enhancement['git_id'] != int(split_association_data[1]):
-                enhancement['git_id'] = int(split_association_data[1])
-
-                for git_ticket in cache_data['git_tickets']:
-                    if enhancement['git_id'] == git_ticket['number']:
-                        enhancement = _update_enhancement_git_data(enhancement,
-                                                                   git_ticket)
-
-                        if git_ticket['state'] == 'closed':
-                            cache_data['need_attention'].append(enhancement)
-                            cache_data['tracking'] = _rm_from_diclist(
-                                cache_data['tracking'], 'zen_id',
-                                enhancement['zen_id']
-                            )
-                        break
-            return (cache_data, True)
-
-    return (cache_data, False)
-
-def _update_zen_unassociated(cache_data, zen_ticket, association_data):
-    """Updates the passed cache data with the data from the passed Zendesk
-    ticket if the ticket is in the unassociated_enhancements table.
-
-    Parameters:
-        cache_data - A dictionary of the cache data pulled from a group index in
-                        the application's cache.
-        zen_ticket - A dictionary with the data for a Zendesk ticket.
-
-    Returns a tuple with both the passed cache_data object updated with the data
-    from the passed Zendesk ticket and a boolean that is True if the passed
-    zen_ticket was found in the unassociated_enhancements table and False if the
-    ticket was not found in the unassociated_enhancements table.
-    """
-    zen_user_reference = cache_data['zen_user_reference']
-    split_association_data = association_data.split('-')
-
-    for enhancement in cache_data['unassociated_enhancements']:
-        if enhancement['zen_id'] == zen_ticket['id']:
-            enhancement = _update_enhancement_zen_data(enhancement, zen_ticket,
-                                                       zen_user_reference)
-
-            # If the external ticket association is not a regular GitHub
-            # association, move the enhancement to the not_git_enhancements
-            # list.
-            if len(split_association_data) != 2 or \
-            split_association_data[0] != 'gh' or \
-            not split_association_data[1].isdigit():
-                enhancement['non_git_association'] = association_data
-                cache_data['not_git_enhancements'].append(enhancement)
-
-            # Add the data for the enhancement's new GitHub association.
-            else:
-                enhancement['git_id'] = int(split_association_data[1])
-
-                for git_ticket in cache_data['git_tickets']:
-                    if enhancement['git_id'] == git_ticket['number']:
-                        enhancement = _update_enhancement_git_data(enhancement,
-                                                                   git_ticket)
-
-                        if git_ticket['state'] == 'closed':
-                            cache_data['need_attention'].append(enhancement)
-                        else:
-                            cache_data['tracking'].append(enhancement)
-                        break
-            cache_data['unassociated_enhancements'] = _rm_from_diclist(
-                    cache_data['unassociated_enhancements'], 'zen_id',
-                    enhancement['zen_id']
-            )
-            return (cache_data, True)
-
-    return (cache_data, False)
-
-def _update_zen_not_git(cache_data, zen_ticket, association_data):
-    """Updates the passed cache data with the data from the passed Zendesk
-    ticket if the ticket is in the not_git_enhancements table.
-
-    Parameters:
-        cache_data - A dictionary of the cache data pulled from a group index in
-                        the application's cache.
-        zen_ticket - A dictionary with the data for a Zendesk ticket.
-
-    Returns a tuple with both the passed cache_data object updated with the data
-    from the passed Zendesk ticket and a boolean that is True if the passed
-    zen_ticket was found in the not_git_enhancements table and False if the
-    ticket was not found in the not_git_enhancements table.
-    """
-    zen_user_reference = cache_data['zen_user_reference']
-    split_association_data = association_data.split('-')
-
-    for enhancement in cache_data['not_git_enhancements']:
-        if enhancement['zen_id'] == zen_ticket['id']:
-            enhancement = _update_enhancement_zen_data(enhancement, zen_ticket,
-                                                       zen_user_reference)
-
-            # Check if the external ticket association has changed.
-            if enhancement['non_git_association'] != association_data:
-                if len(split_association_data) != 2 or \
-                split_association_data[0] != 'gh' or \
-                not split_association_data[1].isdigit():
-                    enhancement['non_git_association'] = asscoiation_data
-
-                else:
-                    enhancement['git_id'] = int(split_association_data[1])
-                    del enhancement['non_git_association']
-
-                    for git_ticket in cache_data['git_tickets']:
-                        if enhancement['git_id'] == git_ticket['number']:
-                            enhancement = \
-                                _update_enhancement_git_data(enhancement,
-                                                             git_ticket)
-
-                            if git_ticket['state'] == 'closed':
-                                cache_data['need_attention'].append(enhancement)
-                            else:
-                                cache_data['tracking'].append(enhancement)
-                            cache_data['not_git_enhancements'] = \
-                                _rm_from_diclist(
-                                    cache_data['not_git_enhancements'], 'zen_id',
-                                    enhancement['zen_id']
-                                )
-                            break
-            return (cache_data, True)
-
-    return (cache_data, False)
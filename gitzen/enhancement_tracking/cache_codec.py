@@ -0,0 +1,134 @@
+import marshal
+import zlib
+from calendar import timegm
+from collections import namedtuple
+from datetime import datetime
+from struct import Struct
+
+# The version of the schema of the encoded cache data. It must be increased
+# whenever the shape of the cache data changes, so that cache data written by
+# processes running other versions of the application is never misread.
+SCHEMA_VERSION = 4
+
+# Compact record of the parts of a GitHub ticket that are kept in the cache.
+# The etag and last_modified fields hold the validators of the response the
+# ticket was read from, and are None if the ticket did not come from a request
+# for the single issue.
+GitIssue = namedtuple('GitIssue', ['number', 'state', 'html_url', 'updated_at',
+                                   'etag', 'last_modified'])
+
+# Constant bytes that every encoded shard starts with.
+MAGIC = 'GZ'
+
+# The header of an encoded shard: the magic bytes, the schema version and the
+# flags describing how the body is encoded.
+HEADER = Struct('!2sBB')
+
+# Header flag set when the body of an encoded shard is compressed with zlib.
+FLAG_COMPRESSED = 0x01
+
+# The size in bytes above which the body of an encoded shard is compressed.
+COMPRESSION_THRESHOLD = 1024
+
+# The zlib compression level used for large shards. The cached data is mostly
+# repeated field names and URLs, so the default level shrinks it to less than a
+# tenth of its size while taking far less time than marshalling it.
+COMPRESSION_LEVEL = 6
+
+# The fields of enhancements that hold datetimes. They are encoded as Unix
+# timestamps.
+DATETIME_FIELDS = ('zen_datetime', 'git_datetime')
+
+class CacheSchemaError(Exception):
+    """Exception raised when an encoded shard was written with a different
+    schema version or is not an encoded shard at all."""
+    pass
+
+def encode_shard(name, shard):
+    """Encodes the items of a shard of cached group data.
+
+    Parameters:
+        name - The name of the sharded value of the cache data the items are
+                from (i.e. 'enhancements').
+        shard - A list of the (key, value) items of the shard, sorted by key.
+
+    Equal shards are always encoded to the same string, so the encoded shards
+    can be compared to find the ones that have changed.
+
+    Returns the encoded shard as a string that starts with a header holding
+    SCHEMA_VERSION.
+    """
+    if name == 'enhancements':
+        shard = [(key, _encode_enhancement(value)) for key, value in shard]
+    elif name == 'git_tickets':
+        shard = [(key, tuple(value)) for key, value in shard]
+
+    # Version 0 of the marshal format does not share interned strings, so its
+    # output depends only on the values being encoded.
+    body = marshal.dumps(shard, 0)
+
+    flags = 0
+    if len(body) > COMPRESSION_THRESHOLD:
+        body = zlib.compress(body, COMPRESSION_LEVEL)
+        flags |= FLAG_COMPRESSED
+
+    return HEADER.pack(MAGIC, SCHEMA_VERSION, flags) + body
+
+def decode_shard(name, encoded_shard):
+    """Decodes a shard of cached group data encoded by encode_shard.
+
+    Parameters:
+        name - The name of the sharded value of the cache data the shard is
+                from.
+        encoded_shard - The encoded shard.
+
+    Returns the list of the (key, value) items of the shard. Raises a
+    CacheSchemaError if the shard was encoded with another schema version or
+    its body cannot be decoded.
+    """
+    if len(encoded_shard) < HEADER.size:
+        raise CacheSchemaError('The encoded shard has no header')
+    magic, schema_version, flags = HEADER.unpack_from(encoded_shard)
+    if magic != MAGIC or schema_version != SCHEMA_VERSION:
+        raise CacheSchemaError('The shard was encoded with schema version %i, '
+                               'not %i' % (schema_version, SCHEMA_VERSION))
+
+    # The body's marshal format may change between versions of Python, so a
+    # body written by another interpreter is treated like another schema.
+    body = encoded_shard[HEADER.size:]
+    try:
+        if flags & FLAG_COMPRESSED:
+            body = zlib.decompress(body)
+        shard = marshal.loads(body)
+    except (zlib.error, ValueError, EOFError, TypeError):
+        raise CacheSchemaError('The body of the shard could not be decoded')
+
+    if name == 'enhancements':
+        shard = [(key, _decode_enhancement(value)) for key, value in shard]
+    elif name == 'git_tickets':
+        shard = [(key, GitIssue(*value)) for key, value in shard]
+
+    return shard
+
+def _encode_enhancement(enhancement):
+    """Encodes an enhancement dictionary as a list of its items sorted by field
+    name, with its datetimes as Unix timestamps.
+    """
+    items = []
+    for field, value in sorted(enhancement.items()):
+        if field in DATETIME_FIELDS:
+            value = timegm(value.utctimetuple())
+        items.append((field, value))
+
+    return items
+
+def _decode_enhancement(items):
+    """Decodes an enhancement encoded by _encode_enhancement back into a
+    dictionary.
+    """
+    enhancement = dict(items)
+    for field in DATETIME_FIELDS:
+        if field in enhancement:
+            enhancement[field] = datetime.utcfromtimestamp(enhancement[field])
+
+    return enhancement
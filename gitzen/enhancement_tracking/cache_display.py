@@ -0,0 +1,300 @@
+import zlib
+from collections import OrderedDict
+from datetime import timedelta
+from time import mktime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from gitzen.enhancement_tracking.cache_actions import (
+    ENHANCEMENT_TABLES,
+    get_enhancement_tables
+)
+from gitzen.enhancement_tracking.cache_codec import COMPRESSION_LEVEL
+from gitzen.enhancement_tracking.cache_storage import (
+    get_enhancements_version,
+    load_cache_data
+)
+
+# The version of the enhancement_tables.html template. It must be increased
+# whenever the template changes, so that tables rendered by processes running
+# other versions of the application are never displayed.
+TABLES_TEMPLATE_VERSION = 4
+
+# Constant cache key of the rendered HTML of a group's enhancement tables. The
+# key includes the version of the group's enhancements, so the rendered tables
+# are replaced as soon as a sync changes them. It requires the ID of the
+# group's API access model, the version of its enhancements and the view type
+# of the rendered tables for the string's formatting.
+RENDERED_TABLES_KEY = 'enhancement_tables:%(template_version)i:' \
+                      '%%(api_access_id)i:%%(version)s:%%(view_type)s' % \
+                      {'template_version': TABLES_TEMPLATE_VERSION}
+
+# The fields that the columns of each enhancement table are sorted by, in the
+# order of the columns. The association column shows the Zendesk or the GitHub
+# ticket first depending on the user's view type, and is sorted by the ID of
+# the ticket shown first.
+TABLE_SORT_FIELDS = {
+    'need_attention': ('association', 'zen_subject', 'zen_requester',
+                       'zen_sortable_datetime', 'git_sortable_datetime'),
+    'tracking': ('association', 'zen_subject', 'zen_requester',
+                 'zen_sortable_datetime', 'git_sortable_datetime'),
+    'unassociated_enhancements': ('zen_id', 'zen_subject', 'zen_requester',
+                                  'zen_sortable_datetime'),
+    'not_git_enhancements': ('zen_id', 'zen_subject', 'zen_requester',
+                             'zen_sortable_datetime', 'non_git_association'),
+}
+
+# The largest size in bytes of compressed rendered tables that are cached.
+# Larger ones would not fit in a single memcached item, so they are rendered
+# on every view instead.
+RENDERED_TABLES_MAX_SIZE = 1000000
+
+# The display-ready enhancement tables built by this process, with tuples of
+# the ID of the group's API access model, the version of its enhancements and
+# the UTC offset they were adjusted to as keys. The least recently used tables
+# come first and are discarded once there are more than
+# settings.DISPLAY_TABLES_CACHE_SIZE of them. Old versions are never used again
+# after the group's cached data changes, so they are discarded the same way.
+_display_tables = OrderedDict()
+
+def get_rendered_tables(api_access_data, manifest, view_type):
+    """Gets the rendered HTML of the enhancement tables of the cache data
+    described by the passed manifest, along with the tabs that switch between
+    them. The rows of the tables are served separately (see
+    views.enhancement_table_data), so the rendered tables only depend on the
+    number of enhancements in each table and the view type. They are only
+    rendered the first time they are needed for a version of the group's
+    enhancements and a view type. After that, they are read from the cache with
+    a single get.
+
+    Parameters:
+        api_access_data - The API access model whose enhancement tables are
+                            rendered.
+        manifest - The current manifest of the model's cache data.
+        view_type - The view type of the user the tables are displayed to
+                    ('ZEN' or 'GIT').
+
+    Returns the rendered tables as a safe string, or None if the cache data was
+    evicted from the cache after the manifest was loaded.
+    """
+    key = RENDERED_TABLES_KEY % \
+            {'api_access_id': api_access_data.id,
+             'version': get_enhancements_version(manifest),
+             'view_type': view_type}
+    compressed_tables = cache.get(key)
+    if compressed_tables is not None:
+        return mark_safe(zlib.decompress(compressed_tables).decode('utf-8'))
+
+    # Manifests stored before the table counts were added to them do not have
+    # the counts, so the enhancements are counted instead.
+    table_counts = manifest.get('table_counts')
+    if table_counts is None:
+        cache_data = load_cache_data(api_access_data)
+        if cache_data is None:
+            return None
+        table_counts = dict(
+            (table, len(enhancements)) for table, enhancements
+            in get_enhancement_tables(cache_data).items()
+        )
+
+    context = dict(('%s_count' % table, table_counts.get(table, 0))
+                   for table in ENHANCEMENT_TABLES)
+    context['is_zendesk_user'] = view_type == 'ZEN'
+    context['is_github_user'] = not context['is_zendesk_user']
+    rendered_tables = render_to_string('enhancement_tables.html', context)
+
+    compressed_tables = zlib.compress(rendered_tables.encode('utf-8'),
+                                      COMPRESSION_LEVEL)
+    if len(compressed_tables) <= RENDERED_TABLES_MAX_SIZE:
+        cache.set(key, compressed_tables, settings.RENDERED_TABLES_TIMEOUT)
+
+    return mark_safe(rendered_tables)
+
+def get_display_tables(api_access_data, manifest, utc_offset):
+    """Gets the enhancement tables of the cache data described by the passed
+    manifest with all of their dates and times adjusted to the passed UTC
+    offset and formatted for display. The tables are only built the first time
+    they are needed for a version of the group's enhancements and an offset.
+    After that, they are reused without loading the cache data again.
+
+    Parameters:
+        api_access_data - The API access model whose enhancement tables are
+                            displayed.
+        manifest - The current manifest of the model's cache data.
+        utc_offset - The numeric UTC offset for the time zone that the
+                        enhancement data should be displayed in.
+
+    Returns the four display-ready enhancement tables in a dictionary with the
+    table names in ENHANCEMENT_TABLES as keys, or None if the cache data was
+    evicted from the cache after the manifest was loaded. The tables and their
+    rows are shared by every request, so they must not be changed.
+    """
+    key = (api_access_data.id, get_enhancements_version(manifest), utc_offset)
+    display_tables = _display_tables.pop(key, None)
+
+    if display_tables is None:
+        cache_data = load_cache_data(api_access_data)
+        if cache_data is None:
+            return None
+        display_tables = build_display_tables(cache_data, utc_offset)
+
+        while _display_tables and \
+              len(_display_tables) >= settings.DISPLAY_TABLES_CACHE_SIZE:
+            _display_tables.popitem(last=False)
+
+    # Add the tables back as the most recently used ones.
+    _display_tables[key] = display_tables
+
+    return display_tables
+
+def build_display_tables(cache_data, utc_offset):
+    """Builds the enhancement tables of the passed cache data with all of their
+    dates and times adjusted to the passed UTC offset and formatted for
+    display. The enhancements of the cache data are not changed.
+
+    Parameters:
+        cache_data - A dictionary of the cache data of a group.
+        utc_offset - The numeric UTC offset for the time zone that the
+                        enhancement data should be displayed in.
+
+    Returns the four enhancement tables (need_attention, tracking,
+    unassociated_enhancements, and not_git_enhancements) in a dictionary with
+    the keys being the tables' names. Their rows are copies of the enhancements
+    with the added zen_date, zen_time and zen_sortable_datetime fields, the
+    matching git_ fields for the enhancements that have a GitHub ticket, and a
+    search_text field holding the lowercased text of the row's cells.
+    """
+    offset_delta = timedelta(hours=utc_offset)
+    display_tables = {}
+
+    for table, enhancements in get_enhancement_tables(cache_data).items():
+        rows = []
+        for enhancement in enhancements:
+            row = dict(enhancement)
+            _add_display_datetime(row, 'zen', offset_delta)
+            if 'git_datetime' in row:
+                _add_display_datetime(row, 'git', offset_delta)
+            row['search_text'] = _get_search_text(row)
+            rows.append(row)
+        display_tables[table] = rows
+
+    return display_tables
+
+def _add_display_datetime(row, prefix, offset_delta):
+    """Adds the date, time and sortable datetime fields for one of the
+    datetimes of an enhancement table row.
+
+    Parameters:
+        row - The enhancement table row to add the fields to.
+        prefix - The prefix of the datetime field and the added fields (i.e.
+                    'zen' for the zen_datetime field).
+        offset_delta - The timedelta of the UTC offset to adjust the datetime
+                        to.
+    """
+    adjusted_datetime = row['%s_datetime' % prefix] + offset_delta
+    row['%s_date' % prefix] = adjusted_datetime.strftime('%m/%d/%Y')
+    row['%s_time' % prefix] = adjusted_datetime.strftime('%I:%M %p')
+    row['%s_sortable_datetime' % prefix] = \
+            mktime(adjusted_datetime.timetuple())
+
+def _get_search_text(row):
+    """Gets the text that an enhancement table row is searched by, which is
+    the text of the row's cells as they are displayed.
+
+    Parameters:
+        row - The enhancement table row with its display fields added.
+
+    Returns the lowercased text as a unicode string.
+    """
+    texts = [u'z%s' % row['zen_id'], row['zen_subject'],
+             row['zen_requester'], row['zen_date'], row['zen_time']]
+    if 'git_id' in row:
+        texts.extend([u'g%s' % row['git_id'], row['git_date'],
+                      row['git_time']])
+    if row.get('non_git_association'):
+        texts.append(row['non_git_association'])
+
+    return u' '.join(unicode(text) for text in texts if text).lower()
+
+def filter_display_rows(rows, search):
+    """Filters the rows of an enhancement table by the passed search string the
+    way jquery.dataTables.js does, which is that every word of the search
+    string must appear somewhere in the row.
+
+    Parameters:
+        rows - The list of display-ready enhancement table rows to filter.
+        search - The search string entered by the user.
+
+    Returns the list of the rows that match, in their original order.
+    """
+    words = search.lower().split()
+    if not words:
+        return rows
+
+    return [row for row in rows
+            if all(word in row['search_text'] for word in words)]
+
+def sort_display_rows(rows, table, column, descending, is_zendesk_user):
+    """Sorts the rows of an enhancement table by one of its columns.
+
+    Parameters:
+        rows - The list of display-ready enhancement table rows to sort.
+        table - The name of the enhancement table the rows are from.
+        column - The index of the column to sort the rows by.
+        descending - True if the rows should be sorted in descending order.
+        is_zendesk_user - True if the user the rows are displayed to has the
+                            Zendesk view type.
+
+    Returns a new sorted list of the rows. Strings are compared without regard
+    to case. Raises an IndexError if the table has no such column.
+    """
+    if column < 0:
+        raise IndexError('Column index out of range')
+    field = TABLE_SORT_FIELDS[table][column]
+    if field == 'association':
+        field = 'zen_id' if is_zendesk_user else 'git_id'
+
+    def get_sort_key(row):
+        value = row.get(field)
+        if isinstance(value, basestring):
+            return value.lower()
+        return value
+
+    return sorted(rows, key=get_sort_key, reverse=descending)
+
+def format_display_row(table, row, is_zendesk_user):
+    """Formats the cells of an enhancement table row as they are displayed in
+    the table on the home page.
+
+    Parameters:
+        table - The name of the enhancement table the row is from.
+        row - The display-ready enhancement table row to format.
+        is_zendesk_user - True if the user the row is displayed to has the
+                            Zendesk view type.
+
+    Returns a list of the HTML of the row's cells, in the order of the table's
+    columns.
+    """
+    zen_link = u'<a class="open" target="_blank" href="%s">Z%s</a>' % \
+            (escape(row['zen_url']), row['zen_id'])
+    zen_datetime = u'%s<br/>%s' % (row['zen_date'], row['zen_time'])
+    cells = [zen_link, escape(row['zen_subject']),
+             escape(row['zen_requester']), zen_datetime]
+
+    if table in ('need_attention', 'tracking'):
+        git_class = 'closed' if table == 'need_attention' else 'open'
+        git_link = u'<a class="%s" target="_blank" href="%s">G%s</a>' % \
+                (git_class, escape(row['git_url']), row['git_id'])
+        if is_zendesk_user:
+            cells[0] = u'%s<br/>%s' % (zen_link, git_link)
+        else:
+            cells[0] = u'%s<br/>%s' % (git_link, zen_link)
+        cells.append(u'%s<br/>%s' % (row['git_date'], row['git_time']))
+    elif table == 'not_git_enhancements':
+        cells.append(escape(row['non_git_association']))
+
+    return cells
@@ -0,0 +1,593 @@
+import json
+from base64 import b64decode, b64encode
+from hashlib import md5
+from time import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from gitzen.enhancement_tracking.cache_codec import (
+    SCHEMA_VERSION,
+    CacheSchemaError,
+    decode_shard,
+    encode_shard
+)
+from gitzen.enhancement_tracking.models import EnhancementSnapshot
+
+# Constant cache key of the manifest of a group's cache data. The manifest
+# holds the group's small values and the keys of the shards that hold the rest.
+# The key includes the schema version of the cache data, so processes running
+# different versions of the application during a deploy keep their own copies
+# of the data instead of overwriting each other's. It requires the ID of the
+# group's API access model for the string's formatting.
+MANIFEST_KEY = 'group_data:%(schema_version)i:%%(api_access_id)i' % \
+               {'schema_version': SCHEMA_VERSION}
+
+# Constant cache key of a single shard of a group's cache data. Shard keys
+# include the digest of the shard's contents, so a shard is never changed in
+# place and a manifest always refers to a consistent set of shards. It requires
+# the ID of the group's API access model, the name of the sharded value, the
+# index of the shard and the digest of its contents for the string's
+# formatting.
+SHARD_KEY = MANIFEST_KEY + ':%(name)s:%(index)i:%(digest)s'
+
+# Constant cache key of the changelog of a group's cache data, which holds the
+# enhancements that changed in each of the group's last CHANGELOG_LENGTH data
+# versions. It requires the ID of the group's API access model for the
+# string's formatting.
+CHANGELOG_KEY = MANIFEST_KEY + ':changes'
+
+# The number of data versions whose changes are kept in a group's changelog.
+CHANGELOG_LENGTH = 100
+
+# The dictionaries of the cache data that are split into shards. Every other
+# value of the cache data is kept in the manifest.
+SHARDED_VALUES = ('enhancements', 'git_tickets', 'zen_user_reference')
+
+# The values of the cache data that are derived from the sharded values when
+# the cache data is loaded instead of being stored.
+DERIVED_VALUES = ('git_index',)
+
+# The values of the manifest that describe how the cache data is stored rather
+# than being part of the cache data. The table_counts hold the number of
+# enhancements in each table so that they can be displayed without loading the
+# enhancements.
+MANIFEST_VALUES = ('shards', 'shard_times', 'table_counts')
+
+# The largest number of entries that are kept in a single shard. A dictionary
+# is split into a power of two number of shards so that none of them holds
+# more entries than this on average, which keeps every shard well under the
+# item size limit of memcached.
+ENTRIES_PER_SHARD = 1000
+
+# The fraction of settings.CACHE_DATA_TIMEOUT after which a shard that has not
+# changed is written to the cache again when its cache data is stored, so that
+# shards that never change do not expire while their manifest is still used.
+SHARD_REWRITE_AGE = 0.5
+
+# The number of times the shards of a group's cache data are read again when
+# the manifest is replaced by another process while they are being read.
+LOAD_RETRIES = 1
+
+def load_cache_manifest(api_access_data):
+    """Loads the manifest of the cache data for the passed API access model.
+
+    Parameters:
+        api_access_data - The API access model whose cache manifest is loaded.
+
+    Returns the manifest dictionary, which holds every value of the cache data
+    other than the sharded ones (i.e. 'last_updated'), or None if there is no
+    cache data for the model with the current SCHEMA_VERSION.
+    """
+    return cache.get(MANIFEST_KEY % {'api_access_id': api_access_data.id})
+
+def get_enhancements_version(manifest):
+    """Gets the version of the enhancements of the cache data described by the
+    passed manifest.
+
+    Parameters:
+        manifest - The manifest of a group's cache data.
+
+    The version is derived from the digests of the enhancement shards, so it
+    changes whenever any enhancement changes and is the same in every process
+    for the same enhancements, even after the cache data was restored from a
+    snapshot.
+
+    Returns the version as a string.
+    """
+    enhancement_digests = sorted(
+        (index, digest) for (name, index), digest in manifest['shards'].items()
+        if name == 'enhancements'
+    )
+
+    return md5(repr(enhancement_digests)).hexdigest()
+
+def load_cache_data(api_access_data):
+    """Loads the cache data for the passed API access model from its manifest
+    and shards. All of the shards are read with a single get_many. If the cache
+    data is not in the cache, it is restored from the model's enhancement
+    snapshot in the database instead (see save_cache_data).
+
+    Parameters:
+        api_access_data - The API access model whose cache data is loaded.
+
+    Returns the dictionary of cache data, or None if there is neither cache
+    data nor a snapshot for the model with the current SCHEMA_VERSION. In that
+    case, the cache data should be built again.
+    """
+    cache_data = _load_cached_data(api_access_data)
+    if cache_data is None:
+        cache_data = _load_snapshot(api_access_data)
+
+    return cache_data
+
+def _load_cached_data(api_access_data):
+    """Loads the cache data for the passed API access model from the cache.
+
+    Parameters:
+        api_access_data - The API access model whose cache data is loaded.
+
+    Returns the dictionary of cache data, or None if there is no cache data for
+    the model with the current SCHEMA_VERSION or any of its shards has been
+    evicted from the cache.
+    """
+    for attempt in xrange(LOAD_RETRIES + 1):
+        manifest = load_cache_manifest(api_access_data)
+        if manifest is None:
+            return None
+
+        shard_keys = _get_shard_keys(api_access_data, manifest)
+        cached_shards = cache.get_many(shard_keys.values())
+        if len(cached_shards) == len(shard_keys):
+            break
+    else:
+        return None
+
+    encoded_shards = {}
+    for shard_name, shard_key in shard_keys.items():
+        encoded_shards[shard_name] = cached_shards[shard_key]
+
+    return _decode_cache_data(manifest, encoded_shards)
+
+def _decode_cache_data(manifest, encoded_shards):
+    """Decodes cache data from its manifest and encoded shards.
+
+    Parameters:
+        manifest - A dictionary of the values of the cache data that are not
+                    sharded.
+        encoded_shards - A dictionary of the encoded shards of the cache data
+                            with tuples of the name of the sharded value and the
+                            shard's index as keys.
+
+    Returns the dictionary of cache data, or None if any of the shards was
+    encoded with another schema version.
+    """
+    cache_data = dict((key, value) for key, value in manifest.items()
+                      if key not in MANIFEST_VALUES)
+    for name in SHARDED_VALUES:
+        cache_data[name] = {}
+    try:
+        for (name, index), encoded_shard in encoded_shards.items():
+            cache_data[name].update(decode_shard(name, encoded_shard))
+    except CacheSchemaError:
+        return None
+
+    # Rebuild the index of the enhancements associated with each GitHub ticket.
+    git_index = {}
+    for zen_id, enhancement in cache_data['enhancements'].iteritems():
+        if 'git_id' in enhancement:
+            git_index.setdefault(enhancement['git_id'], set()).add(zen_id)
+    cache_data['git_index'] = git_index
+
+    return cache_data
+
+def save_cache_data(api_access_data, cache_data):
+    """Saves the passed cache data for the passed API access model to the cache
+    as a manifest and a set of shards, and to the model's enhancement snapshot
+    in the database.
+
+    Parameters:
+        api_access_data - The API access model whose cache data is saved.
+        cache_data - The dictionary of cache data to save. The process saving
+                        it should hold the model's sync lock.
+    """
+    manifest, encoded_shards = _store_cache_data(api_access_data, cache_data)
+    _save_snapshot(api_access_data, manifest, encoded_shards)
+
+def _store_cache_data(api_access_data, cache_data):
+    """Stores the passed cache data for the passed API access model in the
+    cache as a manifest and a set of shards. Only the shards whose contents
+    have changed since the cache data was last stored are written.
+
+    Parameters:
+        api_access_data - The API access model whose cache data is stored.
+        cache_data - The dictionary of cache data to store.
+
+    If any enhancement has changed, the data version of the cache data is
+    increased and the changed enhancements are recorded in the model's
+    changelog under the new version (see load_changes).
+
+    The manifest records the time each shard was last written. Unchanged
+    shards are written again once they are older than SHARD_REWRITE_AGE of
+    settings.CACHE_DATA_TIMEOUT, so they do not expire before the manifest.
+
+    The manifest is written after the changed shards, so processes loading the
+    cache data at the same time see either all of the old data or all of the
+    new data. Shards that are no longer referred to are then deleted.
+
+    Returns a tuple of the stored manifest and a dictionary of every encoded
+    shard of the cache data with tuples of the name of the sharded value and
+    the shard's index as keys.
+    """
+    previous_manifest = load_cache_manifest(api_access_data)
+    if previous_manifest is not None:
+        previous_shards = previous_manifest['shards']
+        previous_shard_times = previous_manifest.get('shard_times', {})
+        data_version = previous_manifest.get('data_version', 0)
+    else:
+        previous_shards = {}
+        previous_shard_times = {}
+        data_version = _get_snapshot_data_version(api_access_data)
+    now = time()
+    rewrite_before = now - settings.CACHE_DATA_TIMEOUT * SHARD_REWRITE_AGE
+
+    manifest = dict((key, value) for key, value in cache_data.items()
+                    if key not in SHARDED_VALUES and key not in DERIVED_VALUES)
+    manifest['shards'] = {}
+    manifest['shard_times'] = {}
+    manifest['table_counts'] = _get_table_counts(cache_data['enhancements'])
+    encoded_shards = {}
+    changed_shards = {} # Encoded shards to write with their keys as keys.
+    changed_enhancements = [] # Items of the changed enhancement shards.
+
+    for name in SHARDED_VALUES:
+        for index, shard in enumerate(_split_shards(cache_data[name])):
+            encoded_shard = encode_shard(name, shard)
+            digest = md5(encoded_shard).hexdigest()
+            manifest['shards'][(name, index)] = digest
+            encoded_shards[(name, index)] = encoded_shard
+            shard_key = SHARD_KEY % {'api_access_id': api_access_data.id,
+                                     'name': name,
+                                     'index': index,
+                                     'digest': digest}
+
+            if previous_shards.get((name, index)) != digest:
+                changed_shards[shard_key] = encoded_shard
+                manifest['shard_times'][(name, index)] = now
+                if name == 'enhancements':
+                    changed_enhancements.extend(shard)
+            elif previous_shard_times.get((name, index), 0) < rewrite_before:
+                changed_shards[shard_key] = encoded_shard
+                manifest['shard_times'][(name, index)] = now
+            else:
+                manifest['shard_times'][(name, index)] = \
+                        previous_shard_times[(name, index)]
+
+    # Find the shards that were replaced or are no longer needed.
+    stale_shard_keys = {}
+    for (name, index), digest in previous_shards.items():
+        if manifest['shards'].get((name, index)) != digest:
+            stale_shard_keys[(name, index)] = \
+                    SHARD_KEY % {'api_access_id': api_access_data.id,
+                                 'name': name,
+                                 'index': index,
+                                 'digest': digest}
+
+    # Compare the changed enhancement shards to the ones they replace to find
+    # the enhancements that changed.
+    if previous_manifest is None or \
+       get_enhancements_version(previous_manifest) != \
+       get_enhancements_version(manifest):
+        data_version += 1
+        changes = None
+        if previous_manifest is not None:
+            changes = _get_enhancement_changes(
+                [shard_key for (name, index), shard_key
+                 in stale_shard_keys.items() if name == 'enhancements'],
+                changed_enhancements
+            )
+        _record_changes(api_access_data, data_version, changes)
+    manifest['data_version'] = data_version
+    cache_data['data_version'] = data_version
+
+    if changed_shards:
+        cache.set_many(changed_shards, settings.CACHE_DATA_TIMEOUT)
+    cache.set(MANIFEST_KEY % {'api_access_id': api_access_data.id}, manifest,
+              settings.CACHE_DATA_TIMEOUT)
+    if stale_shard_keys:
+        cache.delete_many(stale_shard_keys.values())
+
+    return (manifest, encoded_shards)
+
+def _get_enhancement_changes(previous_shard_keys, enhancement_items):
+    """Gets the enhancements that changed between the passed enhancement
+    shards that were replaced and the items of the shards that replaced them.
+
+    Parameters:
+        previous_shard_keys - The list of the cache keys of the enhancement
+                                shards that were replaced.
+        enhancement_items - The list of the (zen_id, enhancement) items of the
+                            enhancement shards that replaced them.
+
+    Returns a list of (zen_id, previous_table, table) tuples for the
+    enhancements that were added, changed or removed, where a table is None
+    when the enhancement was not displayed in any table. Returns None if any of
+    the replaced shards has been evicted from the cache, in which case the
+    changes cannot be known.
+    """
+    previous_shards = cache.get_many(previous_shard_keys)
+    if len(previous_shards) != len(previous_shard_keys):
+        return None
+
+    previous_enhancements = {}
+    try:
+        for encoded_shard in previous_shards.values():
+            previous_enhancements.update(
+                decode_shard('enhancements', encoded_shard)
+            )
+    except CacheSchemaError:
+        return None
+
+    changes = []
+    for zen_id, enhancement in enhancement_items:
+        previous_enhancement = previous_enhancements.pop(zen_id, None)
+        if previous_enhancement != enhancement:
+            previous_table = previous_enhancement and \
+                             previous_enhancement['table']
+            changes.append((zen_id, previous_table, enhancement['table']))
+    for zen_id, previous_enhancement in previous_enhancements.items():
+        changes.append((zen_id, previous_enhancement['table'], None))
+
+    # Enhancements that were not displayed before or after the change are of
+    # no interest to anyone.
+    return [change for change in changes
+            if change[1] is not None or change[2] is not None]
+
+def _record_changes(api_access_data, data_version, changes):
+    """Records the passed enhancement changes in the changelog of the passed
+    API access model under the passed data version. Only the changes of the
+    last CHANGELOG_LENGTH versions are kept.
+
+    Parameters:
+        api_access_data - The API access model whose changes are recorded.
+        data_version - The data version the changes resulted in.
+        changes - The list of (zen_id, previous_table, table) tuples of the
+                    changed enhancements, or None if the changes are not known.
+                    In that case, the changelog is started over from
+                    data_version.
+    """
+    changelog_key = CHANGELOG_KEY % {'api_access_id': api_access_data.id}
+    changelog = cache.get(changelog_key)
+    if changes is None or changelog is None or \
+       changelog['versions'][-1][0] != data_version - 1:
+        changelog = {'versions': [(data_version, [])]}
+    else:
+        changelog['versions'].append((data_version, changes))
+        del changelog['versions'][:-CHANGELOG_LENGTH]
+
+    cache.set(changelog_key, changelog, settings.CACHE_DATA_TIMEOUT)
+
+def load_changes(api_access_data, since_version, data_version):
+    """Loads the enhancements of the passed API access model that changed
+    after the passed data version from the model's changelog.
+
+    Parameters:
+        api_access_data - The API access model whose changes are loaded.
+        since_version - The data version to get the changes since.
+        data_version - The current data version of the model's cache data.
+
+    Returns a dictionary of (previous_table, table) tuples with the Zendesk IDs
+    of the changed enhancements as keys, where previous_table is the table the
+    enhancement was in at since_version and table is the one it is in at
+    data_version. Either table is None when the enhancement was not displayed
+    in any table. Returns None if the changelog does not reach back to
+    since_version, in which case all of the enhancements should be fetched
+    again.
+    """
+    changelog = cache.get(CHANGELOG_KEY % {'api_access_id': api_access_data.id})
+    if changelog is None or since_version > data_version or \
+       changelog['versions'][-1][0] != data_version or \
+       since_version < changelog['versions'][0][0]:
+        return None
+
+    changes = {}
+    for version, version_changes in changelog['versions']:
+        if version <= since_version:
+            continue
+        for zen_id, previous_table, table in version_changes:
+            if zen_id in changes:
+                previous_table = changes[zen_id][0]
+            changes[zen_id] = (previous_table, table)
+
+    return changes
+
+def _get_snapshot_data_version(api_access_data):
+    """Gets the data version of the enhancement snapshot of the passed API
+    access model, with any schema version, so that data versions keep
+    increasing after the model's cache data is lost.
+
+    Parameters:
+        api_access_data - The API access model whose snapshot is read.
+
+    Returns the data version, or 0 if the model has no snapshot.
+    """
+    data_versions = EnhancementSnapshot.objects.filter(
+        api_access_data=api_access_data
+    ).values_list('data_version', flat=True)
+
+    return data_versions[0] if data_versions else 0
+
+def _save_snapshot(api_access_data, manifest, encoded_shards):
+    """Saves the encoded shards of the cache data for the passed API access
+    model to the model's enhancement snapshot in the database, along with the
+    values of its manifest that are needed to sync it again.
+
+    Parameters:
+        api_access_data - The API access model whose snapshot is saved.
+        manifest - The manifest the cache data was stored with.
+        encoded_shards - A dictionary of every encoded shard of the cache data
+                            with tuples of the name of the sharded value and the
+                            shard's index as keys.
+
+    The shards are only written when they have changed since the snapshot was
+    last saved. Otherwise, only the sync watermarks of the snapshot are
+    updated. The snapshot outlives upgrades of the Python interpreter, so the
+    shards are stored as JSON rather than marshalled (see _load_snapshot).
+    """
+    digest = md5(repr(sorted(manifest['shards'].items()))).hexdigest()
+    snapshot_fields = {
+        'schema_version': SCHEMA_VERSION,
+        'last_updated': manifest['last_updated'],
+        'zen_watermark': manifest.get('zen_watermark'),
+        'git_event_id': manifest.get('git_event_id'),
+        'git_events_etag': manifest.get('git_events_etag'),
+        'data_version': manifest['data_version'],
+    }
+    snapshots = EnhancementSnapshot.objects.filter(
+        api_access_data=api_access_data
+    )
+
+    if snapshots.filter(schema_version=SCHEMA_VERSION,
+                        digest=digest).update(**snapshot_fields):
+        return
+
+    # The shards are stored as a JSON list of [name, index, encoded_shard]
+    # lists, with each encoded shard base64 encoded so that it is valid text.
+    snapshot_fields['data'] = json.dumps(
+        [[name, index, b64encode(encoded_shard)]
+         for (name, index), encoded_shard in sorted(encoded_shards.items())]
+    )
+    snapshot_fields['digest'] = digest
+    if not snapshots.update(**snapshot_fields):
+        EnhancementSnapshot.objects.create(api_access_data=api_access_data,
+                                           **snapshot_fields)
+
+def _load_snapshot(api_access_data):
+    """Restores the cache data for the passed API access model from the model's
+    enhancement snapshot in the database, and stores it in the cache again so
+    that the next load is read from the cache.
+
+    Parameters:
+        api_access_data - The API access model whose cache data is restored.
+
+    Returns the dictionary of cache data, or None if the model has no snapshot
+    with the current SCHEMA_VERSION. None is also returned if the snapshot
+    cannot be decoded, such as when its shards were marshalled by another
+    version of Python, so that the cache data is built again in full. The
+    snapshot's digest is then cleared, so that the next save_cache_data
+    replaces its data even if the rebuilt shards are unchanged.
+    """
+    try:
+        snapshot = EnhancementSnapshot.objects.get(
+            api_access_data=api_access_data, schema_version=SCHEMA_VERSION
+        )
+    except EnhancementSnapshot.DoesNotExist:
+        return None
+
+    now = time()
+    manifest = {'last_updated': snapshot.last_updated,
+                'zen_watermark': snapshot.zen_watermark,
+                'git_event_id': snapshot.git_event_id,
+                'git_events_etag': snapshot.git_events_etag,
+                'data_version': snapshot.data_version,
+                'shards': {},
+                'shard_times': {}}
+    encoded_shards = {}
+    shards_to_cache = {} # Encoded shards to write with their keys as keys.
+    try:
+        snapshot_shards = [(str(name), index, b64decode(encoded_shard))
+                           for name, index, encoded_shard
+                           in json.loads(snapshot.data)]
+    except (ValueError, TypeError):
+        snapshot_shards = None
+    for name, index, encoded_shard in snapshot_shards or []:
+        digest = md5(encoded_shard).hexdigest()
+        manifest['shards'][(name, index)] = digest
+        manifest['shard_times'][(name, index)] = now
+        encoded_shards[(name, index)] = encoded_shard
+        shard_key = SHARD_KEY % {'api_access_id': api_access_data.id,
+                                 'name': name,
+                                 'index': index,
+                                 'digest': digest}
+        shards_to_cache[shard_key] = encoded_shard
+
+    cache_data = None
+    if snapshot_shards is not None:
+        cache_data = _decode_cache_data(manifest, encoded_shards)
+    if cache_data is None:
+        EnhancementSnapshot.objects.filter(id=snapshot.id).update(digest='')
+        return None
+    manifest['table_counts'] = _get_table_counts(cache_data['enhancements'])
+
+    # The manifest is only added if no other process has stored newer cache
+    # data since this one found the cache empty. A manifest whose shards have
+    # been evicted can never be loaded again, so it is replaced.
+    cache.set_many(shards_to_cache, settings.CACHE_DATA_TIMEOUT)
+    manifest_key = MANIFEST_KEY % {'api_access_id': api_access_data.id}
+    if not cache.add(manifest_key, manifest, settings.CACHE_DATA_TIMEOUT):
+        cached_manifest = cache.get(manifest_key)
+        if cached_manifest is not None and \
+           cached_manifest['shards'] != manifest['shards']:
+            shard_keys = _get_shard_keys(api_access_data, cached_manifest)
+            if len(cache.get_many(shard_keys.values())) < len(shard_keys):
+                cache.set(manifest_key, manifest, settings.CACHE_DATA_TIMEOUT)
+
+    return cache_data
+
+def _get_table_counts(enhancements):
+    """Counts the enhancements in each of the enhancement tables.
+
+    Parameters:
+        enhancements - The dictionary of the enhancements of the cache data.
+
+    Returns a dictionary of the numbers of enhancements with the names of the
+    tables they are in as keys. Tables with no enhancements are left out.
+    """
+    table_counts = {}
+    for enhancement in enhancements.itervalues():
+        if enhancement['table'] is not None:
+            table_counts[enhancement['table']] = \
+                    table_counts.get(enhancement['table'], 0) + 1
+
+    return table_counts
+
+def _get_shard_keys(api_access_data, manifest):
+    """Gets the cache keys of the shards listed in the passed manifest.
+
+    Parameters:
+        api_access_data - The API access model the manifest belongs to.
+        manifest - The manifest of the model's cache data.
+
+    Returns a dictionary of the shard keys with tuples of the name of the
+    sharded value and the shard's index as keys.
+    """
+    shard_keys = {}
+    for (name, index), digest in manifest['shards'].items():
+        shard_keys[(name, index)] = SHARD_KEY % \
+                {'api_access_id': api_access_data.id,
+                 'name': name,
+                 'index': index,
+                 'digest': digest}
+
+    return shard_keys
+
+def _split_shards(dictionary):
+    """Splits the passed dictionary into shards by the hashes of its keys.
+
+    Parameters:
+        dictionary - The dictionary to split.
+
+    Returns a list of lists of the dictionary's items, sorted by key so that
+    unchanged shards are encoded the same way every time.
+    """
+    shard_count = 1
+    while len(dictionary) > shard_count * ENTRIES_PER_SHARD:
+        shard_count *= 2
+
+    shards = [[] for index in xrange(shard_count)]
+    for key, value in dictionary.iteritems():
+        shards[hash(key) % shard_count].append((key, value))
+    for shard in shards:
+        shard.sort()
+
+    return shards
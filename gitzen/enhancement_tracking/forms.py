@@ -56,10 +56,11 @@ class NewGroupSuperuserForm(UserCreationForm):
 
 class NewAPIAccessDataForm(ModelForm):
     """Form for creating a set of access data for the GitHub and Zendesk
-    APIs."""
+    APIs. The Zendesk webhook signing secret is left out since the webhook can
+    only be created once the group exists."""
     class Meta:
         model = APIAccessData
-        exclude = ('git_token',)
+        exclude = ('git_token', 'zen_webhook_secret')
         widgets = {
             'zen_token': PasswordInput()
         }
@@ -0,0 +1,191 @@
+import cPickle as pickle
+from optparse import make_option
+from random import Random
+from time import time
+
+from django.core.management.base import BaseCommand
+
+from gitzen.enhancement_tracking.cache_actions import (
+    build_enhancement_data,
+    get_association_git_id,
+    get_id_lists,
+    project_git_ticket
+)
+from gitzen.enhancement_tracking.cache_codec import decode_shard, encode_shard
+from gitzen.enhancement_tracking.cache_storage import SHARDED_VALUES
+
+# The group sizes, in open Zendesk tickets, that are measured by default.
+DEFAULT_SIZES = '1000,5000,10000,50000'
+
+class Command(BaseCommand):
+    """Management command that measures how building a group's cached
+    enhancement data scales with the size of the group, using generated
+    Zendesk and GitHub data so that no API requests are made.
+    """
+    help = 'Measures how building the cached enhancement data scales with ' \
+           'the number of Zendesk tickets.'
+    option_list = BaseCommand.option_list + (
+        make_option('--sizes', dest='sizes', default=DEFAULT_SIZES,
+                    help='Comma separated numbers of Zendesk tickets to '
+                         'measure.'),
+    )
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+
+        for size in sizes:
+            zen_tickets, zen_user_reference, raw_git_tickets = \
+                    make_group_data(size)
+            git_tickets = dict(
+                (number, project_git_ticket(ticket))
+                for number, ticket in raw_git_tickets.items()
+            )
+
+            started = time()
+            get_id_lists(zen_tickets)
+            enhancement_data = build_enhancement_data(zen_tickets,
+                                                      zen_user_reference,
+                                                      git_tickets)
+            elapsed = time() - started
+
+            self.stdout.write('%6i tickets: build %.3fs (%.1f us per ticket)\n'
+                              % (size, elapsed, elapsed * 1000000 / size))
+
+            # Compare the size of the cache data with the compact GitHub
+            # records to its size with the full records from the GitHub API.
+            cache_data = dict(enhancement_data,
+                              zen_user_reference=zen_user_reference,
+                              git_tickets=git_tickets)
+            compact_size = len(pickle.dumps(cache_data,
+                                            pickle.HIGHEST_PROTOCOL))
+            cache_data['git_tickets'] = raw_git_tickets
+            raw_size = len(pickle.dumps(cache_data, pickle.HIGHEST_PROTOCOL))
+            self.stdout.write('%6i tickets: pickled %i bytes (%i bytes with '
+                              'full GitHub records)\n'
+                              % (size, compact_size, raw_size))
+
+            # Compare the cache codec to pickling the same values.
+            cache_data['git_tickets'] = git_tickets
+            shards = [(name, sorted(cache_data[name].items()))
+                      for name in SHARDED_VALUES]
+
+            started = time()
+            pickled_shards = [pickle.dumps(shard, pickle.HIGHEST_PROTOCOL)
+                              for name, shard in shards]
+            pickle_encode_time = time() - started
+            started = time()
+            for pickled_shard in pickled_shards:
+                pickle.loads(pickled_shard)
+            pickle_decode_time = time() - started
+
+            started = time()
+            encoded_shards = [(name, encode_shard(name, shard))
+                              for name, shard in shards]
+            codec_encode_time = time() - started
+            started = time()
+            for name, encoded_shard in encoded_shards:
+                decode_shard(name, encoded_shard)
+            codec_decode_time = time() - started
+
+            self.stdout.write(
+                '%6i tickets: pickle %i bytes, encode %.3fs, decode %.3fs\n'
+                % (size, sum([len(shard) for shard in pickled_shards]),
+                   pickle_encode_time, pickle_decode_time)
+            )
+            self.stdout.write(
+                '%6i tickets: codec  %i bytes, encode %.3fs, decode %.3fs\n'
+                % (size, sum([len(shard) for name, shard in encoded_shards]),
+                   codec_encode_time, codec_decode_time)
+            )
+
+def make_group_data(size, seed=0):
+    """Generates the Zendesk and GitHub data of a group with the passed number
+    of open Zendesk tickets.
+
+    Parameters:
+        size - The number of open Zendesk tickets in the group.
+        seed - The seed of the generated data, so that every run measures the
+                same data.
+
+    Returns a tuple of the list of projected Zendesk tickets, the Zendesk user
+    reference and the dictionary of full GitHub ticket records, in the form
+    returned by the GitHub API, with their issue numbers as keys.
+    """
+    random = Random(seed)
+    zen_tickets = []
+    zen_user_reference = {}
+    git_tickets = {}
+
+    for zen_id in xrange(1, size + 1):
+        requester_id = random.randint(1, max(size / 10, 1))
+        zen_user_reference[requester_id] = 'User %i' % requester_id
+
+        # Most tickets are associated with a GitHub issue, and some issues are
+        # associated with several tickets.
+        kind = random.random()
+        if kind < 0.1:
+            association = None
+        elif kind < 0.2:
+            association = 'jira-%i' % zen_id
+        else:
+            association = 'gh-%i' % random.randint(1, max(size / 2, 1))
+
+        zen_ticket = {
+            'id': zen_id,
+            'subject': 'Enhancement request %i' % zen_id,
+            'requester_id': requester_id,
+            'url': 'https://example.zendesk.com/api/v2/tickets/%i.json' %
+                    zen_id,
+            'updated_at': '2012-07-%02iT12:00:00Z' % random.randint(1, 31),
+            'status': 'open',
+            'association': association,
+            'git_id': get_association_git_id(association),
+        }
+        zen_tickets.append(zen_ticket)
+
+        git_id = zen_ticket['git_id']
+        if git_id is not None and git_id not in git_tickets:
+            git_tickets[git_id] = make_git_ticket(git_id, random)
+
+    return (zen_tickets, zen_user_reference, git_tickets)
+
+def make_git_ticket(number, random):
+    """Generates a full GitHub ticket record in the form returned by the GitHub
+    API.
+
+    Parameters:
+        number - The issue number of the ticket.
+        random - The random number generator the ticket is generated with.
+
+    Returns a dictionary of the ticket's data.
+    """
+    api_url = 'https://api.github.com/repos/example/example'
+    user = {
+        'login': 'developer',
+        'id': 1,
+        'avatar_url': 'https://secure.gravatar.com/avatar/0',
+        'gravatar_id': '0',
+        'url': 'https://api.github.com/users/developer',
+    }
+
+    return {
+        'number': number,
+        'state': random.choice(('open', 'open', 'closed')),
+        'title': 'Enhancement %i' % number,
+        'body': 'Details of the requested enhancement. ' * 10,
+        'user': user,
+        'assignee': user,
+        'labels': [{'url': '%s/labels/enhancement' % api_url,
+                    'name': 'enhancement',
+                    'color': '84b6eb'}],
+        'milestone': None,
+        'comments': random.randint(0, 20),
+        'pull_request': {'html_url': None, 'diff_url': None,
+                         'patch_url': None},
+        'closed_at': None,
+        'created_at': '2012-06-01T12:00:00Z',
+        'updated_at': '2012-07-%02iT12:00:00Z' % random.randint(1, 31),
+        'url': '%s/issues/%i' % (api_url, number),
+        'html_url': 'https://github.com/example/example/issues/%i' % number,
+        'id': 100000 + number,
+    }
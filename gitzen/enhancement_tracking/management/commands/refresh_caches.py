@@ -0,0 +1,84 @@
+from optparse import make_option
+from time import sleep
+from traceback import format_exc
+
+from gevent.pool import Pool
+from requests.exceptions import RequestException
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from gitzen.enhancement_tracking.api_requests import PRIORITY_LOW
+from gitzen.enhancement_tracking.cache_actions import (
+    is_cache_stale,
+    update_cache_index
+)
+from gitzen.enhancement_tracking.cache_storage import load_cache_manifest
+from gitzen.enhancement_tracking.models import APIAccessData
+
+class Command(BaseCommand):
+    """Management command that keeps the cached enhancement data of every group
+    fresh so that the home page never has to wait on the Zendesk and GitHub
+    APIs. Every settings.CACHE_REFRESH_INTERVAL seconds, each group's cache
+    that is older than the interval is updated with low priority API requests.
+    Up to settings.CACHE_REFRESH_CONCURRENCY groups are updated at once, and a
+    group whose last update is still running is skipped until it finishes.
+    """
+    help = 'Keeps the cached enhancement data of every group up to date.'
+    option_list = BaseCommand.option_list + (
+        make_option('--once', action='store_true', dest='once', default=False,
+                    help='Refresh the caches once instead of continuously.'),
+        make_option('--interval', type='int', dest='interval',
+                    default=settings.CACHE_REFRESH_INTERVAL,
+                    help='Number of seconds between refreshes.'),
+    )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        # Pool that bounds the number of groups that are updated at once.
+        pool = Pool(settings.CACHE_REFRESH_CONCURRENCY)
+        refreshes = {} # Greenlets of the running updates with the IDs of the
+                       # groups' API access models as keys.
+
+        while True:
+            for api_access_data in APIAccessData.objects.all():
+                # Groups that have not finished authorizing GitZen on GitHub
+                # have nothing that can be refreshed yet.
+                if not api_access_data.git_token:
+                    continue
+
+                refresh = refreshes.get(api_access_data.id)
+                if refresh is not None and not refresh.ready():
+                    continue
+
+                # Only the manifest is needed to tell when the cache data was
+                # last updated.
+                manifest = load_cache_manifest(api_access_data)
+                if manifest is not None and \
+                not is_cache_stale(manifest, interval):
+                    continue
+
+                refreshes[api_access_data.id] = \
+                        pool.spawn(self.refresh_group, api_access_data)
+
+            if options['once']:
+                pool.join()
+                break
+            sleep(interval)
+
+    def refresh_group(self, api_access_data):
+        """Updates the cached enhancement data of a single group. Any error is
+        written to stderr instead of being raised, so that it does not stop the
+        updates of the other groups.
+
+        Parameters:
+            api_access_data - The API access model of the group to update.
+        """
+        try:
+            update_cache_index(api_access_data, PRIORITY_LOW)
+        except RequestException as e:
+            self.stderr.write('Could not refresh the cache for %s: %s\n' %
+                              (api_access_data.product_name, e.args[0]))
+        except Exception:
+            self.stderr.write('Error while refreshing the cache for %s:\n%s' %
+                              (api_access_data.product_name, format_exc()))
@@ -38,3 +38,24 @@ class APIAccessData(models.Model):
     zen_fieldid = models.IntegerField(null=True,
                                       verbose_name='Zendesk Ticket ' \
                                       'Association Field ID')
+    zen_webhook_secret = EncryptedCharField(max_length=100, blank=True,
+                                            verbose_name='Zendesk Webhook ' \
+                                            'Signing Secret')
+
+class EnhancementSnapshot(models.Model):
+    """The most recently synced enhancement data of a group, kept in the
+    database so that the group's cache data can be restored without syncing
+    it again from the Zendesk and GitHub APIs.
+    """
+    api_access_data = models.ForeignKey('APIAccessData', unique=True)
+    schema_version = models.IntegerField()
+    data = models.TextField()
+    digest = models.CharField(max_length=32)
+    last_updated = models.DateTimeField()
+    zen_watermark = models.IntegerField(null=True)
+    git_event_id = models.BigIntegerField(null=True)
+    git_events_etag = models.CharField(max_length=100, null=True)
+    data_version = models.IntegerField(default=0)
+
+    def __str__(self):
+        return "%s's enhancement snapshot" % self.api_access_data.product_name
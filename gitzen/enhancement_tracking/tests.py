@@ -5,8 +5,63 @@ when you run "manage.py test".
 Replace this with more appropriate tests for your application.
 """
 
+import hmac
+import json
+import re
+import threading
+from base64 import b64encode
+from datetime import datetime
+from hashlib import sha256
+from time import time
+from urlparse import parse_qs
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+import gevent
+from requests.exceptions import HTTPError
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
 from django.test import TestCase
 
+from gitzen.enhancement_tracking import (
+    api_requests,
+    cache_actions,
+    cache_storage,
+    views
+)
+from gitzen.enhancement_tracking.api_requests import (
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    PRIORITY_NORMAL,
+    RateLimitDeferred,
+    RateLimitError,
+    RequestBudget
+)
+from gitzen.enhancement_tracking.cache_display import get_rendered_tables
+from gitzen.enhancement_tracking.cache_actions import (
+    build_enhancement_data,
+    get_enhancement_tables,
+    get_git_tickets,
+    project_zen_ticket
+)
+from gitzen.enhancement_tracking.cache_codec import (
+    CacheSchemaError,
+    GitIssue,
+    decode_shard,
+    encode_shard
+)
+from gitzen.enhancement_tracking.models import (
+    APIAccessData,
+    EnhancementSnapshot,
+    UserProfile
+)
+from gitzen.enhancement_tracking.views import (
+    _get_git_webhook_secret,
+    _get_table_changes
+)
+
 
 class SimpleTest(TestCase):
     def test_basic_addition(self):
@@ -14,3 +69,1145 @@ class SimpleTest(TestCase):
         Tests that 1 + 1 always equals 2.
         """
         self.assertEqual(1 + 1, 2)
+
+
+class GitHubStandInHandler(BaseHTTPRequestHandler):
+    """Request handler of a local stand-in for the GitHub GraphQL and REST APIs
+    that serves ISSUES and records the requests made to it. The issue numbers
+    in PULL_REQUESTS cannot be resolved by the GraphQL API, like pull requests
+    on GitHub. Single issues are served with an ETag, and are not modified for
+    requests that send it back. The repository's issue list is served from
+    ISSUE_UPDATES in pages of LIST_PAGE_SIZE issues, and the issues in
+    updates_after_first_page are updated right after its first page is served.
+    """
+    ISSUES = {1: 'open', 2: 'closed', 3: 'open', 4: 'open'}
+    PULL_REQUESTS = (4,)
+    LIST_PAGE_SIZE = 2
+    graphql_status = 200
+    issue_updates = {}
+    updates_after_first_page = {}
+    requests = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.requests.append(('POST', self.path))
+        if self.graphql_status != 200:
+            self.send_json(self.graphql_status, {'message': 'Unavailable'},
+                           {'Retry-After': '3600'})
+            return
+
+        query = json.loads(body)['query']
+        repository = {}
+        for number in re.findall(r'issue(\d+):', query):
+            number = int(number)
+            if number in self.PULL_REQUESTS:
+                repository['issue%i' % number] = None
+            else:
+                repository['issue%i' % number] = {
+                    'number': number,
+                    'state': self.ISSUES[number].upper(),
+                    'url': 'https://github.com/org/repo/issues/%i' % number,
+                    'updatedAt': '2012-07-01T12:00:00Z',
+                }
+        self.send_json(200, {'data': {'repository': repository}})
+
+    def do_GET(self):
+        path, query = (self.path.split('?') + [''])[:2]
+        self.requests.append(('GET', path))
+        if path.endswith('/issues'):
+            self.send_issue_list(parse_qs(query))
+            return
+
+        number = int(path.rsplit('/', 1)[1])
+        etag = '"issue%i"' % number
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_json(200, {
+            'number': number,
+            'state': self.ISSUES[number],
+            'html_url': 'https://github.com/org/repo/issues/%i' % number,
+            'updated_at': '2012-07-01T12:00:00Z',
+        }, {'ETag': etag})
+
+    def send_issue_list(self, params):
+        page = int(params['page'][0])
+        issues = sorted(self.issue_updates.items(), key=lambda item: item[1],
+                        reverse=params['direction'][0] == 'desc')
+        last_page = max((len(issues) - 1) // self.LIST_PAGE_SIZE + 1, 1)
+        links = ['<http://127.0.0.1/issues?page=%i>; rel="last"' % last_page]
+        if page < last_page:
+            links.append('<http://127.0.0.1/issues?page=%i>; rel="next"' %
+                         (page + 1))
+        page_issues = issues[(page - 1) * self.LIST_PAGE_SIZE:
+                             page * self.LIST_PAGE_SIZE]
+        if page == 1:
+            self.issue_updates.update(self.updates_after_first_page)
+
+        self.send_json(200, [
+            {'number': number,
+             'state': 'open',
+             'html_url': 'https://github.com/org/repo/issues/%i' % number,
+             'updated_at': updated_at}
+            for number, updated_at in page_issues
+        ], {'Link': ', '.join(links)})
+
+    def send_json(self, status, data, headers=None):
+        body = json.dumps(data)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class GitTicketBatchTest(TestCase):
+    """Tests the batched retrieval of GitHub tickets by get_git_tickets, and
+    the listing of updated tickets by get_git_ticket_update, against a local
+    stand-in for the GitHub APIs.
+    """
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), GitHubStandInHandler)
+        self.server_thread = threading.Thread(target=self.server.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+        server_url = 'http://127.0.0.1:%i' % self.server.server_port
+
+        GitHubStandInHandler.requests = []
+        GitHubStandInHandler.graphql_status = 200
+        GitHubStandInHandler.issue_updates = {}
+        GitHubStandInHandler.updates_after_first_page = {}
+        self.settings = (settings.GIT_GRAPHQL_URL, settings.GIT_BATCH_SIZE)
+        settings.GIT_GRAPHQL_URL = server_url + '/graphql'
+        settings.GIT_BATCH_SIZE = 50
+        self.issue_urls = (cache_actions.GIT_INDIVIDUAL_ISSUE_URL,
+                           cache_actions.GIT_ISSUE_URL)
+        cache_actions.GIT_INDIVIDUAL_ISSUE_URL = server_url + \
+                '/repos/%(organization)s/%(repository)s/issues/%(issue_number)i'
+        cache_actions.GIT_ISSUE_URL = server_url + \
+                '/repos/%(organization)s/%(repository)s/issues'
+
+        self.api_access_data = APIAccessData(git_org='org', git_repo='repo',
+                                             git_token='token')
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        settings.GIT_GRAPHQL_URL, settings.GIT_BATCH_SIZE = self.settings
+        cache_actions.GIT_INDIVIDUAL_ISSUE_URL, cache_actions.GIT_ISSUE_URL = \
+                self.issue_urls
+        api_requests._BUDGETS.clear()
+
+    def test_batch_is_queried_at_once(self):
+        git_tickets = get_git_tickets(self.api_access_data, [3, 1, 2])
+
+        self.assertEqual([ticket.number for ticket in git_tickets], [3, 1, 2])
+        self.assertEqual([ticket.state for ticket in git_tickets],
+                         ['open', 'open', 'closed'])
+        self.assertEqual(GitHubStandInHandler.requests,
+                         [('POST', '/graphql')])
+
+    def test_missing_issues_are_requested_on_their_own(self):
+        git_tickets = get_git_tickets(self.api_access_data, [1, 4])
+
+        self.assertEqual([ticket.number for ticket in git_tickets], [1, 4])
+        self.assertEqual(GitHubStandInHandler.requests,
+                         [('POST', '/graphql'),
+                          ('GET', '/repos/org/repo/issues/4')])
+
+    def test_failed_query_falls_back_to_single_requests(self):
+        GitHubStandInHandler.graphql_status = 502
+        git_tickets = get_git_tickets(self.api_access_data, [1, 2])
+
+        self.assertEqual([ticket.state for ticket in git_tickets],
+                         ['open', 'closed'])
+        self.assertEqual(sorted(GitHubStandInHandler.requests[1:]),
+                         [('GET', '/repos/org/repo/issues/1'),
+                          ('GET', '/repos/org/repo/issues/2')])
+
+    def test_cached_issues_are_revalidated_on_their_own(self):
+        cached_git_ticket = GitIssue(1, 'open', 'https://github.com/1',
+                                     '2012-07-01T12:00:00Z', '"issue1"', None)
+        git_tickets = get_git_tickets(self.api_access_data, [1, 2, 3],
+                                      {1: cached_git_ticket})
+
+        self.assertTrue(git_tickets[0] is cached_git_ticket)
+        self.assertEqual([ticket.state for ticket in git_tickets[1:]],
+                         ['closed', 'open'])
+        self.assertEqual(sorted(GitHubStandInHandler.requests),
+                         [('GET', '/repos/org/repo/issues/1'),
+                          ('POST', '/graphql')])
+
+    def test_issues_on_their_own_keep_their_etags(self):
+        git_tickets = get_git_tickets(self.api_access_data, [1, 4])
+
+        self.assertEqual([ticket.etag for ticket in git_tickets],
+                         [None, '"issue4"'])
+
+    def test_rate_limited_query_is_not_retried_on_its_own(self):
+        GitHubStandInHandler.graphql_status = 429
+        self.assertRaises(RateLimitError, get_git_tickets,
+                          self.api_access_data, [1, 2])
+        self.assertEqual(GitHubStandInHandler.requests,
+                         [('POST', '/graphql')])
+
+    def test_tickets_updated_while_listing_leave_no_gaps(self):
+        GitHubStandInHandler.issue_updates = dict(
+            (number, '2012-07-0%iT12:00:00Z' % number)
+            for number in xrange(1, 7)
+        )
+        # Issue 1 is updated and issue 7 is created after the first page, which
+        # pushes the other issues back by two places.
+        GitHubStandInHandler.updates_after_first_page = {
+            1: '2012-07-08T12:00:00Z', 7: '2012-07-07T12:00:00Z'
+        }
+        git_tickets = cache_actions.get_git_ticket_update(
+            self.api_access_data, datetime(2012, 7, 1)
+        )
+
+        # The moved issues are left for the next update, since they were
+        # updated after this one started.
+        self.assertEqual(sorted(ticket.number for ticket in git_tickets),
+                         [2, 3, 4, 5, 6])
+        self.assertEqual(len(GitHubStandInHandler.requests), 4)
+
+    def test_batch_size_of_one_requests_every_issue_on_its_own(self):
+        settings.GIT_BATCH_SIZE = 1
+        get_git_tickets(self.api_access_data, [1, 2])
+
+        self.assertEqual(sorted(GitHubStandInHandler.requests),
+                         [('GET', '/repos/org/repo/issues/1'),
+                          ('GET', '/repos/org/repo/issues/2')])
+
+
+class FakeResponse(object):
+    """A faked response of the Zendesk or GitHub API, with the attributes of
+    a requests response that the application reads.
+    """
+    def __init__(self, json=None, status_code=200, headers=None):
+        self.json = json
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise HTTPError('%i Error' % self.status_code)
+
+
+class FakeAPITestCase(TestCase):
+    """Base of the tests that fake the Zendesk and GitHub APIs. The faked
+    _zen_get and _git_get return the responses queued in zen_responses and
+    git_responses in order, and record the URL and keyword arguments of each
+    request in requests.
+    """
+    def setUp(self):
+        self.api_access_data = APIAccessData.objects.create(
+            product_name='Product', git_org='org', git_repo='repo',
+            git_token='token', zen_name='zen@example.com', zen_token='token',
+            zen_url='example', zen_fieldid=5
+        )
+        self.zen_responses = []
+        self.git_responses = []
+        self.requests = []
+        self.api_gets = (cache_actions._zen_get, cache_actions._git_get)
+        cache_actions._zen_get = self.get_fake_get('zen', self.zen_responses)
+        cache_actions._git_get = self.get_fake_get('git', self.git_responses)
+
+    def tearDown(self):
+        cache_actions._zen_get, cache_actions._git_get = self.api_gets
+        cache.clear()
+
+    def get_fake_get(self, api, responses):
+        def fake_get(api_access_data, url, priority=None, **kwargs):
+            self.requests.append((api, url, kwargs))
+            return responses.pop(0)
+        return fake_get
+
+    def get_zen_ticket(self, zen_id, association=None, status='open',
+                       tags=('product_enhancement',),
+                       updated_at='2012-07-01T12:00:00Z'):
+        return {'id': zen_id,
+                'subject': 'Enhancement %i' % zen_id,
+                'requester_id': 3,
+                'url': 'https://example.zendesk.com/api/v2/tickets/%i.json' %
+                       zen_id,
+                'updated_at': updated_at,
+                'status': status,
+                'tags': list(tags),
+                'fields': [{'id': 5, 'value': association}]}
+
+    def get_git_ticket(self, number, state='open'):
+        return GitIssue(number, state, 'https://github.com/%i' % number,
+                        '2012-07-02T12:00:00Z', None, None)
+
+    def save_cache_data(self, zen_tickets, git_tickets, **values):
+        """Builds and saves the cache data of the passed Zendesk tickets and
+        GitHub tickets, along with any other passed values, and returns it.
+        """
+        cache_data = build_enhancement_data(
+            [project_zen_ticket(ticket, 5) for ticket in zen_tickets],
+            {3: 'Requester'}, git_tickets
+        )
+        cache_data.update({'git_tickets': git_tickets,
+                           'zen_user_reference': {3: 'Requester'},
+                           'last_updated': datetime.utcnow(),
+                           'zen_watermark': int(time()) - 3600})
+        cache_data.update(values)
+        cache_storage.save_cache_data(self.api_access_data, cache_data)
+        return cache_data
+
+    def get_table_ids(self, cache_data):
+        return dict((table, [enhancement['zen_id']
+                             for enhancement in enhancements])
+                    for table, enhancements
+                    in get_enhancement_tables(cache_data).items())
+
+
+class ZenTicketUpdateTest(FakeAPITestCase):
+    """Tests the sync of the Zendesk tickets that changed since the last sync
+    from the Zendesk incremental export.
+    """
+    def setUp(self):
+        super(ZenTicketUpdateTest, self).setUp()
+        self.page_size = cache_actions.ZEN_INCREMENTAL_PAGE_SIZE
+        cache_actions.ZEN_INCREMENTAL_PAGE_SIZE = 2
+
+    def tearDown(self):
+        cache_actions.ZEN_INCREMENTAL_PAGE_SIZE = self.page_size
+        super(ZenTicketUpdateTest, self).tearDown()
+
+    def test_watermark_moves_to_end_time(self):
+        self.zen_responses.extend([
+            FakeResponse({'tickets': [self.get_zen_ticket(1),
+                                      self.get_zen_ticket(2)],
+                          'count': 2, 'end_time': 1341316900}),
+            FakeResponse({'tickets': [self.get_zen_ticket(
+                              1, updated_at='2012-07-01T12:05:00Z'
+                          )],
+                          'count': 1, 'end_time': 1341317000}),
+        ])
+        zen_tickets, zen_watermark = cache_actions.get_zen_ticket_update(
+            self.api_access_data, 1341316800
+        )
+
+        self.assertEqual(zen_watermark, 1341317000)
+        self.assertEqual([kwargs['params']['start_time']
+                          for api, url, kwargs in self.requests],
+                         [1341316800, 1341316900])
+        # A ticket that changed twice is only returned in its latest state.
+        self.assertEqual(sorted((ticket['id'], ticket['updated_at'])
+                                for ticket in zen_tickets),
+                         [(1, '2012-07-01T12:05:00Z'),
+                          (2, '2012-07-01T12:00:00Z')])
+
+    def test_untagged_and_closed_tickets_are_removed(self):
+        self.save_cache_data([self.get_zen_ticket(1), self.get_zen_ticket(2),
+                              self.get_zen_ticket(3)], {})
+        untagged_ticket = self.get_zen_ticket(1, tags=())
+        # Changes to tickets that were never enhancements do not request their
+        # requesters or issues.
+        other_ticket = dict(self.get_zen_ticket(4, association='gh-9'),
+                            tags=[], requester_id=99)
+        end_time = int(time()) - 60
+        self.zen_responses.extend([
+            FakeResponse({'tickets': [untagged_ticket,
+                                      self.get_zen_ticket(2, status='closed')],
+                          'count': 2, 'end_time': end_time - 1}),
+            FakeResponse({'tickets': [other_ticket],
+                          'count': 1, 'end_time': end_time}),
+        ])
+        self.git_responses.append(FakeResponse([]))
+        cache_actions._update_cache_index(self.api_access_data)
+
+        cache_data = cache_storage.load_cache_data(self.api_access_data)
+        self.assertEqual(sorted(cache_data['enhancements']), [3])
+        self.assertEqual(self.get_table_ids(cache_data)[
+                             'unassociated_enhancements'
+                         ], [3])
+        self.assertEqual([api for api, url, kwargs in self.requests],
+                         ['zen', 'zen', 'git'])
+        self.assertEqual(cache.get(cache_storage.MANIFEST_KEY % {
+            'api_access_id': self.api_access_data.id
+        })['zen_watermark'], end_time)
+
+
+class EnhancementDataTest(FakeAPITestCase):
+    """Tests the classification of enhancements into the tables and the
+    git_index when the enhancement data is built and updated.
+    """
+    def build_enhancement_data(self):
+        git_tickets = {1: self.get_git_ticket(1),
+                       2: self.get_git_ticket(2, 'closed')}
+        zen_tickets = [self.get_zen_ticket(1, 'gh-1'),
+                       self.get_zen_ticket(2),
+                       self.get_zen_ticket(3, 'jira-5'),
+                       self.get_zen_ticket(4, 'gh-1'),
+                       self.get_zen_ticket(5, 'gh-2')]
+        cache_data = build_enhancement_data(
+            [project_zen_ticket(ticket, 5) for ticket in zen_tickets],
+            {3: 'Requester'}, git_tickets
+        )
+        cache_data.update({'git_tickets': git_tickets,
+                           'zen_user_reference': {3: 'Requester'}})
+        return cache_data
+
+    def test_build_classifies_every_ticket(self):
+        cache_data = self.build_enhancement_data()
+
+        self.assertEqual(self.get_table_ids(cache_data),
+                         {'need_attention': [5],
+                          'tracking': [1, 4],
+                          'unassociated_enhancements': [2],
+                          'not_git_enhancements': [3]})
+        self.assertEqual(cache_data['git_index'],
+                         {1: set([1, 4]), 2: set([5])})
+        self.assertEqual(cache_data['enhancements'][3]['non_git_association'],
+                         'jira-5')
+
+    def test_build_leaves_out_enhancements_without_their_issue(self):
+        cache_data = build_enhancement_data(
+            [project_zen_ticket(self.get_zen_ticket(6, 'gh-7'), 5)],
+            {3: 'Requester'}, {}
+        )
+
+        self.assertEqual(cache_data['enhancements'][6]['table'], None)
+        self.assertEqual(cache_data['git_index'], {7: set([6])})
+
+    def test_updates_move_enhancements_between_tables(self):
+        cache_data = self.build_enhancement_data()
+        cache_data = cache_actions.update_zen_cache(cache_data, [
+            project_zen_ticket(self.get_zen_ticket(1, 'gh-2'), 5),
+            project_zen_ticket(self.get_zen_ticket(2, 'gh-2'), 5),
+            project_zen_ticket(self.get_zen_ticket(4, 'gh-1', 'closed'), 5),
+        ])
+
+        self.assertEqual(self.get_table_ids(cache_data),
+                         {'need_attention': [1, 2, 5],
+                          'tracking': [],
+                          'unassociated_enhancements': [],
+                          'not_git_enhancements': [3]})
+        self.assertEqual(cache_data['git_index'], {2: set([1, 2, 5])})
+
+        cache_data = cache_actions.update_git_cache(
+            cache_data, [self.get_git_ticket(2)]
+        )
+        self.assertEqual(self.get_table_ids(cache_data)['tracking'],
+                         [1, 2, 5])
+        self.assertEqual(cache_data['enhancements'][1]['git_status'], 'open')
+
+
+class ZenTicketSearchTest(FakeAPITestCase):
+    """Tests the gathering of all of the open enhancement tickets from the
+    Zendesk search API.
+    """
+    def test_large_searches_are_read_from_the_export(self):
+        self.zen_responses.extend([
+            FakeResponse({'count': 1001,
+                          'results': [self.get_zen_ticket(1)]}),
+            FakeResponse({'results': [self.get_zen_ticket(1),
+                                      self.get_zen_ticket(2)],
+                          'meta': {'has_more': True,
+                                   'after_cursor': 'cursor2'}}),
+            FakeResponse({'results': [self.get_zen_ticket(3, 'gh-4')],
+                          'meta': {'has_more': False,
+                                   'after_cursor': 'cursor3'}}),
+        ])
+        zen_tickets = list(cache_actions.get_zen_tickets(self.api_access_data))
+
+        self.assertEqual([ticket['id'] for ticket in zen_tickets], [1, 2, 3])
+        self.assertEqual(zen_tickets[2]['git_id'], 4)
+        export_url = cache_actions.ZEN_SEARCH_EXPORT_URL % \
+                {'subdomain': 'example'}
+        self.assertEqual([url for api, url, kwargs in self.requests[1:]],
+                         [export_url, export_url])
+        self.assertEqual([kwargs['params'].get('page[after]')
+                          for api, url, kwargs in self.requests[1:]],
+                         [None, 'cursor2'])
+
+    def test_small_searches_are_read_by_page(self):
+        self.zen_responses.extend([
+            FakeResponse({'count': 101, 'results': [self.get_zen_ticket(1)]}),
+            FakeResponse({'count': 101, 'results': [self.get_zen_ticket(2)]}),
+        ])
+        zen_tickets = list(cache_actions.get_zen_tickets(self.api_access_data))
+
+        self.assertEqual([ticket['id'] for ticket in zen_tickets], [1, 2])
+        self.assertEqual([kwargs['params']['page']
+                          for api, url, kwargs in self.requests], [1, 2])
+
+
+class GitEventUpdateTest(FakeAPITestCase):
+    """Tests the sync of the GitHub tickets that had events since the last
+    sync from the repository's issue events feed.
+    """
+    def get_issue(self, number, state='open'):
+        return {'number': number,
+                'state': state,
+                'html_url': 'https://github.com/org/repo/issues/%i' % number,
+                'updated_at': '2012-07-03T12:00:00Z'}
+
+    def get_event(self, event_id, number=None, state='open'):
+        event = {'id': event_id}
+        if number is not None:
+            event['issue'] = self.get_issue(number, state)
+        return event
+
+    def get_next_link(self, page):
+        return {'link': '<https://api.github.com/events?page=%i>; rel="next"'
+                        % page}
+
+    def test_unchanged_feed_is_not_read(self):
+        self.git_responses.append(FakeResponse(status_code=304))
+        self.assertEqual(
+            cache_actions.get_git_event_update(self.api_access_data, 10,
+                                               '"events"'),
+            ([], 10, '"events"')
+        )
+        self.assertEqual(self.requests[0][2]['headers'],
+                         {'If-None-Match': '"events"'})
+
+    def test_feed_is_read_until_the_last_event(self):
+        self.git_responses.extend([
+            FakeResponse([self.get_event(15, 1, 'closed'),
+                          self.get_event(14, 2),
+                          self.get_event(13, 1)],
+                         headers=dict(self.get_next_link(2), etag='"new"')),
+            FakeResponse([self.get_event(12),
+                          self.get_event(11, 3),
+                          self.get_event(10, 2, 'closed'),
+                          self.get_event(9, 1)],
+                         headers=self.get_next_link(3)),
+        ])
+        git_tickets, event_id, events_etag = \
+                cache_actions.get_git_event_update(
+                    self.api_access_data, 10, '"events"', set([1, 2])
+                )
+
+        # Only the newest event of each tracked ticket is used.
+        self.assertEqual(sorted((ticket.number, ticket.state)
+                                for ticket in git_tickets),
+                         [(1, 'closed'), (2, 'open')])
+        self.assertEqual((event_id, events_etag), (15, '"new"'))
+        self.assertEqual(len(self.requests), 2)
+
+    def test_feed_that_does_not_reach_back_falls_back_to_listing(self):
+        settings.GIT_EVENTS_SYNC = True
+        self.addCleanup(setattr, settings, 'GIT_EVENTS_SYNC', False)
+        self.save_cache_data([self.get_zen_ticket(1, 'gh-1')],
+                             {1: self.get_git_ticket(1)},
+                             git_event_id=5, git_events_etag='"events"')
+        self.zen_responses.append(FakeResponse({
+            'tickets': [], 'count': 0, 'end_time': int(time()) - 60
+        }))
+        self.git_responses.extend([
+            FakeResponse([self.get_event(7, 2)], headers={'etag': '"new"'}),
+            FakeResponse([self.get_issue(1, 'closed')]),
+        ])
+        cache_actions._update_cache_index(self.api_access_data)
+
+        url_values = {'organization': 'org', 'repository': 'repo'}
+        self.assertEqual([url for api, url, kwargs in self.requests[1:]],
+                         [cache_actions.GIT_ISSUE_EVENTS_URL % url_values,
+                          cache_actions.GIT_ISSUE_URL % url_values])
+        cache_data = cache_storage.load_cache_data(self.api_access_data)
+        self.assertEqual(self.get_table_ids(cache_data)['need_attention'], [1])
+        self.assertEqual(cache_data['git_event_id'], 7)
+
+
+class RequestBudgetTest(TestCase):
+    """Tests the pacing, deferral and retrying of API requests by the rate
+    limit budgets of the APIs, with the waits recorded instead of slept.
+    """
+    def setUp(self):
+        self.waits = []
+        self.sleep = api_requests.sleep
+        api_requests.sleep = self.waits.append
+
+    def tearDown(self):
+        api_requests.sleep = self.sleep
+        api_requests._BUDGETS.clear()
+
+    def get_budget(self, remaining, limit=5000, reset_in=100):
+        budget = RequestBudget()
+        budget.record(FakeResponse(headers={
+            'x-ratelimit-limit': str(limit),
+            'x-ratelimit-remaining': str(remaining),
+            'x-ratelimit-reset': str(int(time()) + reset_in),
+        }))
+        return budget
+
+    def send_requests(self, responses):
+        sent = []
+        def send(url, **kwargs):
+            sent.append(url)
+            return responses.pop(0)
+        response = api_requests._send_request(send, 'url', 'key',
+                                              PRIORITY_NORMAL)
+        return response, len(sent)
+
+    def test_requests_are_not_held_back_with_budget_left(self):
+        budget = self.get_budget(4000)
+        for priority in (PRIORITY_LOW, PRIORITY_NORMAL, PRIORITY_HIGH):
+            self.assertEqual(budget.get_wait(priority), 0)
+
+    def test_low_priority_requests_are_deferred_under_the_reserve(self):
+        budget = self.get_budget(999)
+        self.assertRaises(RateLimitDeferred, budget.get_wait, PRIORITY_LOW)
+        self.assertEqual(budget.get_wait(PRIORITY_NORMAL), 0)
+
+    def test_normal_priority_requests_are_paced_under_the_threshold(self):
+        budget = self.get_budget(400)
+        self.assertAlmostEqual(budget.get_wait(PRIORITY_NORMAL), 0.25, 1)
+        self.assertEqual(budget.get_wait(PRIORITY_HIGH), 0)
+
+    def test_used_up_budget_waits_for_the_reset(self):
+        budget = self.get_budget(0)
+        self.assertAlmostEqual(budget.get_wait(PRIORITY_HIGH), 100, -1)
+
+    def test_rejected_request_waits_for_retry_after(self):
+        budget = self.get_budget(4000)
+        self.assertTrue(budget.record(FakeResponse(
+            status_code=429, headers={'retry-after': '30'}
+        )))
+        self.assertAlmostEqual(budget.get_wait(PRIORITY_HIGH), 30, -1)
+
+    def test_zendesk_budget_resets_after_a_minute(self):
+        budget = RequestBudget()
+        budget.record(FakeResponse(headers={'x-rate-limit': '700',
+                                            'x-rate-limit-remaining': '0'}))
+        self.assertEqual(budget.limit, 700)
+        self.assertAlmostEqual(budget.get_wait(PRIORITY_HIGH),
+                               api_requests.ZEN_RATE_LIMIT_WINDOW, -1)
+
+    def test_rejected_requests_are_retried(self):
+        rejected = FakeResponse(status_code=429, headers={'retry-after': '1'})
+        response, sent = self.send_requests([rejected, rejected,
+                                             FakeResponse()])
+        self.assertEqual((response.status_code, sent), (200, 3))
+        self.assertEqual(len(self.waits), 2)
+
+        response, sent = self.send_requests([rejected] * 4)
+        self.assertEqual((response.status_code, sent),
+                         (429, api_requests.RATE_LIMIT_RETRIES + 1))
+
+    def test_long_rate_limit_waits_are_not_made(self):
+        rejected = FakeResponse(status_code=429,
+                                headers={'retry-after': '3600'})
+        self.assertRaises(RateLimitError, self.send_requests, [rejected])
+        self.assertEqual(self.waits, [])
+
+
+class SyncLockTest(TestCase):
+    """Tests the sync lock that keeps processes from syncing the cache data of
+    the same group at the same time.
+    """
+    def setUp(self):
+        self.api_access_data = APIAccessData(id=1000)
+        self.lock_key = cache_actions.SYNC_LOCK_KEY % {'api_access_id': 1000}
+        self.lease = settings.SYNC_LOCK_LEASE
+        cache.delete(self.lock_key)
+
+    def tearDown(self):
+        settings.SYNC_LOCK_LEASE = self.lease
+        cache.delete(self.lock_key)
+
+    def test_lock_is_held_until_released(self):
+        lock_token = cache_actions._acquire_sync_lock(self.api_access_data)
+
+        self.assertNotEqual(lock_token, None)
+        self.assertEqual(
+            cache_actions._acquire_sync_lock(self.api_access_data), None
+        )
+        cache_actions._release_sync_lock(self.api_access_data, lock_token)
+        self.assertEqual(cache.get(self.lock_key), None)
+
+    def test_release_keeps_a_lock_taken_by_another_process(self):
+        lock_token = cache_actions._acquire_sync_lock(self.api_access_data)
+        cache.set(self.lock_key, 'other', self.lease)
+        cache_actions._release_sync_lock(self.api_access_data, lock_token)
+
+        self.assertEqual(cache.get(self.lock_key), 'other')
+
+    def test_expired_lease_is_not_released(self):
+        lock_token = cache_actions._acquire_sync_lock(self.api_access_data)
+        cache_actions._SYNC_LOCK_LEASES[lock_token] -= self.lease
+        cache_actions._release_sync_lock(self.api_access_data, lock_token)
+
+        self.assertEqual(cache.get(self.lock_key), lock_token)
+
+    def test_lease_is_renewed_during_a_long_sync(self):
+        settings.SYNC_LOCK_LEASE = 1
+        lock_tokens = []
+
+        def sync(api_access_data, priority):
+            gevent.sleep(2.5)
+            lock_tokens.append(cache.get(self.lock_key))
+
+        cache_actions._sync_single_flight(self.api_access_data, sync, None)
+
+        self.assertNotEqual(lock_tokens, [None])
+        self.assertEqual(cache.get(self.lock_key), None)
+
+
+class WebhookTest(TestCase):
+    """Tests the verification and parsing of the GitHub and Zendesk webhooks.
+    """
+    def setUp(self):
+        self.api_access_data = APIAccessData.objects.create(
+            product_name='Product', git_org='org', git_repo='repo',
+            git_token='token', zen_name='zen@example.com', zen_token='token',
+            zen_url='example', zen_fieldid=5, zen_webhook_secret='zensecret'
+        )
+        url_kwargs = {'api_access_id': self.api_access_data.id}
+        self.git_url = reverse('git_webhook', kwargs=url_kwargs)
+        self.zen_url = reverse('zen_webhook', kwargs=url_kwargs)
+        self.lock_key = cache_actions.SYNC_LOCK_KEY % \
+                {'api_access_id': self.api_access_data.id}
+        self.lock_wait = settings.SYNC_LOCK_WAIT
+
+    def tearDown(self):
+        settings.SYNC_LOCK_WAIT = self.lock_wait
+        cache.delete(self.lock_key)
+
+    def post_git(self, body, signature=None):
+        if signature is None:
+            signature = 'sha256=' + hmac.new(
+                _get_git_webhook_secret(self.api_access_data), body, sha256
+            ).hexdigest()
+        return self.client.post(self.git_url, body,
+                                content_type='application/json',
+                                HTTP_X_GITHUB_EVENT='issues',
+                                HTTP_X_HUB_SIGNATURE_256=signature)
+
+    def post_zen(self, body, signature=None, timestamp=None):
+        if timestamp is None:
+            timestamp = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+        if signature is None:
+            signature = b64encode(
+                hmac.new('zensecret', timestamp + body, sha256).digest()
+            )
+        return self.client.post(
+            self.zen_url, body, content_type='application/json',
+            HTTP_X_ZENDESK_WEBHOOK_SIGNATURE_TIMESTAMP=timestamp,
+            HTTP_X_ZENDESK_WEBHOOK_SIGNATURE=signature
+        )
+
+    def get_git_body(self):
+        return json.dumps({
+            'issue': {'number': 1, 'state': 'closed',
+                      'html_url': 'https://github.com/org/repo/issues/1',
+                      'updated_at': '2012-07-01T12:00:00Z'},
+            'repository': {'name': 'repo', 'owner': {'login': 'org'}},
+        })
+
+    def get_zen_body(self, **fields):
+        ticket = {'id': '7', 'subject': 'Subject', 'status': 'Open',
+                  'requester_id': '3', 'requester_name': 'Requester',
+                  'updated_at': '2012-07-01T12:00:00Z',
+                  'tags': 'product_enhancement', 'association': 'gh-1'}
+        ticket.update(fields)
+        return json.dumps({'ticket': ticket})
+
+    def test_signed_git_webhook_is_accepted(self):
+        self.assertEqual(self.post_git(self.get_git_body()).status_code, 204)
+
+    def test_git_webhook_with_bad_signature_is_forbidden(self):
+        response = self.post_git(self.get_git_body(), 'sha256=' + '0' * 64)
+        self.assertEqual(response.status_code, 403)
+
+    def test_malformed_git_webhook_is_rejected(self):
+        self.assertEqual(self.post_git('{"issue": {}}').status_code, 400)
+
+    def test_git_webhook_is_redelivered_during_a_sync(self):
+        settings.SYNC_LOCK_WAIT = 0
+        cache.set(self.lock_key, 'other', 60)
+
+        response = self.post_git(self.get_git_body())
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '0')
+
+    def test_signed_zen_webhook_is_accepted(self):
+        self.assertEqual(self.post_zen(self.get_zen_body()).status_code, 204)
+
+    def test_zen_webhook_with_bad_signature_is_forbidden(self):
+        response = self.post_zen(self.get_zen_body(), b64encode('0' * 32))
+        self.assertEqual(response.status_code, 403)
+
+    def test_zen_webhook_without_secret_is_forbidden(self):
+        self.api_access_data.zen_webhook_secret = ''
+        self.api_access_data.save()
+        self.assertEqual(self.post_zen(self.get_zen_body()).status_code, 403)
+
+    def test_malformed_zen_webhook_is_rejected(self):
+        self.assertEqual(self.post_zen('not json').status_code, 400)
+        self.assertEqual(self.post_zen(self.get_zen_body(id='x')).status_code,
+                         400)
+
+    def test_zen_webhook_with_bad_update_time_is_rejected(self):
+        body = self.get_zen_body(updated_at='07/01/2012 12:00')
+        self.assertEqual(self.post_zen(body).status_code, 400)
+
+    def test_replayed_zen_webhook_is_forbidden(self):
+        response = self.post_zen(self.get_zen_body(),
+                                 timestamp='2012-07-01T12:00:00Z')
+        self.assertEqual(response.status_code, 403)
+
+    def test_zen_webhook_without_tags_is_rejected(self):
+        body = json.loads(self.get_zen_body())
+        del body['ticket']['tags']
+        self.assertEqual(self.post_zen(json.dumps(body)).status_code, 400)
+
+
+class CacheStorageTest(TestCase):
+    """Tests the storage of cache data as a manifest and shards in the cache
+    and as a snapshot in the database.
+    """
+    def setUp(self):
+        self.api_access_data = APIAccessData.objects.create(
+            product_name='Product'
+        )
+        self.manifest_key = cache_storage.MANIFEST_KEY % \
+                {'api_access_id': self.api_access_data.id}
+        cache.delete(self.manifest_key)
+
+    def tearDown(self):
+        manifest = cache.get(self.manifest_key)
+        if manifest is not None:
+            cache.delete_many(self.get_shard_keys(manifest))
+        cache.delete(self.manifest_key)
+
+    def get_cache_data(self):
+        enhancements = {}
+        for zen_id in xrange(1, 2501):
+            enhancements[zen_id] = {
+                'zen_id': zen_id,
+                'zen_subject': 'Enhancement %i' % zen_id,
+                'zen_datetime': datetime(2012, 7, 1, 12, 0),
+                'git_id': zen_id % 7,
+                'git_datetime': datetime(2012, 7, 2, 12, 0),
+                'table': 'tracking',
+            }
+        git_tickets = dict(
+            (number, GitIssue(number, 'open', 'https://github.com/%i' % number,
+                              '2012-07-02T12:00:00Z', '"etag"', None))
+            for number in xrange(7)
+        )
+        return {'enhancements': enhancements,
+                'git_tickets': git_tickets,
+                'zen_user_reference': {3: 'Requester'},
+                'last_updated': datetime(2012, 7, 3, 12, 0),
+                'zen_watermark': 1341316800}
+
+    def get_shard_keys(self, manifest):
+        return cache_storage._get_shard_keys(self.api_access_data,
+                                             manifest).values()
+
+    def assertCacheDataEqual(self, cache_data, expected_cache_data):
+        for key, value in expected_cache_data.items():
+            self.assertEqual(cache_data[key], value)
+        self.assertEqual(sorted(cache_data['git_index'][3]),
+                         range(3, 2501, 7))
+
+    def test_shards_are_decoded_as_encoded(self):
+        cache_data = self.get_cache_data()
+        for name in cache_storage.SHARDED_VALUES:
+            shard = sorted(cache_data[name].items())
+            self.assertEqual(decode_shard(name, encode_shard(name, shard)),
+                             shard)
+
+    def test_shard_of_another_schema_version_is_rejected(self):
+        encoded_shard = encode_shard('zen_user_reference', [(3, 'Requester')])
+        encoded_shard = encoded_shard[:2] + chr(0) + encoded_shard[3:]
+        self.assertRaises(CacheSchemaError, decode_shard,
+                          'zen_user_reference', encoded_shard)
+
+    def test_shard_with_an_undecodable_body_is_rejected(self):
+        encoded_shard = encode_shard('zen_user_reference', [(3, 'Requester')])
+        self.assertRaises(CacheSchemaError, decode_shard,
+                          'zen_user_reference', encoded_shard[:4] + '\xff')
+
+    def test_cache_data_is_loaded_as_saved(self):
+        cache_data = self.get_cache_data()
+        cache_storage.save_cache_data(self.api_access_data, cache_data)
+
+        manifest = cache.get(self.manifest_key)
+        self.assertTrue(len(manifest['shards']) > 3)
+        self.assertCacheDataEqual(
+            cache_storage._load_cached_data(self.api_access_data),
+            self.get_cache_data()
+        )
+
+    def test_snapshot_restores_evicted_cache_data(self):
+        cache_storage.save_cache_data(self.api_access_data,
+                                      self.get_cache_data())
+        manifest = cache.get(self.manifest_key)
+        cache.delete_many(self.get_shard_keys(manifest) + [self.manifest_key])
+
+        self.assertCacheDataEqual(
+            cache_storage.load_cache_data(self.api_access_data),
+            self.get_cache_data()
+        )
+        self.assertEqual(cache.get(self.manifest_key)['shards'],
+                         manifest['shards'])
+        self.assertNotEqual(
+            cache_storage._load_cached_data(self.api_access_data), None
+        )
+
+    def test_undecodable_snapshot_is_rebuilt(self):
+        cache_storage.save_cache_data(self.api_access_data,
+                                      self.get_cache_data())
+        manifest = cache.get(self.manifest_key)
+        snapshots = EnhancementSnapshot.objects.filter(
+            api_access_data=self.api_access_data
+        )
+        data = json.loads(snapshots[0].data)
+
+        # A snapshot that is not JSON, or whose shards cannot be decoded by
+        # this version of Python, is not restored.
+        undecodable_shard = encode_shard('zen_user_reference', [])[:4] + \
+                '\xff'
+        for undecodable_data in ('{invalid', json.dumps(
+            [[name, index, b64encode(undecodable_shard)]
+             for name, index, encoded_shard in data]
+        )):
+            snapshots.update(data=undecodable_data)
+            cache.delete_many(self.get_shard_keys(manifest) +
+                              [self.manifest_key])
+            self.assertEqual(
+                cache_storage.load_cache_data(self.api_access_data), None
+            )
+
+        # Saving the rebuilt cache data replaces the snapshot's data, even
+        # though its shards have not changed.
+        cache_storage.save_cache_data(self.api_access_data,
+                                      self.get_cache_data())
+        self.assertEqual(json.loads(snapshots[0].data), data)
+        cache.delete_many(self.get_shard_keys(manifest) + [self.manifest_key])
+        self.assertCacheDataEqual(
+            cache_storage.load_cache_data(self.api_access_data),
+            self.get_cache_data()
+        )
+
+    def test_manifest_with_evicted_shards_is_replaced(self):
+        cache_storage.save_cache_data(self.api_access_data,
+                                      self.get_cache_data())
+        manifest = cache.get(self.manifest_key)
+        evicted_manifest = dict(manifest, shards=dict(
+            (shard, 'evicted') for shard in manifest['shards']
+        ))
+        cache.set(self.manifest_key, evicted_manifest)
+
+        self.assertNotEqual(
+            cache_storage.load_cache_data(self.api_access_data), None
+        )
+        self.assertEqual(cache.get(self.manifest_key)['shards'],
+                         manifest['shards'])
+
+    def test_old_unchanged_shards_are_written_again(self):
+        cache_storage.save_cache_data(self.api_access_data,
+                                      self.get_cache_data())
+        manifest = cache.get(self.manifest_key)
+        shard_keys = self.get_shard_keys(manifest)
+        cache.delete_many(shard_keys)
+
+        # Shards that were written recently are not written again.
+        cache_storage.save_cache_data(self.api_access_data,
+                                      self.get_cache_data())
+        self.assertEqual(cache.get_many(shard_keys), {})
+
+        manifest['shard_times'][('zen_user_reference', 0)] = 0
+        cache.set(self.manifest_key, manifest)
+        cache_storage.save_cache_data(self.api_access_data,
+                                      self.get_cache_data())
+        old_shard_key = cache_storage.SHARD_KEY % \
+                {'api_access_id': self.api_access_data.id,
+                 'name': 'zen_user_reference',
+                 'index': 0,
+                 'digest': manifest['shards'][('zen_user_reference', 0)]}
+        self.assertEqual(cache.get_many(shard_keys).keys(), [old_shard_key])
+
+    def test_rendered_tables_use_manifest_table_counts(self):
+        cache_storage.save_cache_data(self.api_access_data,
+                                      self.get_cache_data())
+        manifest = cache.get(self.manifest_key)
+        self.assertEqual(manifest['table_counts'], {'tracking': 2500})
+
+        # The tables are rendered from the counts alone, without the shards.
+        cache.delete_many(self.get_shard_keys(manifest))
+        rendered_tables = get_rendered_tables(self.api_access_data, manifest,
+                                              'ZEN')
+        self.assertTrue('>2500</span>' in rendered_tables)
+        self.assertTrue('>0</span>' in rendered_tables)
+        self.assertEqual(
+            get_rendered_tables(self.api_access_data, manifest, 'ZEN'),
+            rendered_tables
+        )
+
+
+class HomePageTest(TestCase):
+    """Tests the conditional requests of the home page and the changes that
+    bring its tables up to date.
+    """
+    def setUp(self):
+        self.api_access_data = APIAccessData.objects.create(
+            product_name='Product', zen_url='example'
+        )
+        user = User.objects.create_user('user', 'user@example.com', 'pass')
+        UserProfile.objects.create(user=user,
+                                   api_access_data=self.api_access_data)
+        self.client.login(username='user', password='pass')
+        subjects = {1: 'Export reports', 2: 'Bulk editing',
+                    3: 'Report filters'}
+        enhancements = dict(
+            (zen_id, {'zen_id': zen_id,
+                      'zen_subject': subject,
+                      'zen_requester': 'Requester',
+                      'zen_url': 'https://example.zendesk.com/tickets/%i' %
+                                 zen_id,
+                      'zen_datetime': datetime(2012, 7, zen_id, 12, 0),
+                      'table': 'unassociated_enhancements'})
+            for zen_id, subject in subjects.items()
+        )
+        cache_storage.save_cache_data(self.api_access_data, {
+            'enhancements': enhancements,
+            'git_tickets': {},
+            'zen_user_reference': {},
+            'last_updated': datetime.utcnow(),
+            'zen_watermark': 1341316800,
+        })
+
+    def tearDown(self):
+        cache.delete(cache_storage.MANIFEST_KEY %
+                     {'api_access_id': self.api_access_data.id})
+
+    def get_row(self, zen_id, table):
+        return {'zen_id': zen_id, 'table': table,
+                'zen_url': 'https://example.zendesk.com/%i' % zen_id,
+                'zen_subject': 'Enhancement %i' % zen_id,
+                'zen_requester': 'Requester',
+                'zen_date': '07/01/2012', 'zen_time': '12:00 PM',
+                'git_id': zen_id, 'git_url': 'https://github.com/%i' % zen_id,
+                'git_date': '07/02/2012', 'git_time': '12:00 PM'}
+
+    def get_display_tables(self):
+        return {'need_attention': [],
+                'tracking': [self.get_row(1, 'tracking'),
+                             self.get_row(2, 'tracking'),
+                             self.get_row(3, 'tracking')],
+                'unassociated_enhancements': [
+                    self.get_row(5, 'unassociated_enhancements')
+                ],
+                'not_git_enhancements': []}
+
+    def test_unchanged_home_page_is_not_modified(self):
+        response = self.client.get(reverse('home'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue('Currently Tracking' in response.content)
+
+        response = self.client.get(reverse('home'),
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        etag = response['ETag']
+
+        # The page is sent again once anything it displays changes.
+        self.api_access_data.zen_url = 'other'
+        self.api_access_data.save()
+        response = self.client.get(reverse('home'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_stale_data_restored_from_the_snapshot_is_refreshed(self):
+        cache_data = cache_storage.load_cache_data(self.api_access_data)
+        cache_data['last_updated'] = datetime(2012, 7, 1)
+        cache_storage.save_cache_data(self.api_access_data, cache_data)
+        cache.delete(cache_storage.MANIFEST_KEY %
+                     {'api_access_id': self.api_access_data.id})
+
+        refreshes = []
+        self.addCleanup(setattr, views, 'refresh_cache_index',
+                        views.refresh_cache_index)
+        views.refresh_cache_index = refreshes.append
+        self.assertEqual(self.client.get(reverse('home')).status_code, 200)
+        self.assertEqual(refreshes, [self.api_access_data])
+
+    def get_table_data(self, **params):
+        return self.client.get(
+            reverse('enhancement_table_data',
+                    args=['unassociated_enhancements']),
+            params
+        )
+
+    def test_table_data_is_paged_sorted_and_searched(self):
+        response = self.get_table_data(sEcho=4, iDisplayStart=1,
+                                       iDisplayLength=1, iSortCol_0=0,
+                                       sSortDir_0='desc')
+        table_data = json.loads(response.content)
+        self.assertEqual(table_data['sEcho'], 4)
+        self.assertEqual(table_data['iTotalRecords'], 3)
+        self.assertEqual(table_data['iTotalDisplayRecords'], 3)
+        self.assertEqual(len(table_data['aaData']), 1)
+        self.assertTrue('>Z2</a>' in table_data['aaData'][0][0])
+
+        table_data = json.loads(self.get_table_data(iSortCol_0=1).content)
+        self.assertEqual([row[1] for row in table_data['aaData']],
+                         ['Bulk editing', 'Export reports', 'Report filters'])
+
+        table_data = json.loads(self.get_table_data(sSearch='REPORT',
+                                                    iSortCol_0=1).content)
+        self.assertEqual(table_data['iTotalRecords'], 3)
+        self.assertEqual(table_data['iTotalDisplayRecords'], 2)
+        self.assertEqual([row[1] for row in table_data['aaData']],
+                         ['Export reports', 'Report filters'])
+
+    def test_bad_table_parameters_are_rejected(self):
+        for column in ('4', '-1', 'x'):
+            response = self.get_table_data(iSortCol_0=column)
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.get_table_data(iDisplayLength='x').status_code,
+                         400)
+
+    def test_table_changes_are_sorted_by_type(self):
+        changes = {1: (None, 'tracking'),
+                   2: ('unassociated_enhancements', 'tracking'),
+                   3: ('tracking', 'tracking'),
+                   4: ('need_attention', None),
+                   6: (None, None)}
+        table_changes = _get_table_changes(changes, self.get_display_tables(),
+                                           True)
+
+        self.assertFalse(table_changes['full_refresh'])
+        self.assertEqual(table_changes['counts'],
+                         {'need_attention': 0, 'tracking': 3,
+                          'unassociated_enhancements': 1,
+                          'not_git_enhancements': 0})
+        self.assertEqual([row['zen_id'] for row in table_changes['added']],
+                         [1])
+        self.assertEqual(table_changes['moved'][0]['zen_id'], 2)
+        self.assertEqual(table_changes['moved'][0]['previous_table'],
+                         'unassociated_enhancements')
+        self.assertEqual([row['zen_id'] for row in table_changes['updated']],
+                         [3])
+        self.assertEqual(table_changes['updated'][0]['cells'][1],
+                         'Enhancement 3')
+        self.assertEqual(table_changes['removed'],
+                         [{'zen_id': 4, 'previous_table': 'need_attention'}])
+
+    def test_changes_missing_from_tables_need_full_refresh(self):
+        display_tables = self.get_display_tables()
+        self.assertEqual(
+            _get_table_changes({7: (None, 'tracking')}, display_tables, True),
+            {'full_refresh': True}
+        )
+        self.assertEqual(
+            _get_table_changes({5: (None, 'tracking')}, display_tables, True),
+            {'full_refresh': True}
+        )
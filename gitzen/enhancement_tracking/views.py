@@ -1,6 +1,8 @@
-from datetime import datetime, timedelta
-from time import mktime
-from itertools import chain
+import hmac
+import json
+from base64 import b64encode
+from datetime import datetime
+from hashlib import md5, sha1, sha256
 
 from requests.exceptions import RequestException
 from requests_oauth2 import OAuth2
@@ -14,15 +16,46 @@ from django.contrib.auth.forms import (
     SetPasswordForm
 )
 from django.contrib.auth.models import User
-from django.core.cache import cache
 from django.core.urlresolvers import reverse
-from django.http import HttpResponse, HttpResponseRedirect
-from django.shortcuts import render_to_response
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    HttpResponseNotModified,
+    HttpResponseRedirect
+)
+from django.shortcuts import get_object_or_404, render_to_response
 from django.template import RequestContext
+from django.utils.crypto import constant_time_compare
+from django.utils.http import parse_etags, quote_etag
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 
 from gitzen.enhancement_tracking.cache_actions import (
+    ENHANCEMENT_TABLES,
+    ZEN_ENHANCEMENT_TAG,
+    SyncLockBusy,
+    apply_git_webhook,
+    apply_zen_webhook,
     build_cache_index,
-    update_cache_index
+    get_association_git_id,
+    is_cache_stale,
+    project_git_ticket,
+    refresh_cache_index
+)
+from gitzen.enhancement_tracking.cache_display import (
+    TABLES_TEMPLATE_VERSION,
+    filter_display_rows,
+    format_display_row,
+    get_display_tables,
+    get_rendered_tables,
+    sort_display_rows
+)
+from gitzen.enhancement_tracking.cache_storage import (
+    load_cache_data,
+    load_cache_manifest,
+    load_changes
 )
 from gitzen.enhancement_tracking.forms import (
     NewUserForm,
@@ -33,7 +66,7 @@ from gitzen.enhancement_tracking.forms import (
     ActiveUserSelectionForm,
     InactiveUserSelectionForm
 )
-from gitzen.enhancement_tracking.models import UserProfile
+from gitzen.enhancement_tracking.models import APIAccessData, UserProfile
 
 # Constant OAuth handler and authorization URL for access to GitHub's OAuth.
 OAUTH2_HANDLER = OAuth2(settings.CLIENT_ID, settings.CLIENT_SECRET, site='https://github.com/',
@@ -42,6 +75,13 @@ OAUTH2_HANDLER = OAuth2(settings.CLIENT_ID, settings.CLIENT_SECRET, site='https:
                         token_url='login/oauth/access_token')
 GIT_AUTH_URL = OAUTH2_HANDLER.authorize_url('repo')
 
+# The format of the timestamps that Zendesk sends in its webhooks.
+ZEN_WEBHOOK_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+# The number of seconds that a Zendesk webhook's signature stays valid after
+# its signature timestamp, so that a captured webhook cannot be replayed later.
+ZEN_WEBHOOK_MAX_AGE = 300
+
 # Email message that is sent to new users after a group superuser has created a
 # user account for them in their group. The message prompts the user to change
 # the random password that was assigned to their account upon creation.
@@ -408,97 +448,285 @@ def confirm_api_access_changes(request):
 
 @login_required
 def home(request):
-    """Gathers and builds the enhancement tracking data and renders the home
-    page of the app with this data. If the request for the page is from a
-    group superuser, it gets redirected to the group_superuser_home function.
+    """Renders the home page of the app with the cached enhancement tracking
+    data. If the cached data is stale, it is refreshed in the background after
+    the page is rendered. If there is no cached data yet, the page waits up to
+    settings.CACHE_BUILD_DEADLINE seconds for it to be gathered.
 
     Parameters:
         request - The request object that contains the current user's data.
     """
     profile = request.user.get_profile() # Current user's profile
-    utc_offset = profile.utc_offset
     api_access_data = profile.api_access_data
     product_name = api_access_data.product_name
     context = {}
     context['is_group_superuser'] = profile.is_group_superuser
 
-    try:
-        update_cache_index(api_access_data)
-    except RequestException as e:
+    manifest = load_cache_manifest(api_access_data)
+    if manifest is None:
+        # Restore the cache data from the group's snapshot, or gather it if
+        # there is no snapshot either.
+        if load_cache_data(api_access_data) is None:
+            refresh = refresh_cache_index(api_access_data)
+            refresh.join(settings.CACHE_BUILD_DEADLINE)
+
+            if refresh.ready() and not refresh.successful():
+                e = refresh.exception
+                if not isinstance(e, RequestException):
+                    # Raise the error again with the traceback it had in the
+                    # refresh's greenlet.
+                    refresh.get()
+                context['api_requests_successful'] = False
+                context['error_message'] = 'There was an error connecting ' \
+                        'to the %(API_name)s API: %(exception_message)s. If ' \
+                        'the error persists after refreshing the page, ' \
+                        'inform the superuser for %(product_name)s that the ' \
+                        'API access settings may need adjustment.' % \
+                        {'API_name': e.args[1],
+                         'exception_message': e.args[0],
+                         'product_name': product_name}
+                return render_to_response(
+                    'home.html', context,
+                    context_instance=RequestContext(request)
+                )
+        manifest = load_cache_manifest(api_access_data)
+
+    # Serve the stale data right away and bring it up to date in the background
+    # for the next view of the page. Data restored from the group's snapshot is
+    # as old as the snapshot, so it is checked the same way.
+    if manifest is not None and \
+       is_cache_stale(manifest, settings.CACHE_STALE_AFTER):
+        refresh_cache_index(api_access_data)
+
+    # Get the enhancement tables rendered for the user's view type. They are
+    # only rendered when the group's current enhancements have not been
+    # displayed with the same view type before.
+    rendered_tables = None
+    if manifest is not None:
+        # The page only changes with the group's data version and the user's
+        # settings, so a browser that already has the current page is told to
+        # keep showing it.
+        etag = _get_home_etag(profile, manifest)
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+            response['ETag'] = quote_etag(etag)
+            return response
+
+        rendered_tables = get_rendered_tables(api_access_data, manifest,
+                                              profile.view_type)
+    if rendered_tables is None:
         context['api_requests_successful'] = False
-        context['error_message'] = 'There was an error connecting to ' \
-                'the %(API_name)s API: %(exception_message)s. If the error ' \
-                'persists after refreshing the page, inform the superuser ' \
-                'for %(product_name)s that the API access settings may need ' \
-                'adjustment.' % {'API_name': e.args[1],
-                                 'exception_message': e.args[0],
-                                 'product_name': product_name}
+        context['error_message'] = 'The enhancement data for ' \
+                '%(product_name)s is still being gathered. Refresh the ' \
+                'page in a few moments to see it.' % \
+                {'product_name': product_name}
         return render_to_response('home.html', context,
                                   context_instance=RequestContext(request))
 
-    # Account for the time zone offset and get the enhancement data
-    cache_data = cache.get(api_access_data.id)
-    enhancement_tables = _time_adjust_enhancement_data(cache_data, utc_offset)
-    context = dict(context.items() + enhancement_tables.items())
-
     # Add additional data to be used in the context of the home page
+    context['rendered_tables'] = rendered_tables
     context['api_requests_successful'] = True
     context['product_name'] = product_name
     context['zen_url'] = api_access_data.zen_url
-    if profile.view_type == 'ZEN':
-        context['is_zendesk_user'] = True
-    else:
-        context['is_zendesk_user'] = False
-    context['is_github_user'] = not context['is_zendesk_user']
+    context['data_version'] = manifest.get('data_version', 0)
 
-    return render_to_response('home.html', context,
-                              context_instance=RequestContext(request))
+    response = render_to_response('home.html', context,
+                                  context_instance=RequestContext(request))
+    # Have the browser check whether the page has changed every time it is
+    # shown instead of showing its own copy.
+    response['ETag'] = quote_etag(etag)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+def _get_home_etag(profile, manifest):
+    """Gets the entity tag of the home page as it is rendered for the passed
+    user profile from the cache data described by the passed manifest.
+
+    Parameters:
+        profile - The user profile of the user viewing the home page.
+        manifest - The current manifest of the cache data of the user's group.
+
+    Returns the unquoted entity tag, made of the data version of the cache data
+    and a digest of everything else the rendered page depends on.
+    """
+    api_access_data = profile.api_access_data
+    page_digest = md5(repr((
+        profile.user.id,
+        profile.is_group_superuser,
+        profile.view_type,
+        api_access_data.product_name,
+        api_access_data.zen_url,
+        settings.STATIC_URL,
+        TABLES_TEMPLATE_VERSION
+    ))).hexdigest()
+
+    return '%i-%s' % (manifest.get('data_version', 0), page_digest)
+
+@login_required
+def enhancement_changes(request):
+    """Serves the enhancements of the current user's group that were added to,
+    moved between, updated in or removed from the home page tables since a data
+    version of the group's cache data as JSON, so that a client showing that
+    version can bring itself up to date without fetching every table again.
+
+    Parameters:
+        request - The request object that contains the current user's data and
+                    the data version to get the changes since as the 'since'
+                    GET data.
+
+    The JSON object has the current 'data_version' and the number of rows in
+    each table as 'counts'. The changed rows are listed in 'added', 'moved',
+    'updated' and 'removed', with the cells of the rows that are still
+    displayed formatted as in enhancement_table_data. If the changes since the
+    version are no longer known, 'full_refresh' is true and every table should
+    be fetched again instead.
+    """
+    profile = request.user.get_profile() # Current user's profile
+    api_access_data = profile.api_access_data
+    is_zendesk_user = profile.view_type == 'ZEN'
 
-def _time_adjust_enhancement_data(cache_data, utc_offset):
-    """Adjusts the enhancement data from the cache so that all of the dates and
-    times are in the passed UTC time zone.
+    try:
+        since_version = int(request.GET['since'])
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest('Invalid data version.')
+
+    table_changes = {'data_version': None, 'full_refresh': True}
+    manifest = load_cache_manifest(api_access_data)
+    if manifest is not None:
+        data_version = manifest.get('data_version', 0)
+        table_changes['data_version'] = data_version
+        changes = load_changes(api_access_data, since_version, data_version)
+        display_tables = None
+        if changes is not None:
+            display_tables = get_display_tables(api_access_data, manifest,
+                                                profile.utc_offset)
+        if display_tables is not None:
+            table_changes.update(_get_table_changes(changes, display_tables,
+                                                    is_zendesk_user))
+
+    return HttpResponse(json.dumps(table_changes),
+                        content_type='application/json')
+
+def _get_table_changes(changes, display_tables, is_zendesk_user):
+    """Sorts the passed enhancement changes into the changes of the rows of
+    the home page tables.
 
     Parameters:
-        cache_data - A dictionary of enhancement data stored under a group index
-                        in the cache.
-        utc_offset - The numeric UTC offset for the time zone that the
-                        enhancement data should be converted to.
-
-    Returns the four enhancement tables (need_attention, tracking,
-    unassociated_enhancements, and not_git_enhancements) adjusted to the passed
-    time zone in a dictionary with the keys being the tables' names.
+        changes - A dictionary of (previous_table, table) tuples with the
+                    Zendesk IDs of the changed enhancements as keys, as
+                    returned by load_changes.
+        display_tables - The current display-ready enhancement tables.
+        is_zendesk_user - True if the user the rows are displayed to has the
+                            Zendesk view type.
+
+    Returns a dictionary of the 'counts' of the tables and the lists of
+    'added', 'moved', 'updated' and 'removed' rows. 'full_refresh' is true if
+    a changed enhancement is missing from the tables, which happens when the
+    changelog and the tables are from different data versions.
     """
-    offset_delta = timedelta(hours=utc_offset)
-
-    for enhancement in chain(cache_data['need_attention'],
-                             cache_data['tracking']):
-        zen_datetime = enhancement['zen_datetime'] + offset_delta
-        enhancement['zen_date'] = zen_datetime.strftime('%m/%d/%Y')
-        enhancement['zen_time'] = zen_datetime.strftime('%I:%M %p')
-        enhancement['zen_sortable_datetime'] = \
-                mktime(zen_datetime.timetuple())
-        git_datetime = enhancement['git_datetime'] + offset_delta
-        enhancement['git_date'] = git_datetime.strftime('%m/%d/%Y')
-        enhancement['git_time'] = git_datetime.strftime('%I:%M %p')
-        enhancement['git_sortable_datetime'] = \
-                mktime(git_datetime.timetuple())
-
-    for enhancement in chain(cache_data['unassociated_enhancements'],
-                             cache_data['not_git_enhancements']):
-        zen_datetime = enhancement['zen_datetime'] + offset_delta
-        enhancement['zen_date'] = zen_datetime.strftime('%m/%d/%Y')
-        enhancement['zen_time'] = zen_datetime.strftime('%I:%M %p')
-        enhancement['zen_sortable_datetime'] = \
-                mktime(zen_datetime.timetuple())
-
-    enhancement_tables = {
-        'need_attention': cache_data['need_attention'],
-        'tracking': cache_data['tracking'],
-        'unassociated_enhancements': cache_data['unassociated_enhancements'],
-        'not_git_enhancements': cache_data['not_git_enhancements']
+    rows = {} # Display rows of the changed enhancements with their IDs as keys.
+    for table in ENHANCEMENT_TABLES:
+        for row in display_tables[table]:
+            if row['zen_id'] in changes:
+                rows[row['zen_id']] = row
+
+    table_changes = {
+        'full_refresh': False,
+        'counts': dict((table, len(display_tables[table]))
+                       for table in ENHANCEMENT_TABLES),
+        'added': [],
+        'moved': [],
+        'updated': [],
+        'removed': [],
     }
+    for zen_id, (previous_table, table) in sorted(changes.items()):
+        if table is None:
+            if previous_table is not None:
+                table_changes['removed'].append(
+                    {'zen_id': zen_id, 'previous_table': previous_table}
+                )
+            continue
+
+        row = rows.get(zen_id)
+        if row is None or row['table'] != table:
+            return {'full_refresh': True}
+        row_change = {'zen_id': zen_id,
+                      'table': table,
+                      'cells': format_display_row(table, row, is_zendesk_user)}
+        if previous_table is None:
+            table_changes['added'].append(row_change)
+        elif previous_table != table:
+            row_change['previous_table'] = previous_table
+            table_changes['moved'].append(row_change)
+        else:
+            table_changes['updated'].append(row_change)
 
-    return enhancement_tables
+    return table_changes
+
+@login_required
+def enhancement_table_data(request, table):
+    """Serves a page of one of the enhancement tables of the home page as JSON
+    for the server-side processing of jquery.dataTables.js. The table is
+    filtered, sorted and paged by the parameters that jquery.dataTables.js
+    sends, so only the displayed rows are sent to the browser.
+
+    Parameters:
+        request - The request object that contains the current user's data and
+                    the jquery.dataTables.js parameters (sEcho,
+                    iDisplayStart, iDisplayLength, sSearch, iSortCol_0 and
+                    sSortDir_0) as GET data.
+        table - The name of the enhancement table to serve, which is one of the
+                names in ENHANCEMENT_TABLES.
+    """
+    if table not in ENHANCEMENT_TABLES:
+        raise Http404
+
+    profile = request.user.get_profile() # Current user's profile
+    api_access_data = profile.api_access_data
+    is_zendesk_user = profile.view_type == 'ZEN'
+
+    try:
+        echo = int(request.GET.get('sEcho', 0))
+        start = max(int(request.GET.get('iDisplayStart', 0)), 0)
+        length = int(request.GET.get('iDisplayLength', 25))
+        sort_column = int(request.GET.get('iSortCol_0', 0))
+    except ValueError:
+        return HttpResponseBadRequest('Invalid table parameters.')
+    descending = request.GET.get('sSortDir_0') == 'desc'
+    search = request.GET.get('sSearch', '')
+
+    # The table is empty if the cache data was evicted since the home page was
+    # rendered.
+    rows = []
+    manifest = load_cache_manifest(api_access_data)
+    if manifest is not None:
+        display_tables = get_display_tables(api_access_data, manifest,
+                                            profile.utc_offset)
+        if display_tables is not None:
+            rows = display_tables[table]
+
+    filtered_rows = filter_display_rows(rows, search)
+    try:
+        sorted_rows = sort_display_rows(filtered_rows, table, sort_column,
+                                        descending, is_zendesk_user)
+    except IndexError:
+        return HttpResponseBadRequest('Invalid table parameters.')
+
+    # A length of -1 is sent when the user chooses to display all of the rows.
+    if length < 0:
+        page_rows = sorted_rows[start:]
+    else:
+        page_rows = sorted_rows[start:start + length]
+
+    table_data = {
+        'sEcho': echo,
+        'iTotalRecords': len(rows),
+        'iTotalDisplayRecords': len(filtered_rows),
+        'aaData': [format_display_row(table, row, is_zendesk_user)
+                   for row in page_rows],
+    }
+    return HttpResponse(json.dumps(table_data),
+                        content_type='application/json')
 
 @login_required
 @user_passes_test(lambda user: user.get_profile().is_group_superuser)
@@ -646,8 +874,168 @@ def group_superuser_home(request):
         'user_activate_form': user_activate_form,
         'api_access_change_form': api_access_change_form,
         'product_name': product_name,
-        'auth_url': GIT_AUTH_URL
+        'auth_url': GIT_AUTH_URL,
+        'git_webhook_url': '%s%s' % (settings.ABSOLUTE_SITE_URL, reverse(
+            'git_webhook', kwargs={'api_access_id': api_access_data.id}
+        )),
+        'zen_webhook_url': '%s%s' % (settings.ABSOLUTE_SITE_URL, reverse(
+            'zen_webhook', kwargs={'api_access_id': api_access_data.id}
+        )),
+        'git_webhook_secret': _get_git_webhook_secret(api_access_data),
+        'zen_fieldid': api_access_data.zen_fieldid
     }
 
     return render_to_response('superuser_home.html', context,
                               context_instance=RequestContext(request))
+
+@csrf_exempt
+@require_POST
+def git_webhook(request, api_access_id):
+    """Receives the GitHub issues webhook for a group and applies the updated
+    issue in its payload directly to the group's cached enhancement data.
+
+    Parameters:
+        request - The request object that contains the webhook's payload and
+                    its X-Hub-Signature headers.
+        api_access_id - The ID of the API access model of the group that the
+                        webhook was set up for.
+    """
+    api_access_data = get_object_or_404(APIAccessData, id=api_access_id)
+    secret = _get_git_webhook_secret(api_access_data)
+    body = request.raw_post_data
+
+    # GitHub signs the payload with a SHA-256 HMAC, and with a SHA-1 HMAC in
+    # its older X-Hub-Signature header.
+    if 'HTTP_X_HUB_SIGNATURE_256' in request.META:
+        expected_signature = 'sha256=' + \
+                hmac.new(secret, body, sha256).hexdigest()
+        signature = request.META['HTTP_X_HUB_SIGNATURE_256']
+    else:
+        expected_signature = 'sha1=' + hmac.new(secret, body, sha1).hexdigest()
+        signature = request.META.get('HTTP_X_HUB_SIGNATURE', '')
+    if not constant_time_compare(signature, expected_signature):
+        return HttpResponseForbidden('Invalid webhook signature.')
+
+    # Other events, such as the ping sent when the webhook is created, are
+    # acknowledged without doing anything.
+    if request.META.get('HTTP_X_GITHUB_EVENT') != 'issues':
+        return HttpResponse(status=204)
+
+    try:
+        payload = json.loads(body)
+        git_ticket = project_git_ticket(payload['issue'])
+        repository = payload['repository']
+    except (ValueError, KeyError, TypeError):
+        return HttpResponseBadRequest('Invalid webhook payload.')
+
+    # Ignore issues from any repository other than the group's.
+    if repository['owner']['login'].lower() != \
+    api_access_data.git_org.lower() or \
+    repository['name'].lower() != api_access_data.git_repo.lower():
+        return HttpResponse(status=204)
+
+    try:
+        apply_git_webhook(api_access_data, git_ticket)
+    except SyncLockBusy:
+        return _get_sync_busy_response()
+    return HttpResponse(status=204)
+
+@csrf_exempt
+@require_POST
+def zen_webhook(request, api_access_id):
+    """Receives the Zendesk webhook for a group, sent by a Zendesk trigger when
+    a product_enhancement ticket changes, and applies the ticket in its payload
+    directly to the group's cached enhancement data.
+
+    Parameters:
+        request - The request object that contains the webhook's payload and
+                    its X-Zendesk-Webhook-Signature headers.
+        api_access_id - The ID of the API access model of the group that the
+                        webhook was set up for.
+
+    The payload is expected to be the JSON object that is shown on the
+    superuser home page, with the ticket's ID, subject, status, requester ID,
+    requester name, update time, tags and association field value. It is
+    verified with the signing secret that Zendesk created for the webhook,
+    which the group superuser copies into the group's API access settings.
+    Webhooks signed more than ZEN_WEBHOOK_MAX_AGE seconds ago are rejected.
+    """
+    api_access_data = get_object_or_404(APIAccessData, id=api_access_id)
+    if not api_access_data.zen_webhook_secret:
+        return HttpResponseForbidden('No webhook signing secret is set.')
+    secret = api_access_data.zen_webhook_secret.encode('utf-8')
+    body = request.raw_post_data
+
+    # Zendesk signs the payload with a base64 encoded SHA-256 HMAC of the
+    # signature timestamp followed by the payload.
+    timestamp = request.META.get('HTTP_X_ZENDESK_WEBHOOK_SIGNATURE_TIMESTAMP',
+                                 '')
+    expected_signature = b64encode(
+        hmac.new(secret, timestamp + body, sha256).digest()
+    )
+    signature = request.META.get('HTTP_X_ZENDESK_WEBHOOK_SIGNATURE', '')
+    if not constant_time_compare(signature, expected_signature):
+        return HttpResponseForbidden('Invalid webhook signature.')
+    try:
+        signed_at = datetime.strptime(timestamp, ZEN_WEBHOOK_DATETIME_FORMAT)
+    except ValueError:
+        return HttpResponseForbidden('Invalid webhook signature timestamp.')
+    age = datetime.utcnow() - signed_at
+    if abs(age.days * 86400 + age.seconds) > ZEN_WEBHOOK_MAX_AGE:
+        return HttpResponseForbidden('Expired webhook signature.')
+
+    try:
+        payload = json.loads(body)['ticket']
+        # The update time is parsed when the ticket is applied to the cache
+        # data, so a value in any other format is rejected here.
+        datetime.strptime(payload['updated_at'], ZEN_WEBHOOK_DATETIME_FORMAT)
+        zen_ticket = {
+            'id': int(payload['id']),
+            'subject': payload['subject'],
+            'status': payload['status'].lower(),
+            'requester_id': int(payload['requester_id']),
+            'updated_at': payload['updated_at'],
+            'url': 'https://%s.zendesk.com/api/v2/tickets/%s.json' % \
+                    (api_access_data.zen_url, payload['id']),
+            'association': payload.get('association') or None,
+        }
+        zen_ticket['git_id'] = get_association_git_id(
+            zen_ticket['association']
+        )
+        tags = payload['tags'].split()
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return HttpResponseBadRequest('Invalid webhook payload.')
+
+    if ZEN_ENHANCEMENT_TAG in tags:
+        try:
+            apply_zen_webhook(api_access_data, zen_ticket,
+                              payload.get('requester_name'))
+        except SyncLockBusy:
+            return _get_sync_busy_response()
+    return HttpResponse(status=204)
+
+def _get_sync_busy_response():
+    """Gets the response to a webhook whose change could not be applied
+    because the group's cache data is being synced. The response is a 503 so
+    that GitHub or Zendesk delivers the webhook again, and its Retry-After
+    header asks for the delivery to be retried once the sync is likely to have
+    finished.
+    """
+    response = HttpResponse('The enhancement data is being synced.',
+                            status=503)
+    response['Retry-After'] = str(settings.SYNC_LOCK_WAIT)
+    return response
+
+def _get_git_webhook_secret(api_access_data):
+    """Gets the secret that GitHub should sign the webhooks it sends for the
+    passed API access model with. Each group's secret is derived from the
+    site's secret key, so one group's secret cannot be used to send webhooks
+    for another group.
+
+    Parameters:
+        api_access_data - The API access model of the group.
+
+    Returns the secret as a string of hexadecimal digits.
+    """
+    return hmac.new(settings.SECRET_KEY, 'webhook:%i' % api_access_data.id,
+                    sha256).hexdigest()
@@ -123,6 +123,92 @@ CLIENT_ID = os.environ['GITZEN_GITHUB_CLIENT_ID']
 # Consumer secret for OAuth access of the GitHub API
 CLIENT_SECRET = os.environ['GITZEN_GITHUB_CLIENT_SECRET']
 
+# Maximum number of GitHub API requests that may be in flight at once while
+# gathering the issues associated with a group's Zendesk tickets. Requests are
+# only made concurrently in processes where gevent has patched the socket
+# module, which are the gunicorn gevent workers and the refresh_caches worker.
+GIT_FETCH_CONCURRENCY = int(os.environ.get('GITZEN_GIT_FETCH_CONCURRENCY', 10))
+
+# Maximum number of batches of Zendesk users that are requested at once while
+# gathering a group's enhancement data. It is kept low since the Zendesk
+# searches of the gathering are made at the same time. Like
+# GIT_FETCH_CONCURRENCY, it only has an effect where gevent has patched the
+# socket module.
+ZEN_USER_FETCH_CONCURRENCY = int(
+    os.environ.get('GITZEN_ZEN_USER_FETCH_CONCURRENCY', 2)
+)
+
+# Number of GitHub issues that are requested together in a single query to the
+# GitHub GraphQL API. Issues missing from a query's results, and issues whose
+# cached records have an ETag to revalidate, are requested one at a time from
+# the REST API. Set to 1 to request every issue on its own.
+GIT_BATCH_SIZE = int(os.environ.get('GITZEN_GIT_BATCH_SIZE', 50))
+
+# URL of the GitHub GraphQL API that batches of issues are queried from.
+GIT_GRAPHQL_URL = os.environ.get('GITZEN_GITHUB_GRAPHQL_URL',
+                                 'https://api.github.com/graphql')
+
+# Whether refreshes read the changes to GitHub issues from the repository's
+# issue events feed instead of listing every issue updated since the last sync.
+# The feed is polled conditionally, so a refresh of an idle repository costs no
+# GitHub requests against the rate limit. Issues are listed again whenever the
+# feed no longer reaches back to the last event that was read. The feed does
+# not record comments, so the update times of commented issues may lag until
+# another event or a webhook updates them. Environment variables are Strings,
+# not booleans.
+GIT_EVENTS_SYNC = os.environ.get('GITZEN_GIT_EVENTS_SYNC', 'False') != 'False'
+
+# Maximum number of keep-alive connections each process holds open to a single
+# API host. Requests for the same host and credentials share these connections.
+API_POOL_SIZE = int(os.environ.get('GITZEN_API_POOL_SIZE', 10))
+
+# Number of seconds after its last update that a group's cached enhancement data
+# is refreshed in the background when the group's home page is viewed.
+CACHE_STALE_AFTER = int(os.environ.get('GITZEN_CACHE_STALE_AFTER', 300))
+
+# Number of seconds that the home page waits for a group's enhancement data to be
+# gathered when the group has no cached data at all.
+CACHE_BUILD_DEADLINE = int(os.environ.get('GITZEN_CACHE_BUILD_DEADLINE', 20))
+
+# Number of seconds between the rounds of the refresh_caches worker, which
+# updates every group's cached enhancement data that is older than this.
+CACHE_REFRESH_INTERVAL = int(os.environ.get('GITZEN_CACHE_REFRESH_INTERVAL',
+                                            120))
+
+# Maximum number of groups whose cached enhancement data the refresh_caches
+# worker updates at once, so that a slow update of one group does not hold up
+# the others.
+CACHE_REFRESH_CONCURRENCY = int(
+    os.environ.get('GITZEN_CACHE_REFRESH_CONCURRENCY', 4)
+)
+
+# Number of seconds that a group's cached enhancement data is kept in the cache
+# after it was last written. Unchanged parts of the data are only written again
+# by a sync once half of this time has passed, so this should be much longer
+# than the time between syncs.
+CACHE_DATA_TIMEOUT = int(os.environ.get('GITZEN_CACHE_DATA_TIMEOUT', 2592000))
+
+# Number of seconds that a process may hold the lock on syncing a group's cached
+# enhancement data before the lock expires.
+SYNC_LOCK_LEASE = int(os.environ.get('GITZEN_SYNC_LOCK_LEASE', 300))
+
+# Number of seconds that a request waits for another process to finish syncing
+# a group's cached enhancement data before going on with the previous data.
+SYNC_LOCK_WAIT = int(os.environ.get('GITZEN_SYNC_LOCK_WAIT', 10))
+
+# Number of display-ready sets of enhancement tables that each process keeps in
+# memory. A set is kept for every combination of group, version of the group's
+# cached data and UTC offset that the home page was recently viewed with.
+DISPLAY_TABLES_CACHE_SIZE = int(
+    os.environ.get('GITZEN_DISPLAY_TABLES_CACHE_SIZE', 16)
+)
+
+# Number of seconds that the rendered HTML of a group's enhancement tables is
+# kept in the cache. The rendered tables are replaced as soon as a sync changes
+# the group's enhancements, so this only limits how long unused ones are kept.
+RENDERED_TABLES_TIMEOUT = int(os.environ.get('GITZEN_RENDERED_TABLES_TIMEOUT',
+                                             86400))
+
 # List of callables that know how to import templates from various sources.
 TEMPLATE_LOADERS = (
     'django.template.loaders.filesystem.Loader',
@@ -167,7 +253,8 @@ AUTH_PROFILE_MODULE = 'enhancement_tracking.UserProfile'
 
 # A sample logging configuration. The only tangible logging
 # performed by this configuration is to send an email to
-# the site admins on every HTTP 500 error.
+# the site admins on every HTTP 500 error, and to write the
+# warnings of the application to stderr.
 # See http://docs.djangoproject.com/en/dev/topics/logging for
 # more details on how to customize your logging configuration.
 LOGGING = {
@@ -177,6 +264,10 @@ LOGGING = {
         'mail_admins': {
             'level': 'ERROR',
             'class': 'django.utils.log.AdminEmailHandler'
+        },
+        'console': {
+            'level': 'WARNING',
+            'class': 'logging.StreamHandler'
         }
     },
     'loggers': {
@@ -185,6 +276,11 @@ LOGGING = {
             'level': 'ERROR',
             'propagate': True,
         },
+        'gitzen': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': True,
+        },
     }
 }
 
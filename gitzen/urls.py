@@ -8,6 +8,9 @@ urlpatterns = patterns('gitzen.enhancement_tracking.views',
     url(r'^logout/$', 'user_logout', name='logout'),
     url(r'^create/$', 'group_creation_form_handler', name='group_creation'),
     url(r'^home/$', 'home', name='home'),
+    url(r'^home/tables/(?P<table>\w+)/$', 'enhancement_table_data',
+        name='enhancement_table_data'),
+    url(r'^home/changes/$', 'enhancement_changes', name='enhancement_changes'),
     url(r'^change/$', 'change_form_handler', name='change_account_settings'),
     url(r'^confirm_changes/$', 'confirm_changes', name='confirm_changes'),
 )
@@ -36,6 +39,14 @@ urlpatterns += patterns('gitzen.enhancement_tracking.views',
         'confirm_api_access_changes', name='confirm_api_access_changes'),
 )
 
+# URL patterns for the webhooks sent by GitHub and Zendesk
+urlpatterns += patterns('gitzen.enhancement_tracking.views',
+    url(r'^webhooks/github/(?P<api_access_id>\d+)/$', 'git_webhook',
+        name='git_webhook'),
+    url(r'^webhooks/zendesk/(?P<api_access_id>\d+)/$', 'zen_webhook',
+        name='zen_webhook'),
+)
+
 if settings.DEBUG:  # This is implicit, but make it explicit
     urlpatterns += staticfiles_urlpatterns()
 
@@ -1,10 +1,19 @@
 #!/usr/bin/env python
+import sys
+
+# The refresh_caches worker makes its API requests concurrently with gevent,
+# which only works once the socket module is patched. The patch must come
+# before anything else is imported, so that Django and the modules it imports
+# use the patched socket module as well.
+if sys.argv[1:2] == ['refresh_caches']:
+    from gevent import monkey
+    monkey.patch_all()
+
 from django.core.management import execute_manager
 import imp
 try:
     m_file, m_pathname, m_description = imp.find_module('settings', ['gitzen'])
 except ImportError:
-    import sys
     sys.stderr.write("Error: Can't find the file 'settings.py' in the directory containing %r. It appears you've customized things.\nYou'll have to run django-admin.py, passing it your settings module.\n" % __file__)
     sys.exit(1)
 